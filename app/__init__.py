@@ -4,8 +4,14 @@ Internet Speed Test Application Package
 网速测试应用程序包 - MVC架构版本
 """
 
-from .application import SpeedTestApp
-
 __version__ = '0.0.4'
 __author__ = 'pengcunfu'
 __all__ = ['SpeedTestApp']
+
+
+def __getattr__(name):
+    """延迟导入GUI应用类，避免无界面环境（如命令行模式）加载PySide6"""
+    if name == 'SpeedTestApp':
+        from .application import SpeedTestApp
+        return SpeedTestApp
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,738 @@
+# -*- coding: utf-8 -*-
+"""
+Command Line Interface
+无界面命令行入口 - 直接驱动数据模型并输出JSON
+
+用法:
+    python -m app.cli [--interface NAME | --source ADDR] [--proxy direct|system|URL] download|upload|both|ping
+    python -m app.cli ip [--info] [--lookup IP] [--bulk FILE] [--offline]
+    python -m app.cli geodb CSV [CSV ...] [--output geo.db]
+    python -m app.cli dualstack [--duration 10]
+    python -m app.cli interfaces [--names eth0 wlan0] [--duration 10] [--ping-only]
+    python -m app.cli [--proxy system|URL] proxycompare [--duration 5]
+    python -m app.cli udp --server HOST:PORT [--rate 10] [--duration 10] [--mode cbr|ramp]
+    python -m app.cli soak [--hours H] [--cycle S] [--duty-cycle D]
+    python -m app.cli schedule (--config plans.json | --type ping --interval 300)
+    python -m app.cli serve [--port 8765] [--token TOKEN]
+    python -m app.cli history [--since T] [--until T] [--type TYPE] [--aggregate day]
+    python -m app.cli --trace trace.json [--profile] download
+
+注意: 本模块及其导入链不得引入PySide6、matplotlib或pyperclip，
+以保证在无界面服务器上的启动速度和内存占用。
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import contextlib
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from .models.speedtest_model import SpeedTestModel
+from .models.ip_model import IPModel
+from .models.history_model import HistoryModel
+from .models.sample_series import json_default
+from .models.tracer import tracer
+from .models.geo_db import build_database
+from .utils.paths import get_data_dir
+
+
+def _dump_json(data: Dict, pretty: bool = False) -> str:
+    """
+    将结果序列化为JSON文本
+
+    Args:
+        data: 结果字典
+        pretty: 是否缩进输出
+
+    Returns:
+        str: JSON文本
+    """
+    return json.dumps(data, ensure_ascii=False, indent=2 if pretty else None, default=json_default)
+
+
+@contextlib.contextmanager
+def _redirect_logs(quiet: bool):
+    """
+    将模型的print日志重定向到stderr（或丢弃），保证stdout只输出JSON
+
+    Args:
+        quiet: 是否丢弃日志
+    """
+    if quiet:
+        with open(os.devnull, 'w', encoding='utf-8') as sink:
+            with contextlib.redirect_stdout(sink):
+                yield
+    else:
+        with contextlib.redirect_stdout(sys.stderr):
+            yield
+
+
+# 全局--interface/--source/--proxy参数 -> 支持该参数的子命令，其他子命令指定时报错而不是静默忽略
+_GLOBAL_OPTION_COMMANDS = {
+    'interface': ('download', 'upload', 'both', 'ping'),
+    'source': ('download', 'upload', 'both', 'ping'),
+    'proxy': ('download', 'upload', 'both', 'ping', 'proxycompare'),
+}
+
+
+def _check_global_options(parser: argparse.ArgumentParser, args):
+    """
+    检查全局参数是否适用于所选子命令，不适用时退出并提示
+
+    Args:
+        parser: 参数解析器
+        args: 命令行参数
+    """
+    for option, commands in _GLOBAL_OPTION_COMMANDS.items():
+        if getattr(args, option) and args.command not in commands:
+            parser.error(f"--{option} 不适用于 {args.command} 子命令（仅支持 {'/'.join(commands)}）")
+
+
+def _speedtest_options(args) -> Dict:
+    """
+    从命令行参数组装传给SimpleSpeedTest的参数（网卡、源地址、代理）
+
+    Args:
+        args: 命令行参数
+
+    Returns:
+        Dict: 测速参数
+    """
+    options = {}
+    if args.interface:
+        options['interface'] = args.interface
+    if args.source:
+        options['source_address'] = args.source
+    if args.proxy:
+        options['proxy'] = args.proxy
+    return options
+
+
+def _run_speed_test(test_type: str, options: Optional[Dict] = None) -> Dict:
+    """
+    执行网速测试
+
+    Args:
+        test_type: 测试类型 ('download', 'upload', 'both', 'ping')
+        options: 传给SimpleSpeedTest的参数（见_speedtest_options）
+
+    Returns:
+        Dict: 测试结果，失败时包含error字段
+    """
+    model = SpeedTestModel(speedtest_options=options)
+    try:
+        result = model.run_test(test_type)
+        if result is None:
+            return {'error': model.get_last_error() or '测试失败'}
+        return result
+    finally:
+        model.cleanup()
+
+
+def _run_dual_stack_test(duration: int) -> Dict:
+    """
+    执行IPv4/IPv6双栈对比测试
+
+    Args:
+        duration: 每项下载/上传测试的时长（秒）
+
+    Returns:
+        Dict: 测试结果，失败时包含error字段
+    """
+    model = SpeedTestModel()
+    try:
+        result = model.run_dual_stack(duration)
+        if result is None:
+            return {'error': model.get_last_error() or '测试失败'}
+        return result
+    finally:
+        model.cleanup()
+
+
+def _run_interface_test(args) -> Dict:
+    """
+    执行多网卡对比测试
+
+    Args:
+        args: 命令行参数
+
+    Returns:
+        Dict: 测试结果，失败时包含error字段
+    """
+    model = SpeedTestModel()
+    try:
+        result = model.run_per_interface(args.duration, interfaces=args.names,
+                                         bandwidth=not args.ping_only)
+        if result is None:
+            return {'error': model.get_last_error() or '测试失败'}
+        return result
+    finally:
+        model.cleanup()
+
+
+def _run_udp_test(args) -> Dict:
+    """
+    执行UDP测试
+
+    Args:
+        args: 命令行参数
+
+    Returns:
+        Dict: 测试结果，失败时包含error字段
+    """
+    options = {
+        'rate_mbps': args.rate,
+        'duration': args.duration,
+        'mode': args.mode,
+        'steps': args.steps,
+        'payload': args.payload,
+        'echo': not args.no_echo,
+    }
+    if args.server:
+        options['server'] = args.server
+    model = SpeedTestModel(udp_options=options)
+    result = model.run_test('udp')
+    if result is None:
+        return {'error': model.get_last_error() or '测试失败'}
+    return result
+
+
+def _run_proxy_comparison(args) -> Dict:
+    """
+    执行直连/代理对比测试
+
+    Args:
+        args: 命令行参数（--proxy未指定时与系统代理对比）
+
+    Returns:
+        Dict: 测试结果，失败时包含error字段
+    """
+    if args.proxy == 'direct':
+        return {'error': '对比测试需要指定代理（system或代理地址）'}
+    model = SpeedTestModel()
+    try:
+        result = model.run_proxy_comparison(args.duration, proxy=args.proxy or 'system')
+        if result is None:
+            return {'error': model.get_last_error() or '测试失败'}
+        return result
+    finally:
+        model.cleanup()
+
+
+def _run_soak_test(args) -> Dict:
+    """
+    执行长时间稳定性测试
+
+    Args:
+        args: 命令行参数
+
+    Returns:
+        Dict: 测试结果，失败时包含error字段
+    """
+    model = SpeedTestModel()
+    try:
+        result = model.run_soak(
+            duration=args.hours * 3600,
+            cycle_seconds=args.cycle,
+            duty_cycle=args.duty_cycle,
+            direction=args.direction,
+            checkpoint_path=args.checkpoint
+        )
+    except KeyboardInterrupt:
+        return {'error': '稳定性测试被中断，已记录的数据见检查点文件'}
+    if result is None:
+        return {'error': model.get_last_error() or '测试失败'}
+    return result
+
+
+def _load_schedule_config(args) -> Dict:
+    """
+    读取调度配置（配置文件或命令行参数）
+
+    配置文件格式:
+        {"plans": [{"type": "ping", "interval": 300, "jitter": 30,
+                    "quiet_hours": ["23:00", "07:00"]}],
+         "busy_threshold_mbps": 5}
+
+    Args:
+        args: 命令行参数
+
+    Returns:
+        Dict: 调度配置
+    """
+    if args.config:
+        with open(args.config, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    plan = {'type': args.type, 'interval': args.interval, 'jitter': args.jitter}
+    if args.quiet_hours:
+        plan['quiet_hours'] = args.quiet_hours.split('-', 1)
+    return {'plans': [plan]}
+
+
+def _run_scheduler(args) -> Dict:
+    """
+    以守护模式运行定时测试，直到Ctrl+C
+
+    Args:
+        args: 命令行参数
+
+    Returns:
+        Dict: 运行统计
+    """
+    from .services.scheduler import TestPlan, TestScheduler
+    from .services.metrics_exporter import MetricsRegistry, MetricsExporter
+
+    try:
+        config = _load_schedule_config(args)
+        plans = [TestPlan.from_dict(plan) for plan in config.get('plans', [])]
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        return {'error': f"调度配置无效: {e}"}
+    if not plans:
+        return {'error': '调度配置中没有测试计划'}
+
+    history = None if args.no_history else HistoryModel(args.history_db)
+
+    exporter = None
+    result_callback = None
+    if args.metrics_port is not None:
+        registry = MetricsRegistry()
+        if history:
+            registry.seed_from_history(history)
+        exporter = MetricsExporter(registry, host=args.metrics_host, port=args.metrics_port)
+        exporter.start()
+        result_callback = lambda plan, result, duration: registry.record_result(result, plan.test_type, duration)
+
+    scheduler = TestScheduler(
+        plans,
+        history=history,
+        busy_threshold_mbps=config.get('busy_threshold_mbps', args.busy_threshold),
+        result_callback=result_callback
+    )
+    scheduler.run_forever()
+    if exporter:
+        exporter.stop()
+    if history:
+        history.close()
+    return {'runs': scheduler.runs, 'failures': scheduler.failures}
+
+
+def _run_api_server(args) -> Dict:
+    """
+    运行本地REST控制接口，直到Ctrl+C
+
+    Args:
+        args: 命令行参数
+
+    Returns:
+        Dict: 运行统计
+    """
+    from .services.job_queue import Job, JobQueue
+    from .services.api_server import ApiServer
+    from .services.metrics_exporter import MetricsRegistry, MetricsExporter
+
+    history = None if args.no_history else HistoryModel(args.history_db)
+    registry = MetricsRegistry() if args.metrics_port is not None else None
+
+    def on_finished(job):
+        duration = (job.finished - job.started) if job.started else None
+        result = job.result if job.status == Job.DONE else None
+        if registry:
+            registry.record_result(result, job.type, duration)
+        if history and result is not None and job.type in ('download', 'upload', 'both', 'ping'):
+            history.add_result(result)
+
+    jobs = JobQueue(on_finished=on_finished)
+    server = ApiServer(jobs, host=args.host, port=args.port,
+                       token=args.token or os.environ.get('SPEEDTEST_API_TOKEN'))
+    exporter = None
+    if registry:
+        exporter = MetricsExporter(registry, host=args.host, port=args.metrics_port)
+        exporter.start()
+
+    server.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("[控制接口] 收到中断信号，正在停止...")
+    finally:
+        server.stop()
+        jobs.shutdown()
+        if exporter:
+            exporter.stop()
+        if history:
+            history.close()
+    return {'jobs': len(jobs.list())}
+
+
+def _save_history(result: Dict, db_path: Optional[str]):
+    """
+    将测试结果写入历史存储
+
+    Args:
+        result: 测试结果
+        db_path: 数据库路径，None使用默认路径
+    """
+    try:
+        history = HistoryModel(db_path)
+        try:
+            history.add_result(result)
+        finally:
+            history.close()
+    except Exception as e:
+        print(f"[历史记录] 保存测试结果失败: {e}", file=sys.stderr)
+
+
+def _positive_float(value: str) -> float:
+    """
+    解析必须大于0的有限数值参数
+
+    Args:
+        value: 参数文本
+
+    Returns:
+        float: 解析后的数值
+    """
+    try:
+        number = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"无效的数值: {value}")
+    if not 0 < number < float('inf'):
+        raise argparse.ArgumentTypeError(f"必须是大于0的有限值: {value}")
+    return number
+
+
+def _positive_int(value: str) -> int:
+    """
+    解析必须大于0的整数参数
+
+    Args:
+        value: 参数文本
+
+    Returns:
+        int: 解析后的整数
+    """
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"无效的整数: {value}")
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"必须大于0: {value}")
+    return number
+
+
+def _parse_time(value: str) -> datetime:
+    """
+    解析命令行时间参数（ISO格式，如 2024-01-31 或 2024-01-31T08:00）
+
+    Args:
+        value: 时间文本
+
+    Returns:
+        datetime: 解析后的时间
+    """
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"无效的时间格式: {value}")
+
+
+def _run_history_query(args) -> Dict:
+    """
+    查询历史记录
+
+    Args:
+        args: 命令行参数
+
+    Returns:
+        Dict: 查询结果
+    """
+    history = HistoryModel(args.history_db)
+    try:
+        if args.aggregate:
+            bucket = None if args.aggregate == 'all' else args.aggregate
+            rows = history.aggregate(args.since, args.until, args.type, args.interface, bucket=bucket)
+            return {'aggregates': rows}
+        rows = history.query(args.since, args.until, args.type, args.interface, limit=args.limit)
+        return {'results': rows}
+    finally:
+        history.close()
+
+
+def _run_ip_query(info: bool, lookup: Optional[str], agreement: int = 1, use_cache: bool = True,
+                  offline: bool = False) -> Dict:
+    """
+    执行IP查询
+
+    Args:
+        info: 是否查询本机IP的详细信息
+        lookup: 要查询的外部IP地址
+        agreement: 需要多少个服务返回相同的本机IP
+        use_cache: 是否使用IP信息缓存
+        offline: 只查询离线IP库
+
+    Returns:
+        Dict: 查询结果，失败时包含error字段
+    """
+    model = IPModel(offline_only=offline)
+
+    if lookup:
+        result = model.get_ip_info(lookup, use_cache)
+        return result if result else {'error': '查询IP信息失败'}
+
+    ip = model.get_current_ip(agreement)
+    if not ip:
+        return {'error': '获取IP地址失败'}
+    if not info:
+        return {'ip': ip}
+
+    result = model.get_ip_info(ip, use_cache)
+    return result if result else {'error': '获取IP信息失败'}
+
+
+def _run_bulk_ip_lookup(path: str, use_cache: bool, out, offline: bool = False) -> Dict:
+    """
+    批量查询文件中的IP地址，每得到一条结果就向out输出一行JSON
+
+    Args:
+        path: 输入文件路径（每行一个IP地址或一行日志，"-"表示标准输入）
+        use_cache: 是否使用IP信息缓存
+        out: 结果输出流
+        offline: 只查询离线IP库
+
+    Returns:
+        Dict: 汇总信息，失败时包含error字段
+    """
+    model = IPModel(offline_only=offline)
+    start = time.time()
+    try:
+        source = sys.stdin if path == '-' else open(path, 'r', encoding='utf-8', errors='ignore')
+    except OSError as e:
+        return {'error': f'无法读取输入文件: {e}'}
+
+    try:
+        for ip, info in model.lookup_many(source, use_cache):
+            if info:
+                line = dict(info)
+            else:
+                line = {'error': '查询IP信息失败' if IPModel.parse_ip(ip) else '无法识别的IP地址'}
+            line['ip'] = ip
+            out.write(_dump_json(line) + '\n')
+            out.flush()
+    finally:
+        if source is not sys.stdin:
+            source.close()
+
+    stats = model.last_bulk.stats if model.last_bulk else {}
+    return {'summary': dict(stats, elapsed=round(time.time() - start, 3),
+                            providers=model.last_bulk.provider_stats() if model.last_bulk else {},
+                            provider_health=model.health.snapshot())}
+
+
+def _run_geodb_build(csv_paths: List[str], output: Optional[str]) -> Dict:
+    """
+    把CSV格式的IP段数据编译为离线IP库
+
+    Args:
+        csv_paths: CSV文件路径列表
+        output: 输出路径，默认为应用数据目录下的geo.db（IP查询会自动使用）
+
+    Returns:
+        Dict: 统计信息，失败时包含error字段
+    """
+    output = output or os.path.join(get_data_dir(), IPModel.GEO_DB_FILENAME)
+    start = time.time()
+    try:
+        stats = build_database(csv_paths, output)
+    except OSError as e:
+        return {'error': f'生成离线IP库失败: {e}'}
+    return dict(stats, output=output, elapsed=round(time.time() - start, 3))
+
+
+def _export_trace(path: str):
+    """
+    导出性能追踪数据并输出各阶段耗时汇总
+
+    Args:
+        path: 输出文件路径
+    """
+    try:
+        tracer.export_chrome_trace(path)
+    except OSError as e:
+        print(f"[性能追踪] 导出失败: {e}")
+        return
+    print(f"[性能追踪] 已导出 {tracer.event_count} 个事件到 {path}")
+    for name, stats in tracer.summary().items():
+        print(f"[性能追踪] {name}: {stats['count']} 次，共 {stats['total_ms']} ms，"
+              f"平均 {stats['avg_ms']} ms，最长 {stats['max_ms']} ms")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    构建命令行参数解析器
+
+    Returns:
+        argparse.ArgumentParser: 参数解析器
+    """
+    parser = argparse.ArgumentParser(
+        prog='python -m app.cli',
+        description='网速测试工具 - 命令行模式（结果以JSON输出到stdout，日志输出到stderr）'
+    )
+    parser.add_argument('-q', '--quiet', action='store_true', help='不输出日志')
+    parser.add_argument('--pretty', action='store_true', help='缩进格式化JSON输出')
+    parser.add_argument('--history-db', metavar='PATH', help='历史数据库路径（默认位于应用数据目录）')
+    parser.add_argument('--no-history', action='store_true', help='不将测试结果写入历史记录')
+    parser.add_argument('--trace', metavar='PATH', help='记录各阶段耗时并导出为Chrome Trace JSON')
+    parser.add_argument('--profile', action='store_true',
+                        help='配合--trace在测量线程上运行采样分析器（同时导出PATH.collapsed折叠栈）')
+    parser.add_argument('--profile-interval', type=float, default=0.005, help='采样间隔（秒）')
+    bind_group = parser.add_mutually_exclusive_group()
+    bind_group.add_argument('--interface', metavar='NAME', help='通过指定网卡测试（download/upload/both/ping）')
+    bind_group.add_argument('--source', metavar='ADDR', help='使用指定的本机地址作为源地址测试（download/upload/both/ping）')
+    parser.add_argument('--proxy', metavar='MODE',
+                        help='代理模式: direct（直连）、system（系统代理）或代理地址；默认使用环境变量中的代理'
+                             '（download/upload/both/ping/proxycompare）')
+
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('download', help='下载速度测试')
+    subparsers.add_parser('upload', help='上传速度测试')
+    subparsers.add_parser('both', help='完整速度测试（下载+上传）')
+    subparsers.add_parser('ping', help='Ping延迟测试')
+
+    ip_parser = subparsers.add_parser('ip', help='IP信息查询')
+    ip_parser.add_argument('--info', action='store_true', help='查询本机IP的详细信息')
+    ip_parser.add_argument('--lookup', metavar='IP', help='查询指定外部IP的信息')
+    ip_parser.add_argument('--agree', type=int, default=1, metavar='N',
+                           help='至少N个查询服务返回相同IP才采用（默认1，即最快的合法结果）')
+    ip_parser.add_argument('--no-cache', action='store_true', help='忽略IP信息缓存，重新查询')
+    ip_parser.add_argument('--bulk', metavar='FILE',
+                           help='批量查询文件中的IP（每行一个IP或一行日志，- 表示标准输入），逐行输出JSON')
+    ip_parser.add_argument('--offline', action='store_true', help='只查询离线IP库，不访问在线接口')
+
+    geodb_parser = subparsers.add_parser('geodb', help='从CSV生成离线IP库')
+    geodb_parser.add_argument('csv', nargs='+',
+                              help='CSV文件（network列或start/end列，加country/city等位置列；'
+                                   '无表头时按IP2Location LITE格式读取）')
+    geodb_parser.add_argument('--output', metavar='PATH', help='输出路径（默认为应用数据目录下的geo.db）')
+
+    dual_parser = subparsers.add_parser('dualstack', help='IPv4/IPv6双栈对比测试（下载、上传、延迟和连接竞速）')
+    dual_parser.add_argument('--duration', type=int, default=10, help='每项下载/上传测试的时长（秒）')
+
+    iface_parser = subparsers.add_parser('interfaces', help='多网卡对比测试（延迟并行，带宽逐个网卡测试）')
+    iface_parser.add_argument('--names', nargs='+', metavar='NAME', help='要测试的网卡（默认所有已启用的网卡）')
+    iface_parser.add_argument('--duration', type=int, default=10, help='每项下载/上传测试的时长（秒）')
+    iface_parser.add_argument('--ping-only', action='store_true', help='只测试延迟')
+
+    proxy_parser = subparsers.add_parser('proxycompare', help='直连与代理对比测试（--proxy指定代理，默认系统代理）')
+    proxy_parser.add_argument('--duration', type=int, default=5, help='每项下载/上传测试的时长（秒）')
+
+    udp_parser = subparsers.add_parser('udp', help='UDP速率、抖动、丢包和乱序测试（对端运行 app.services.udp_reflector）')
+    udp_parser.add_argument('--server', metavar='HOST:PORT',
+                            help=f'反射服务器地址（默认读取环境变量{SpeedTestModel.UDP_SERVER_ENV}）')
+    udp_parser.add_argument('--rate', type=_positive_float, default=10.0, help='码率(Mbps)，阶梯模式下为最高码率')
+    udp_parser.add_argument('--duration', type=_positive_float, default=10.0, help='总时长（秒）')
+    udp_parser.add_argument('--mode', choices=['cbr', 'ramp'], default='cbr', help='恒定码率或阶梯递增码率')
+    udp_parser.add_argument('--steps', type=_positive_int, default=5, help='阶梯模式的阶段数')
+    udp_parser.add_argument('--payload', type=_positive_int, default=1200, help='数据报大小（字节）')
+    udp_parser.add_argument('--no-echo', action='store_true', help='不要求服务器回显（不统计往返时间）')
+
+    soak_parser = subparsers.add_parser('soak', help='长时间稳定性测试')
+    soak_parser.add_argument('--hours', type=_positive_float, default=1.0, help='总运行时长（小时）')
+    soak_parser.add_argument('--cycle', type=_positive_float, default=60, help='每个周期的时长（秒）')
+    soak_parser.add_argument('--duty-cycle', type=float, default=0.25, help='占空比（每个周期中测速时间所占比例）')
+    soak_parser.add_argument('--direction', choices=['download', 'upload'], default='download', help='测试方向')
+    soak_parser.add_argument('--checkpoint', metavar='PATH', help='检查点文件路径（JSON Lines）')
+
+    schedule_parser = subparsers.add_parser('schedule', help='守护模式：按计划周期性测试并写入历史记录')
+    schedule_parser.add_argument('--config', metavar='PATH', help='调度配置文件（JSON）')
+    schedule_parser.add_argument('--type', choices=['download', 'upload', 'both', 'ping'], default='ping',
+                                 help='测试类型（未指定配置文件时使用）')
+    schedule_parser.add_argument('--interval', type=float, default=900, help='测试间隔（秒）')
+    schedule_parser.add_argument('--jitter', type=float, default=0, help='随机抖动上限（秒）')
+    schedule_parser.add_argument('--quiet-hours', metavar='HH:MM-HH:MM', help='静默时段，例如 23:00-07:00')
+    schedule_parser.add_argument('--busy-threshold', type=float, default=5.0,
+                                 help='背景流量超过该值(Mbps)时推迟测试，0表示不检测')
+    schedule_parser.add_argument('--metrics-port', type=int, help='在该端口提供Prometheus/OpenMetrics指标（/metrics）')
+    schedule_parser.add_argument('--metrics-host', default='0.0.0.0', help='指标服务监听地址')
+
+    serve_parser = subparsers.add_parser('serve', help='运行本地REST控制接口')
+    serve_parser.add_argument('--host', default='127.0.0.1', help='监听地址')
+    serve_parser.add_argument('--port', type=int, default=8765, help='监听端口')
+    serve_parser.add_argument('--token', help='访问令牌（也可通过环境变量SPEEDTEST_API_TOKEN设置）')
+    serve_parser.add_argument('--metrics-port', type=int, help='同时在该端口提供OpenMetrics指标')
+
+    history_parser = subparsers.add_parser('history', help='查询历史测试结果')
+    history_parser.add_argument('--since', type=_parse_time, help='起始时间（包含）')
+    history_parser.add_argument('--until', type=_parse_time, help='结束时间（不包含）')
+    history_parser.add_argument('--type', help='测试类型过滤')
+    history_parser.add_argument('--interface', help='网络接口过滤')
+    history_parser.add_argument('--limit', type=int, default=100, help='最多返回条数')
+    history_parser.add_argument('--aggregate', choices=['hour', 'day', 'week', 'month', 'all'],
+                                help='按时间粒度聚合而不是列出明细')
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    命令行主函数
+
+    Args:
+        argv: 命令行参数，默认使用sys.argv
+
+    Returns:
+        int: 退出代码（0成功，1失败）
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    _check_global_options(parser, args)
+    if args.trace:
+        tracer.enable(profile=args.profile, profile_interval=args.profile_interval)
+
+    stdout = sys.stdout
+    with _redirect_logs(args.quiet):
+        if args.command == 'ip' and args.bulk:
+            result = _run_bulk_ip_lookup(args.bulk, not args.no_cache, stdout, args.offline)
+        elif args.command == 'ip':
+            result = _run_ip_query(args.info, args.lookup, args.agree, not args.no_cache, args.offline)
+        elif args.command == 'geodb':
+            result = _run_geodb_build(args.csv, args.output)
+        elif args.command == 'history':
+            result = _run_history_query(args)
+        elif args.command == 'serve':
+            result = _run_api_server(args)
+        elif args.command == 'schedule':
+            result = _run_scheduler(args)
+        elif args.command == 'dualstack':
+            result = _run_dual_stack_test(args.duration)
+        elif args.command == 'interfaces':
+            result = _run_interface_test(args)
+        elif args.command == 'proxycompare':
+            result = _run_proxy_comparison(args)
+        elif args.command == 'udp':
+            result = _run_udp_test(args)
+            if 'error' not in result and not args.no_history:
+                _save_history(result, args.history_db)
+        elif args.command == 'soak':
+            result = _run_soak_test(args)
+            if 'error' not in result and not args.no_history:
+                _save_history(result, args.history_db)
+        else:
+            result = _run_speed_test(args.command, _speedtest_options(args))
+            if 'error' not in result and not args.no_history:
+                _save_history(result, args.history_db)
+
+        if args.trace:
+            _export_trace(args.trace)
+
+    print(_dump_json(result, args.pretty))
+    return 1 if 'error' in result else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
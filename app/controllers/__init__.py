@@ -6,5 +6,6 @@ Controllers Package
 
 from .speedtest_controller import SpeedTestController
 from .ip_controller import IPController
+from .network_info_controller import NetworkInfoController
 
-__all__ = ['SpeedTestController', 'IPController']
+__all__ = ['SpeedTestController', 'IPController', 'NetworkInfoController']
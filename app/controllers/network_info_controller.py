@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+Network Info Controller
+网络信息控制器 - 在后台线程中并发加载各项网络信息
+"""
+
+from PySide6.QtCore import QObject, QThread, Signal
+from typing import Dict, List, Optional
+from ..models.network_info_model import NetworkInfoModel
+
+
+class NetworkInfoWorker(QThread):
+    """单项网络信息加载线程"""
+
+    # 信号定义
+    loaded = Signal(str, object)  # 加载完成 (信息项, 数据)
+    error = Signal(str, str)  # 加载失败 (信息项, 错误信息)
+
+    def __init__(self, name: str, force: bool = False):
+        """
+        初始化工作线程
+
+        Args:
+            name: 信息项名称 ('adapters', 'proxy', 'stats', 'dns')
+            force: 是否忽略缓存
+        """
+        super().__init__()
+        self.name = name
+        self.force = force
+        self.model = NetworkInfoModel()
+
+    def run(self):
+        """线程运行函数"""
+        try:
+            self.loaded.emit(self.name, self.model.collect(self.name, self.force))
+        except Exception as e:
+            self.error.emit(self.name, f"加载失败: {str(e)}")
+
+
+class NetworkInfoController(QObject):
+    """网络信息控制器"""
+
+    # 信号定义
+    data_loaded = Signal(str, object)
+    load_failed = Signal(str, str)
+
+    # 对话框关闭后仍在运行的线程，保留引用直到线程结束（避免线程对象在运行中被销毁）
+    _detached: set = set()
+
+    def __init__(self):
+        """初始化控制器"""
+        super().__init__()
+        self._workers: Dict[str, NetworkInfoWorker] = {}
+
+    def load(self, names: Optional[List[str]] = None, force: bool = False):
+        """
+        并发加载网络信息，每项完成后立即发出data_loaded信号
+
+        Args:
+            names: 要加载的信息项，默认全部
+            force: 是否忽略缓存
+        """
+        for name in names or NetworkInfoModel.COLLECTORS:
+            worker = self._workers.get(name)
+            if worker and worker.isRunning():
+                # 同一项仍在加载中，不重复启动
+                continue
+
+            worker = NetworkInfoWorker(name, force)
+            worker.loaded.connect(self.data_loaded.emit)
+            worker.error.connect(self.load_failed.emit)
+            self._workers[name] = worker
+            worker.start()
+
+    def is_loading(self) -> bool:
+        """
+        检查是否有信息项正在加载
+
+        Returns:
+            bool: 是否正在加载
+        """
+        return any(worker.isRunning() for worker in self._workers.values())
+
+    def shutdown(self):
+        """断开所有线程的信号，仍在运行的线程在结束后自行释放"""
+        for worker in self._workers.values():
+            try:
+                worker.loaded.disconnect()
+                worker.error.disconnect()
+            except (RuntimeError, TypeError):
+                pass
+            if worker.isRunning():
+                self._detached.add(worker)
+                worker.finished.connect(lambda w=worker: NetworkInfoController._detached.discard(w))
+        self._workers = {}
@@ -6,7 +6,8 @@ SpeedTest Controller
 
 from PySide6.QtCore import QObject, QThread, Signal
 from ..models.speedtest_model import SpeedTestModel
-from datetime import datetime
+from ..models.history_model import HistoryModel
+from ..models.tracer import tracer
 
 
 class SpeedTestWorker(QThread):
@@ -18,106 +19,46 @@ class SpeedTestWorker(QThread):
     finished = Signal(dict)  # 完成信号，传递结果字典
     error = Signal(str)  # 错误信号
     
-    def __init__(self, test_type: str):
+    def __init__(self, test_type: str, udp_options: dict = None):
         """
         初始化工作线程
         
         Args:
-            test_type: 测试类型 ('download', 'upload', 'both', 'ping')
+            test_type: 测试类型 ('download', 'upload', 'both', 'ping', 'udp')
+            udp_options: UDP测试参数（见 SpeedTestModel.UDP_DEFAULTS），None使用默认值
         """
         super().__init__()
         self.test_type = test_type
-        self.model = SpeedTestModel(log_callback=self._emit_log)
+        self.model = SpeedTestModel(log_callback=self._emit_log, udp_options=udp_options)
         self._is_running = True
         
     def _emit_log(self, message: str):
         """发送日志信号"""
-        self.log.emit(message)
+        with tracer.span('qt.emit', 'qt', signal='log'):
+            self.log.emit(message)
+            
+    def _emit_progress(self, message: str):
+        """发送进度信号"""
+        with tracer.span('qt.emit', 'qt', signal='progress'):
+            self.progress.emit(message)
         
     def run(self):
         """线程运行函数"""
         try:
-            # 初始化
-            self.progress.emit("正在初始化测试服务...")
-            if not self.model.initialize():
-                self.error.emit("无法初始化网速测试服务")
-                return
-                
-            if not self._is_running:
+            result = self.model.run_test(
+                self.test_type,
+                progress_callback=self._emit_progress,
+                is_cancelled=lambda: not self._is_running
+            )
+            if result is None:
+                error_msg = self.model.get_last_error()
+                if error_msg and self._is_running:
+                    self.error.emit(error_msg)
                 return
                 
-            # 获取服务器列表
-            self.progress.emit("正在获取服务器列表...")
-            if not self.model.get_servers():
-                self.error.emit("无法获取服务器列表，请检查网络连接")
-                return
-                
-            if not self._is_running:
-                return
-                
-            # 选择最佳服务器（HTTP模式直接准备就绪）
-            self.progress.emit("准备开始测速...")
-            server_info = self.model.select_best_server()
-            if server_info is None:
-                self.error.emit("无法找到合适的测试服务器")
-                return
-                
-            # HTTP模式返回空字典表示准备就绪
-            server_name = server_info.get('sponsor', 'HTTP直接测速')
-            server_country = server_info.get('country', '国内CDN')
-            self.progress.emit(f"测速模式: {server_name} ({server_country})")
-            
-            if not self._is_running:
-                return
-                
-            # 执行测试
-            result = {
-                'server': server_info,
-                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            }
-            
-            if self.test_type in ('download', 'both'):
-                self.progress.emit("正在测试下载速度...")
-                download_speed = self.model.test_download()
-                if download_speed is None:
-                    self.error.emit("下载速度测试失败")
-                    return
-                result['download'] = download_speed
-                # 添加下载统计信息
-                if hasattr(self.model, '_simple_speedtest') and self.model._simple_speedtest:
-                    result['download_stats'] = self.model._simple_speedtest.download_stats
-                
-                if not self._is_running:
-                    return
-                    
-            if self.test_type in ('upload', 'both'):
-                self.progress.emit("正在测试上传速度...")
-                upload_speed = self.model.test_upload()
-                if upload_speed is None:
-                    self.error.emit("上传速度测试失败")
-                    return
-                result['upload'] = upload_speed
-                # 添加上传统计信息
-                if hasattr(self.model, '_simple_speedtest') and self.model._simple_speedtest:
-                    result['upload_stats'] = self.model._simple_speedtest.upload_stats
-                
-                if not self._is_running:
-                    return
-                    
-            if self.test_type == 'ping':
-                self.progress.emit("正在测试多个国内服务器的Ping...")
-                ping_results = self.model.ping_multiple_hosts()
-                if ping_results is None:
-                    self.error.emit("Ping测试失败")
-                    return
-                result['ping'] = ping_results['average']
-                result['ping_min'] = ping_results['min']
-                result['ping_max'] = ping_results['max']
-                result['ping_details'] = ping_results['results']
-                result['ping_success_rate'] = f"{ping_results['success_count']}/{ping_results['total_count']}"
-                
             # 发送完成信号
-            self.finished.emit(result)
+            with tracer.span('qt.emit', 'qt', signal='finished'):
+                self.finished.emit(result)
             
         except Exception as e:
             self.error.emit(f"测试过程出错: {str(e)}")
@@ -144,20 +85,36 @@ class SpeedTestController(QObject):
         """初始化控制器"""
         super().__init__()
         self._worker: SpeedTestWorker = None
+        self._history: HistoryModel = None
+        
+    def _get_history(self):
+        """
+        获取历史存储（首次使用时打开数据库）
+        
+        Returns:
+            Optional[HistoryModel]: 历史存储，打开失败返回None
+        """
+        if self._history is None:
+            try:
+                self._history = HistoryModel()
+            except Exception as e:
+                print(f"[历史记录] 打开历史数据库失败: {e}")
+        return self._history
         
-    def start_test(self, test_type: str):
+    def start_test(self, test_type: str, udp_options: dict = None):
         """
         开始测试
         
         Args:
-            test_type: 测试类型 ('download', 'upload', 'both', 'ping')
+            test_type: 测试类型 ('download', 'upload', 'both', 'ping', 'udp')
+            udp_options: UDP测试参数，None使用默认值（反射服务器地址取环境变量）
         """
         # 如果有正在运行的测试，先停止
         if self._worker and self._worker.isRunning():
             self._worker.stop()
             
         # 创建新的工作线程
-        self._worker = SpeedTestWorker(test_type)
+        self._worker = SpeedTestWorker(test_type, udp_options)
         
         # 连接信号
         self._worker.progress.connect(self.progress_updated.emit)
@@ -170,6 +127,12 @@ class SpeedTestController(QObject):
         
     def _on_test_finished(self, result: dict):
         """测试完成处理"""
+        history = self._get_history()
+        if history:
+            try:
+                history.add_result(result)
+            except Exception as e:
+                print(f"[历史记录] 保存测试结果失败: {e}")
         self.test_completed.emit(result)
         
     def _on_test_error(self, error_msg: str):
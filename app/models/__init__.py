@@ -6,5 +6,6 @@ Models Package
 
 from .speedtest_model import SpeedTestModel
 from .ip_model import IPModel
+from .history_model import HistoryModel
 
-__all__ = ['SpeedTestModel', 'IPModel']
+__all__ = ['SpeedTestModel', 'IPModel', 'HistoryModel']
@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+"""
+Offline Geo Database
+离线IP地理位置库 - 把CSV格式的IP段数据编译为有序的二进制文件，查询时内存映射并二分查找
+
+文件格式（整数均为小端序）:
+    文件头   magic(8) 版本(uint32) IPv4段数(uint32) IPv6段数(uint32) 位置数(uint32)
+    IPv4段表 每段 起始(4字节大端) 结束(4字节大端) 位置序号(uint32)，按起始地址排序
+    IPv6段表 每段 起始(16字节大端) 结束(16字节大端) 位置序号(uint32)，按起始地址排序
+    位置偏移 (位置数+1)个uint32，相对位置数据区的偏移
+    位置数据 每个位置一个UTF-8 JSON对象，相同的位置只保存一次
+
+地址按大端字节保存，字节串的大小顺序与地址的数值顺序一致，两种地址族使用同一套查找代码。
+"""
+
+import os
+import csv
+import json
+import mmap
+import struct
+import ipaddress
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+MAGIC = b'IPGEODB\x00'
+VERSION = 1
+_HEADER = struct.Struct('<8sIIII')
+_INDEX = struct.Struct('<I')
+
+# 位置信息字段（与 IPModel.get_ip_info 的返回字段一致）
+LOCATION_FIELDS = ('country', 'countryCode', 'region', 'city', 'isp', 'timezone')
+
+# CSV列名 -> 字段，兼容常见数据源的命名
+_COLUMN_ALIASES = {
+    'network': 'network', 'cidr': 'network',
+    'start': 'start', 'ip_from': 'start', 'start_ip': 'start', 'range_start': 'start',
+    'end': 'end', 'ip_to': 'end', 'end_ip': 'end', 'range_end': 'end',
+    'country': 'country', 'country_name': 'country',
+    'countrycode': 'countryCode', 'country_code': 'countryCode', 'country_iso_code': 'countryCode',
+    'region': 'region', 'region_name': 'region', 'subdivision_1_name': 'region',
+    'city': 'city', 'city_name': 'city',
+    'isp': 'isp', 'org': 'isp', 'organization': 'isp', 'as_name': 'isp',
+    'timezone': 'timezone', 'time_zone': 'timezone',
+}
+
+# 没有表头时的列顺序（IP2Location LITE 格式：整数起止地址、国家代码、国家、地区、城市）
+_HEADERLESS_COLUMNS = ('start', 'end', 'countryCode', 'country', 'region', 'city')
+
+
+def _parse_address(value: str) -> ipaddress._BaseAddress:
+    """
+    解析地址，支持点分/冒号格式和整数格式
+
+    整数不超过32位时按IPv4处理；IPv4映射的IPv6地址（::ffff:a.b.c.d）转换为IPv4。
+
+    Args:
+        value: 地址文本
+
+    Returns:
+        IPv4Address或IPv6Address
+
+    Raises:
+        ValueError: 无法解析
+    """
+    value = value.strip()
+    if value.isdigit():
+        number = int(value)
+        address = ipaddress.IPv4Address(number) if number <= 0xFFFFFFFF else ipaddress.IPv6Address(number)
+    else:
+        address = ipaddress.ip_address(value)
+    if address.version == 6 and address.ipv4_mapped:
+        return address.ipv4_mapped
+    return address
+
+
+def _chain(first_rows: List, reader) -> Iterator:
+    """先返回first_rows，再返回reader中的行"""
+    yield from first_rows
+    yield from reader
+
+
+def _read_ranges(csv_path: str) -> Iterator[Tuple[ipaddress._BaseAddress, ipaddress._BaseAddress, Dict]]:
+    """
+    逐行读取CSV中的IP段
+
+    支持两种写法：network列（CIDR），或start/end列（地址或整数）。没有可识别的表头时按
+    IP2Location LITE 的列顺序读取。
+
+    Args:
+        csv_path: CSV文件路径
+
+    Yields:
+        (起始地址, 结束地址, 位置信息)
+    """
+    with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f)
+        first = next(reader, None)
+        if first is None:
+            return
+        columns = [_COLUMN_ALIASES.get(name.strip().lower()) for name in first]
+        if 'network' not in columns and not ('start' in columns and 'end' in columns):
+            # 没有表头，第一行也是数据
+            columns = list(_HEADERLESS_COLUMNS)
+            rows = [first]
+        else:
+            rows = []
+
+        for line_no, row in enumerate(_chain(rows, reader), 1):
+            record = {column: value.strip() for column, value in zip(columns, row) if column}
+            try:
+                if 'network' in record:
+                    network = ipaddress.ip_network(record['network'], strict=False)
+                    start, end = network.network_address, network.broadcast_address
+                else:
+                    start, end = _parse_address(record['start']), _parse_address(record['end'])
+                if start.version != end.version or start > end:
+                    raise ValueError('起止地址无效')
+            except (KeyError, ValueError) as e:
+                print(f"[离线IP库] 跳过第 {line_no} 行: {e}")
+                continue
+            location = {field: record[field] for field in LOCATION_FIELDS
+                        if record.get(field) and record[field] != '-'}
+            yield start, end, location
+
+
+def build_database(csv_paths: List[str], output_path: str) -> Dict:
+    """
+    把CSV格式的IP段数据编译为二进制库
+
+    重叠的IP段只保留起始地址较小的（相同时保留先出现的），被丢弃的段数计入统计。
+
+    Args:
+        csv_paths: CSV文件路径列表（IPv4和IPv6可以分开提供）
+        output_path: 输出文件路径
+
+    Returns:
+        Dict: 统计信息（各地址族段数、位置数、丢弃的重叠段数、文件大小）
+    """
+    ranges = {4: [], 6: []}
+    locations: List[bytes] = []
+    location_index: Dict[bytes, int] = {}
+
+    for path in csv_paths:
+        for start, end, location in _read_ranges(path):
+            encoded = json.dumps(location, ensure_ascii=False, sort_keys=True,
+                                 separators=(',', ':')).encode('utf-8')
+            index = location_index.get(encoded)
+            if index is None:
+                index = location_index[encoded] = len(locations)
+                locations.append(encoded)
+            ranges[start.version].append((start.packed, end.packed, index))
+
+    overlaps = 0
+    for version in (4, 6):
+        # 稳定排序：起始地址相同时保留先出现的段
+        items = sorted(ranges[version], key=lambda item: item[0])
+        kept = []
+        for item in items:
+            if kept and item[0] <= kept[-1][1]:
+                overlaps += 1
+                continue
+            kept.append(item)
+        ranges[version] = kept
+
+    temp_path = f"{output_path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, len(ranges[4]), len(ranges[6]), len(locations)))
+        for version in (4, 6):
+            for start, end, index in ranges[version]:
+                f.write(start + end + _INDEX.pack(index))
+        offset = 0
+        for encoded in locations:
+            f.write(_INDEX.pack(offset))
+            offset += len(encoded)
+        f.write(_INDEX.pack(offset))
+        for encoded in locations:
+            f.write(encoded)
+    os.replace(temp_path, output_path)
+
+    return {
+        'ipv4_ranges': len(ranges[4]),
+        'ipv6_ranges': len(ranges[6]),
+        'locations': len(locations),
+        'overlaps_dropped': overlaps,
+        'size_bytes': os.path.getsize(output_path),
+    }
+
+
+class GeoDatabase:
+    """
+    离线IP地理位置库（只读）
+
+    打开时只读取文件头，查询时在内存映射的段表上二分查找，不把整个文件读入内存。
+    """
+
+    def __init__(self, path: str):
+        """
+        打开数据库
+
+        Args:
+            path: 由 build_database() 生成的文件路径
+
+        Raises:
+            OSError: 文件无法打开
+            ValueError: 文件格式不正确
+        """
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError('离线IP库文件为空')
+
+        if len(self._map) < _HEADER.size:
+            self.close()
+            raise ValueError('不是有效的离线IP库文件')
+        magic, version, v4_count, v6_count, location_count = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError('不是有效的离线IP库文件')
+
+        # 地址族 -> (段表偏移, 段数, 地址字节数)
+        v4_offset = _HEADER.size
+        v6_offset = v4_offset + v4_count * (4 * 2 + _INDEX.size)
+        self._tables = {4: (v4_offset, v4_count, 4), 6: (v6_offset, v6_count, 16)}
+        self._location_offsets = v6_offset + v6_count * (16 * 2 + _INDEX.size)
+        self._location_data = self._location_offsets + (location_count + 1) * _INDEX.size
+        self.location_count = location_count
+
+        # 先确认段表和位置偏移表完整，再读取偏移表的最后一项
+        if len(self._map) < self._location_data:
+            self.close()
+            raise ValueError('离线IP库文件不完整')
+        expected_size = self._location_data + _INDEX.unpack_from(
+            self._map, self._location_offsets + location_count * _INDEX.size)[0]
+        if len(self._map) < expected_size:
+            self.close()
+            raise ValueError('离线IP库文件不完整')
+
+    @property
+    def range_counts(self) -> Dict[str, int]:
+        """各地址族的段数"""
+        return {'ipv4': self._tables[4][1], 'ipv6': self._tables[6][1]}
+
+    def _location(self, index: int) -> Dict:
+        """读取一个位置记录"""
+        start, end = struct.unpack_from('<II', self._map, self._location_offsets + index * _INDEX.size)
+        return json.loads(self._map[self._location_data + start:self._location_data + end])
+
+    def lookup(self, ip: str) -> Optional[Dict]:
+        """
+        查询IP地址的位置
+
+        Args:
+            ip: IP地址
+
+        Returns:
+            Optional[Dict]: 与 IPModel.get_ip_info 相同格式的信息，地址无效或不在库中时返回None
+        """
+        try:
+            address = _parse_address(ip)
+        except ValueError:
+            return None
+
+        offset, count, width = self._tables[address.version]
+        key = address.packed
+        record_size = width * 2 + _INDEX.size
+        data = self._map
+
+        # 查找最后一个起始地址 <= key 的段
+        low, high = 0, count
+        while low < high:
+            mid = (low + high) // 2
+            position = offset + mid * record_size
+            if data[position:position + width] <= key:
+                low = mid + 1
+            else:
+                high = mid
+        if low == 0:
+            return None
+        position = offset + (low - 1) * record_size
+        if data[position + width:position + width * 2] < key:
+            return None
+
+        location = self._location(_INDEX.unpack_from(data, position + width * 2)[0])
+        result = {'ip': str(address)}
+        for field in LOCATION_FIELDS:
+            result[field] = location.get(field, '未知')
+        return result
+
+    def close(self):
+        """关闭数据库"""
+        if getattr(self, '_map', None) is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
@@ -0,0 +1,347 @@
+# -*- coding: utf-8 -*-
+"""
+History Model
+测试结果历史存储 - 基于SQLite，按时间、测试类型和网络接口建立索引
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Union
+
+from ..utils.paths import get_data_dir
+from .sample_series import SampleSeries, split_series, merge_series
+
+
+# 时间参数可以是datetime对象或Unix时间戳
+TimeValue = Union[datetime, float, int, None]
+
+
+class HistoryModel:
+    """测试结果历史模型类"""
+
+    DEFAULT_FILENAME = 'history.db'
+
+    # 聚合粒度 -> SQLite strftime格式（本地时间）
+    BUCKET_FORMATS = {
+        'hour': '%Y-%m-%d %H:00',
+        'day': '%Y-%m-%d',
+        'week': '%Y-W%W',
+        'month': '%Y-%m',
+    }
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS results (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ts REAL NOT NULL,
+            test_type TEXT NOT NULL,
+            interface TEXT NOT NULL DEFAULT '',
+            download REAL,
+            upload REAL,
+            ping REAL,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_results_ts ON results(ts);
+        CREATE INDEX IF NOT EXISTS idx_results_type_ts ON results(test_type, ts);
+        CREATE INDEX IF NOT EXISTS idx_results_interface_ts ON results(interface, ts);
+        CREATE TABLE IF NOT EXISTS samples (
+            result_id INTEGER NOT NULL REFERENCES results(id) ON DELETE CASCADE,
+            path TEXT NOT NULL,
+            data BLOB NOT NULL,
+            PRIMARY KEY (result_id, path)
+        );
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        初始化模型
+
+        Args:
+            db_path: 数据库文件路径，默认保存在应用数据目录下
+        """
+        self._db_path = db_path or os.path.join(get_data_dir(), self.DEFAULT_FILENAME)
+        self._lock = threading.Lock()
+        # 允许调度器等后台线程共用同一连接，访问由锁串行化
+        self._conn = sqlite3.connect(self._db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.execute('PRAGMA foreign_keys=ON')
+            self._conn.executescript(self._SCHEMA)
+            self._conn.commit()
+
+    @property
+    def db_path(self) -> str:
+        """数据库文件路径"""
+        return self._db_path
+
+    @staticmethod
+    def _to_epoch(value: TimeValue) -> Optional[float]:
+        """
+        将时间参数转换为Unix时间戳
+
+        Args:
+            value: datetime对象或Unix时间戳
+
+        Returns:
+            Optional[float]: Unix时间戳
+        """
+        if value is None:
+            return None
+        if isinstance(value, datetime):
+            return value.timestamp()
+        return float(value)
+
+    @staticmethod
+    def _result_epoch(result: Dict) -> float:
+        """
+        从结果字典的timestamp字段解析测试时间
+
+        Args:
+            result: 结果字典
+
+        Returns:
+            float: Unix时间戳，无法解析时使用当前时间
+        """
+        timestamp = result.get('timestamp')
+        if timestamp:
+            try:
+                return datetime.strptime(timestamp, '%Y-%m-%d %H:%M:%S').timestamp()
+            except (TypeError, ValueError):
+                pass
+        return time.time()
+
+    @staticmethod
+    def _build_filters(start: TimeValue, end: TimeValue, test_type: Optional[str],
+                       interface: Optional[str]) -> tuple:
+        """
+        构建WHERE子句
+
+        Returns:
+            tuple: (WHERE子句, 参数列表)
+        """
+        clauses = []
+        params = []
+
+        start_ts = HistoryModel._to_epoch(start)
+        end_ts = HistoryModel._to_epoch(end)
+        if start_ts is not None:
+            clauses.append('ts >= ?')
+            params.append(start_ts)
+        if end_ts is not None:
+            clauses.append('ts < ?')
+            params.append(end_ts)
+        if test_type:
+            clauses.append('test_type = ?')
+            params.append(test_type)
+        if interface is not None:
+            clauses.append('interface = ?')
+            params.append(interface)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        return where, params
+
+    def add_result(self, result: Dict, test_type: Optional[str] = None,
+                   interface: Optional[str] = None) -> int:
+        """
+        记录一条测试结果
+
+        Args:
+            result: 结果字典（完整保存，包括download_stats['speeds']和ping_details；
+                    其中的采样序列以压缩二进制形式单独存储）
+            test_type: 测试类型，默认取result['test_type']
+            interface: 网络接口名称，默认取result['interface']
+
+        Returns:
+            int: 记录ID
+        """
+        test_type = test_type or result.get('test_type') or 'unknown'
+        interface = interface if interface is not None else (result.get('interface') or '')
+        plain, series = split_series(result)
+
+        row = (
+            self._result_epoch(result),
+            test_type,
+            interface,
+            result.get('download'),
+            result.get('upload'),
+            result.get('ping'),
+            json.dumps(plain, ensure_ascii=False)
+        )
+
+        with self._lock:
+            cursor = self._conn.execute(
+                'INSERT INTO results (ts, test_type, interface, download, upload, ping, data) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                row
+            )
+            result_id = cursor.lastrowid
+            if series:
+                self._conn.executemany(
+                    'INSERT INTO samples (result_id, path, data) VALUES (?, ?, ?)',
+                    [(result_id, path, value.to_bytes()) for path, value in series.items()]
+                )
+            self._conn.commit()
+            return result_id
+
+    def _load_series(self, result_ids: List[int]) -> Dict[int, Dict[str, SampleSeries]]:
+        """
+        批量读取采样序列（调用方需持有锁）
+
+        Args:
+            result_ids: 记录ID列表
+
+        Returns:
+            Dict[int, Dict[str, SampleSeries]]: {记录ID: {键路径: 序列}}
+        """
+        series = {}
+        # 分批查询，避免超出SQLite的参数数量限制
+        for i in range(0, len(result_ids), 500):
+            batch = result_ids[i:i + 500]
+            placeholders = ', '.join('?' * len(batch))
+            rows = self._conn.execute(
+                f'SELECT result_id, path, data FROM samples WHERE result_id IN ({placeholders})', batch
+            ).fetchall()
+            for row in rows:
+                series.setdefault(row['result_id'], {})[row['path']] = SampleSeries.from_bytes(row['data'])
+        return series
+
+    def _row_to_result(self, row: sqlite3.Row, series: Dict[str, SampleSeries] = None) -> Dict:
+        """将数据库记录还原为结果字典"""
+        result = json.loads(row['data'])
+        if series:
+            merge_series(result, series)
+        result['id'] = row['id']
+        result.setdefault('test_type', row['test_type'])
+        return result
+
+    def get_result(self, result_id: int) -> Optional[Dict]:
+        """
+        按ID获取测试结果
+
+        Args:
+            result_id: 记录ID
+
+        Returns:
+            Optional[Dict]: 结果字典，不存在返回None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT id, test_type, data FROM results WHERE id = ?', (result_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            series = self._load_series([row['id']])
+        return self._row_to_result(row, series.get(row['id']))
+
+    def query(self, start: TimeValue = None, end: TimeValue = None,
+              test_type: Optional[str] = None, interface: Optional[str] = None,
+              limit: Optional[int] = None, newest_first: bool = True,
+              include_samples: bool = True) -> List[Dict]:
+        """
+        按时间范围查询测试结果
+
+        Args:
+            start: 起始时间（包含）
+            end: 结束时间（不包含）
+            test_type: 测试类型过滤
+            interface: 网络接口过滤
+            limit: 最多返回条数
+            newest_first: 是否按时间倒序
+            include_samples: 是否读取采样序列（只需汇总数值时可关闭以减少IO）
+
+        Returns:
+            List[Dict]: 结果字典列表
+        """
+        where, params = self._build_filters(start, end, test_type, interface)
+        sql = f"SELECT id, test_type, data FROM results {where} ORDER BY ts {'DESC' if newest_first else 'ASC'}"
+        if limit:
+            sql += ' LIMIT ?'
+            params.append(int(limit))
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+            series = self._load_series([row['id'] for row in rows]) if include_samples else {}
+        return [self._row_to_result(row, series.get(row['id'])) for row in rows]
+
+    def aggregate(self, start: TimeValue = None, end: TimeValue = None,
+                  test_type: Optional[str] = None, interface: Optional[str] = None,
+                  bucket: Optional[str] = 'day') -> List[Dict]:
+        """
+        按时间粒度聚合测试结果（只读取索引列，不解析JSON）
+
+        Args:
+            start: 起始时间（包含）
+            end: 结束时间（不包含）
+            test_type: 测试类型过滤
+            interface: 网络接口过滤
+            bucket: 聚合粒度 ('hour', 'day', 'week', 'month')，None表示整体聚合
+
+        Returns:
+            List[Dict]: 每个时间段的次数及下载/上传/Ping的平均、最小、最大值
+        """
+        if bucket is not None and bucket not in self.BUCKET_FORMATS:
+            raise ValueError(f"不支持的聚合粒度: {bucket}")
+
+        where, params = self._build_filters(start, end, test_type, interface)
+
+        columns = ['COUNT(*) AS count', 'MIN(ts) AS first_ts', 'MAX(ts) AS last_ts']
+        for field in ('download', 'upload', 'ping'):
+            columns.append(f'AVG({field}) AS {field}_avg')
+            columns.append(f'MIN({field}) AS {field}_min')
+            columns.append(f'MAX({field}) AS {field}_max')
+
+        if bucket is not None:
+            bucket_expr = f"strftime('{self.BUCKET_FORMATS[bucket]}', ts, 'unixepoch', 'localtime')"
+            sql = (f"SELECT {bucket_expr} AS bucket, {', '.join(columns)} FROM results {where} "
+                   f"GROUP BY bucket ORDER BY bucket")
+        else:
+            sql = f"SELECT 'all' AS bucket, {', '.join(columns)} FROM results {where}"
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+
+        return [
+            {key: (round(row[key], 3) if isinstance(row[key], float) else row[key]) for key in row.keys()}
+            for row in rows if row['count']
+        ]
+
+    def count(self, test_type: Optional[str] = None) -> int:
+        """
+        统计记录条数
+
+        Args:
+            test_type: 测试类型过滤
+
+        Returns:
+            int: 记录条数
+        """
+        where, params = self._build_filters(None, None, test_type, None)
+        with self._lock:
+            return self._conn.execute(f'SELECT COUNT(*) FROM results {where}', params).fetchone()[0]
+
+    def delete_before(self, before: TimeValue) -> int:
+        """
+        删除指定时间之前的记录（用于数据保留策略）
+
+        Args:
+            before: 截止时间（不包含）
+
+        Returns:
+            int: 删除的记录条数
+        """
+        with self._lock:
+            cursor = self._conn.execute('DELETE FROM results WHERE ts < ?', (self._to_epoch(before),))
+            self._conn.commit()
+            return cursor.rowcount
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            if self._conn:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+Interface Counters
+网卡计数器交叉校验 - 测试期间定时读取各网卡的收发字节数，与应用层统计的字节数对比
+"""
+
+import time
+from typing import Dict, List, Optional, Tuple
+
+import psutil
+
+from .network_info_model import loopback_interfaces
+from .resource_monitor import PeriodicSampler
+from .sample_series import SampleSeries
+
+
+class InterfaceCounterSampler(PeriodicSampler):
+    """
+    网卡计数器采样
+
+    按固定间隔读取 psutil.net_io_counters(pernic=True)，记录每个间隔内各网卡的收发增量。
+    网卡层字节数包含TCP/IP和TLS开销，也包含同一时间其他程序的流量，
+    与应用层字节数对比即可区分“协议开销”和“背景流量污染”。
+    """
+
+    # 网卡字节数超出应用层字节数的比例在该值以内视为协议开销，超出视为有背景流量
+    OVERHEAD_LIMIT = 0.15
+    # 其他网卡的流量超过应用层字节数的该比例时提示
+    OTHER_INTERFACE_LIMIT = 0.05
+    # 网卡字节数比应用层少出该比例以上时视为计数不一致（例如走了未统计的虚拟网卡）
+    MISMATCH_LIMIT = 0.05
+
+    def __init__(self, interval: float = 1.0):
+        """
+        初始化采样器
+
+        Args:
+            interval: 采样间隔（秒）
+        """
+        super().__init__(interval)
+        self._last: Dict[str, Tuple[int, int]] = {}
+        self._last_time = 0.0
+        # 每个元素: (相对开始的秒数, 间隔秒数, {网卡: (接收增量, 发送增量)})
+        self.timeline: List[Tuple[float, float, Dict[str, Tuple[int, int]]]] = []
+
+    @staticmethod
+    def _read() -> Dict[str, Tuple[int, int]]:
+        """读取各网卡的累计收发字节数"""
+        return {name: (counters.bytes_recv, counters.bytes_sent)
+                for name, counters in psutil.net_io_counters(pernic=True).items()}
+
+    def _prepare(self):
+        """记录初始计数"""
+        self.timeline = []
+        self._last = self._read()
+        self._last_time = time.time()
+
+    def _sample(self, now: float):
+        """记录一个间隔内的收发增量"""
+        current = self._read()
+        deltas = {}
+        for name, (received, sent) in current.items():
+            previous = self._last.get(name)
+            if previous is None:
+                continue
+            # 计数器回绕或网卡重置时增量按0处理
+            deltas[name] = (max(0, received - previous[0]), max(0, sent - previous[1]))
+        self.timeline.append((round(now - self.start_time, 3), now - self._last_time, deltas))
+        self._last = current
+        self._last_time = now
+
+    def totals(self) -> Dict[str, Tuple[int, int]]:
+        """
+        汇总各网卡在采样期间的收发字节数
+
+        Returns:
+            Dict[str, Tuple[int, int]]: {网卡: (接收字节数, 发送字节数)}
+        """
+        totals: Dict[str, List[int]] = {}
+        for _, _, deltas in self.timeline:
+            for name, (received, sent) in deltas.items():
+                entry = totals.setdefault(name, [0, 0])
+                entry[0] += received
+                entry[1] += sent
+        return {name: (values[0], values[1]) for name, values in totals.items()}
+
+    def cross_check(self, direction: str, app_bytes: int, elapsed: float) -> Dict:
+        """
+        对比网卡层和应用层的传输字节数
+
+        Args:
+            direction: 测试方向 ('download' 或 'upload')
+            app_bytes: 应用层统计的传输字节数
+            elapsed: 应用层测试耗时（秒）
+
+        Returns:
+            Dict: 校验结果，没有采样数据时返回空字典
+        """
+        totals = self.totals()
+        if not totals or app_bytes <= 0:
+            return {}
+
+        index = 0 if direction == 'download' else 1
+        primary = max(totals, key=lambda name: totals[name][index])
+        interface_bytes = totals[primary][index]
+        loopback = loopback_interfaces()
+        other_bytes = sum(values[index] for name, values in totals.items()
+                          if name != primary and name not in loopback)
+        wall = sum(interval for _, interval, _ in self.timeline) or elapsed
+        excess_ratio = (interface_bytes - app_bytes) / app_bytes
+
+        series = SampleSeries(start_time=self.start_time)
+        for timestamp, interval, deltas in self.timeline:
+            if interval > 0:
+                series.append(deltas.get(primary, (0, 0))[index] * 8 / interval / 1_000_000, timestamp)
+
+        result = {
+            'interface': primary,
+            'interface_bytes': interface_bytes,
+            'interface_mbps': round(interface_bytes * 8 / wall / 1_000_000, 3),
+            # 反方向的流量（下载时的ACK、上传时的响应）
+            'reverse_bytes': totals[primary][1 - index],
+            'app_bytes': app_bytes,
+            'app_mbps': round(app_bytes * 8 / max(elapsed, 1e-6) / 1_000_000, 3),
+            'other_interfaces_bytes': other_bytes,
+            'excess_ratio': round(excess_ratio, 4),
+            'interface_speeds': series,
+            'background_traffic': (excess_ratio > self.OVERHEAD_LIMIT
+                                   or other_bytes > app_bytes * self.OTHER_INTERFACE_LIMIT),
+            'counter_mismatch': excess_ratio < -self.MISMATCH_LIMIT,
+        }
+        if 0 <= excess_ratio <= self.OVERHEAD_LIMIT:
+            # 应用层统计不到的协议开销（TCP/IP头、TLS记录、重传等）
+            result['protocol_overhead_ratio'] = round(excess_ratio, 4)
+        return result
+
+
+def describe_cross_check(check: Dict) -> Optional[str]:
+    """
+    生成交叉校验的提示文本
+
+    Args:
+        check: cross_check()的结果
+
+    Returns:
+        Optional[str]: 需要提示时返回文本，否则返回None
+    """
+    if not check:
+        return None
+    if check['background_traffic']:
+        return (f"网卡 {check['interface']} 的流量比测速多 {check['excess_ratio'] * 100:.1f}%"
+                f"（其他网卡 {check['other_interfaces_bytes'] / 1024 / 1024:.1f} MB），"
+                f"测试期间存在背景流量，结果可能偏低")
+    if check['counter_mismatch']:
+        return (f"网卡 {check['interface']} 统计到的流量比测速少 {-check['excess_ratio'] * 100:.1f}%，"
+                f"流量可能经过了未统计的网卡")
+    return None
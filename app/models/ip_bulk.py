@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+"""
+Bulk IP Lookup
+批量IP信息查询 - 去重、读缓存，其余地址按各查询接口的并发数和速率限制并行查询，结果按完成顺序逐条返回
+"""
+
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .ip_cache import IPInfoCache
+from .provider_health import ProviderHealth
+from ..utils.token_bucket import TokenBucket
+
+
+class ProviderLimit:
+    """单个查询接口的并发数和速率限制"""
+
+    def __init__(self, name: str, concurrency: int, rate: float):
+        """
+        初始化限制
+
+        Args:
+            name: 接口名称
+            concurrency: 最大并发请求数
+            rate: 每秒最多请求数
+        """
+        self.name = name
+        self.concurrency = max(1, concurrency)
+        self.rate = rate
+        self.requests = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+        self._semaphore = threading.BoundedSemaphore(self.concurrency)
+        self._bucket = TokenBucket(rate, burst=self.concurrency)
+
+    def try_acquire(self) -> bool:
+        """
+        尝试占用一个请求名额（并发和速率都允许时才成功），不阻塞
+
+        Returns:
+            bool: 是否成功，成功后必须调用release()
+        """
+        if not self._semaphore.acquire(blocking=False):
+            return False
+        if self._bucket.try_consume():
+            return True
+        self._semaphore.release()
+        return False
+
+    def release(self, success: bool):
+        """
+        释放请求名额
+
+        Args:
+            success: 请求是否成功
+        """
+        with self._lock:
+            self.requests += 1
+            if not success:
+                self.failures += 1
+        self._semaphore.release()
+
+
+class BulkIPLookup:
+    """
+    批量IP信息查询
+
+    每个地址按接口顺序（提供健康度时按当前得分）依次尝试，直到某个接口返回结果。
+    首选接口的名额（并发或速率）用完时，直接使用当前有空余名额的后续接口，
+    这样批量查询的总吞吐是各接口限额之和，而不是只受首选接口限制。
+    """
+
+    # 所有接口都没有空余名额时的等待间隔（秒）
+    POLL_INTERVAL = 0.05
+
+    def __init__(self, providers: List[ProviderLimit], query: Callable[[str, str], Optional[Dict]],
+                 cache: Optional[IPInfoCache] = None,
+                 local_lookup: Optional[Callable[[str], Optional[Dict]]] = None,
+                 health: Optional[ProviderHealth] = None):
+        """
+        初始化批量查询
+
+        Args:
+            providers: 按优先顺序排列的接口限制
+            query: 查询函数 query(接口名称, IP)，返回IP信息，失败时返回None或抛出异常
+            cache: IP信息缓存，None表示不使用缓存
+            local_lookup: 本地查询函数（如离线IP库），在读缓存和请求接口之前调用
+            health: 接口健康度，提供时按当前得分决定尝试顺序（query需自行记录请求结果）
+        """
+        self.providers = providers
+        self.query = query
+        self.cache = cache
+        self.local_lookup = local_lookup
+        self.health = health
+        self.stats = {'total': 0, 'duplicates': 0, 'invalid': 0, 'local_hits': 0, 'cache_hits': 0,
+                      'queried': 0, 'found': 0, 'failed': 0}
+        self._stop_event = threading.Event()
+
+    def _acquire(self, candidates: List[ProviderLimit]) -> Optional[ProviderLimit]:
+        """
+        按顺序占用第一个有空余名额的接口，都没有时等待
+
+        Args:
+            candidates: 还未尝试过的接口
+
+        Returns:
+            Optional[ProviderLimit]: 占用的接口，查询被停止时返回None
+        """
+        while not self._stop_event.is_set():
+            if self.health is not None:
+                scores = {provider.name: self.health.score(provider.name) for provider in candidates}
+                candidates = sorted(candidates, key=lambda provider: scores[provider.name])
+            for provider in candidates:
+                if provider.try_acquire():
+                    return provider
+            time.sleep(self.POLL_INTERVAL)
+        return None
+
+    def _lookup_one(self, ip: str) -> Optional[Dict]:
+        """
+        查询单个地址（在线程池中运行）
+
+        Args:
+            ip: 规范化后的IP地址
+
+        Returns:
+            Optional[Dict]: IP信息，所有接口都失败时返回None
+        """
+        candidates = list(self.providers)
+        while candidates:
+            provider = self._acquire(candidates)
+            if provider is None:
+                return None
+            info = None
+            try:
+                info = self.query(provider.name, ip)
+            except Exception as e:
+                print(f"[批量查询] {provider.name} 查询 {ip} 失败: {e}")
+            finally:
+                provider.release(bool(info))
+            if info:
+                return info
+            candidates.remove(provider)
+        return None
+
+    def run(self, ips: Iterable[str], normalize: Callable[[str], Optional[str]],
+            use_cache: bool = True) -> Iterator[Tuple[str, Optional[Dict]]]:
+        """
+        批量查询，结果按完成顺序逐条返回
+
+        输入按需读取，同时在途的查询数量有上限，因此可以处理很大的输入。
+        提前停止迭代时，未开始的查询被取消。
+
+        Args:
+            ips: IP地址（或包含IP地址的文本行）
+            normalize: 提取并规范化IP地址的函数，无法识别时返回None
+            use_cache: 是否读取缓存（结果总会写入缓存）
+
+        Yields:
+            Tuple[str, Optional[Dict]]: (IP地址, IP信息)，查询失败或无法识别时IP信息为None
+        """
+        workers = max(1, sum(provider.concurrency for provider in self.providers))
+        max_in_flight = workers * 2
+        seen = set()
+        in_flight = {}
+        self._stop_event.clear()
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ip-bulk')
+
+        def collect(done) -> Iterator[Tuple[str, Optional[Dict]]]:
+            for future in done:
+                ip = in_flight.pop(future)
+                info = future.result()
+                self.stats['found' if info else 'failed'] += 1
+                if self.cache is not None:
+                    self.cache.put(ip, info)
+                yield ip, info
+
+        try:
+            for raw in ips:
+                raw = raw.strip()
+                if not raw or raw.startswith('#'):
+                    continue
+                self.stats['total'] += 1
+                ip = normalize(raw)
+                if ip is None:
+                    self.stats['invalid'] += 1
+                    yield raw, None
+                    continue
+                if ip in seen:
+                    self.stats['duplicates'] += 1
+                    continue
+                seen.add(ip)
+
+                if self.local_lookup is not None:
+                    info = self.local_lookup(ip)
+                    if info:
+                        self.stats['local_hits'] += 1
+                        yield ip, info
+                        continue
+
+                if use_cache and self.cache is not None:
+                    hit, info = self.cache.get(ip)
+                    if hit:
+                        self.stats['cache_hits'] += 1
+                        yield ip, info
+                        continue
+
+                self.stats['queried'] += 1
+                in_flight[executor.submit(self._lookup_one, ip)] = ip
+                # 在途查询达到上限时先返回已完成的结果
+                while len(in_flight) >= max_in_flight:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    yield from collect(done)
+                # 顺便返回已经完成的结果，保证结果尽早输出
+                done = [future for future in in_flight if future.done()]
+                yield from collect(done)
+
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                yield from collect(done)
+        finally:
+            self._stop_event.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+            if self.cache is not None:
+                self.cache.flush()
+
+    def provider_stats(self) -> Dict[str, Dict]:
+        """
+        获取各接口的请求统计
+
+        Returns:
+            Dict[str, Dict]: {接口名称: {'requests': 请求数, 'failures': 失败数}}
+        """
+        return {provider.name: {'requests': provider.requests, 'failures': provider.failures}
+                for provider in self.providers}
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""
+IP Info Cache
+IP信息缓存 - 带过期时间的LRU缓存，查询失败也会短时间缓存，并持久化到磁盘
+"""
+
+import os
+import json
+import time
+import atexit
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+
+class IPInfoCache:
+    """
+    IP信息缓存
+
+    每个条目有自己的过期时间：查询成功的结果保存ttl秒，查询失败（值为None）保存negative_ttl秒，
+    避免对同一个查不到的地址反复请求。超过max_entries时淘汰最久未使用的条目。
+    指定path时启动时从文件加载，写入后定期保存（最短间隔SAVE_INTERVAL秒），进程退出时再保存一次。
+    """
+
+    # 两次写盘的最短间隔（秒），批量查询时避免每条结果都重写整个文件
+    SAVE_INTERVAL = 2.0
+    # 文件格式版本
+    VERSION = 1
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 4096,
+                 ttl: float = 86400, negative_ttl: float = 300):
+        """
+        初始化缓存
+
+        Args:
+            path: 持久化文件路径（JSON），None表示只缓存在内存中
+            max_entries: 最多保存的条目数
+            ttl: 查询成功的结果的有效期（秒）
+            negative_ttl: 查询失败的结果的有效期（秒）
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+        # 键 -> (过期时间戳, 值)，按最近使用顺序排列
+        self._entries: 'OrderedDict[str, Tuple[float, Optional[Dict]]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self._last_save = 0.0
+
+        if path:
+            self.load()
+            atexit.register(self.flush)
+
+    def get(self, key: str) -> Tuple[bool, Optional[Dict]]:
+        """
+        读取缓存
+
+        Args:
+            key: 缓存键（IP地址）
+
+        Returns:
+            Tuple[bool, Optional[Dict]]: (是否命中, 缓存的值)，命中失败缓存时值为None
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                    self._dirty = True
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[1]
+
+    def put(self, key: str, value: Optional[Dict]):
+        """
+        写入缓存
+
+        Args:
+            key: 缓存键（IP地址）
+            value: 查询结果，None表示查询失败（按negative_ttl缓存）
+        """
+        ttl = self.ttl if value is not None else self.negative_ttl
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._dirty = True
+            due = time.time() - self._last_save >= self.SAVE_INTERVAL
+        if due:
+            self.flush()
+
+    def invalidate(self, key: Optional[str] = None):
+        """
+        删除缓存条目
+
+        Args:
+            key: 要删除的键，None表示清空全部
+        """
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+            self._dirty = True
+        self.flush()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self) -> Dict:
+        """
+        获取缓存统计
+
+        Returns:
+            Dict: 条目数、命中次数、未命中次数
+        """
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+    def load(self):
+        """从文件加载未过期的条目，文件不存在或损坏时忽略"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[IP缓存] 读取缓存文件失败，已忽略: {e}")
+            return
+        if not isinstance(data, dict) or data.get('version') != self.VERSION:
+            return
+
+        entries = data.get('entries')
+        if not isinstance(entries, list):
+            return
+        now = time.time()
+        skipped = 0
+        with self._lock:
+            # 文件中按最近使用顺序保存，最后的条目最新
+            for entry in entries:
+                if not self._valid_entry(entry):
+                    skipped += 1
+                    continue
+                key, expires, value = entry
+                if expires > now:
+                    self._entries[key] = (expires, value)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._last_save = now
+        if skipped:
+            print(f"[IP缓存] 缓存文件中有 {skipped} 个无效条目，已忽略")
+
+    @staticmethod
+    def _valid_entry(entry) -> bool:
+        """检查缓存文件中的条目格式：[键(str), 过期时间(数字), 值(dict或None)]"""
+        return (isinstance(entry, list) and len(entry) == 3 and isinstance(entry[0], str)
+                and isinstance(entry[1], (int, float)) and not isinstance(entry[1], bool)
+                and (entry[2] is None or isinstance(entry[2], dict)))
+
+    def flush(self):
+        """有未保存的修改时写入文件（先写临时文件再替换，避免中途退出留下损坏的文件）"""
+        if not self.path:
+            return
+        # 快照和写盘都在保存锁内，保证较旧的快照不会覆盖较新的文件
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                now = time.time()
+                entries = [[key, expires, value] for key, (expires, value) in self._entries.items()
+                           if expires > now]
+                self._dirty = False
+                self._last_save = now
+
+            temp_path = f"{self.path}.tmp"
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump({'version': self.VERSION, 'entries': entries}, f, ensure_ascii=False)
+                os.replace(temp_path, self.path)
+            except OSError as e:
+                print(f"[IP缓存] 保存缓存文件失败: {e}")
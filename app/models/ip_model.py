@@ -4,155 +4,498 @@ IP Model
 IP信息查询数据模型
 """
 
+import re
+import time
+import queue
+import ipaddress
+import threading
+import os
 import requests
-from typing import Dict, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from .tracer import tracer
+from .ip_cache import IPInfoCache
+from .ip_bulk import BulkIPLookup, ProviderLimit
+from .geo_db import GeoDatabase
+from .provider_health import ProviderHealth
+from ..utils.paths import get_data_dir
 
 
 class IPModel:
     """IP信息模型类"""
     
-    def __init__(self):
-        """初始化模型"""
+    # IP信息缓存文件名（保存在应用数据目录下）
+    CACHE_FILENAME = 'ip_cache.json'
+    
+    # 所有实例共享的默认缓存，首次使用时创建
+    _shared_cache: Optional[IPInfoCache] = None
+    _shared_cache_lock = threading.Lock()
+    
+    # 离线IP库：环境变量 SPEEDTEST_GEO_DB 指定路径，否则使用应用数据目录下的 geo.db（存在时）
+    GEO_DB_ENV = 'SPEEDTEST_GEO_DB'
+    GEO_DB_FILENAME = 'geo.db'
+    _shared_geo_db: Optional[GeoDatabase] = None
+    _shared_geo_db_loaded = False
+    
+    # 所有实例共享的接口健康度（进程内有效）
+    _shared_health = ProviderHealth()
+    
+    def __init__(self, cache: Optional[IPInfoCache] = None, geo_db: Optional[GeoDatabase] = None,
+                 offline_only: bool = False, health: Optional[ProviderHealth] = None):
+        """
+        初始化模型
+        
+        Args:
+            cache: IP信息缓存，默认使用所有实例共享、持久化到应用数据目录的缓存
+            geo_db: 离线IP库，默认使用共享的离线IP库（未安装时为None）
+            offline_only: 只查询离线IP库，不访问在线接口
+            health: 接口健康度，默认使用所有实例共享的健康度
+        """
         self._timeout = 10
+        self.health = health or self._shared_health
+        self._cache = cache
+        self._geo_db = geo_db
+        self.offline_only = offline_only
+        # 最近一次批量查询（用于读取统计）
+        self.last_bulk: Optional[BulkIPLookup] = None
         
-    def get_current_ip(self) -> Optional[str]:
+    @classmethod
+    def shared_cache(cls) -> IPInfoCache:
         """
-        获取当前公网IP地址（使用国内服务）
+        获取共享的IP信息缓存
         
         Returns:
-            Optional[str]: IP地址，失败返回None
+            IPInfoCache: 缓存实例（数据目录不可用时只缓存在内存中）
+        """
+        with cls._shared_cache_lock:
+            if cls._shared_cache is None:
+                try:
+                    path = os.path.join(get_data_dir(), cls.CACHE_FILENAME)
+                except OSError as e:
+                    print(f"[IP缓存] 数据目录不可用，只在内存中缓存: {e}")
+                    path = None
+                cls._shared_cache = IPInfoCache(path)
+            return cls._shared_cache
+        
+    @classmethod
+    def shared_geo_db(cls) -> Optional[GeoDatabase]:
+        """
+        获取共享的离线IP库（首次调用时打开）
+        
+        Returns:
+            Optional[GeoDatabase]: 离线IP库，未安装或无法打开时返回None
+        """
+        with cls._shared_cache_lock:
+            if not cls._shared_geo_db_loaded:
+                cls._shared_geo_db_loaded = True
+                path = os.environ.get(cls.GEO_DB_ENV)
+                if not path:
+                    try:
+                        path = os.path.join(get_data_dir(), cls.GEO_DB_FILENAME)
+                    except OSError:
+                        path = None
+                if path and os.path.exists(path):
+                    try:
+                        cls._shared_geo_db = GeoDatabase(path)
+                        print(f"[离线IP库] 已加载 {path}")
+                    except (OSError, ValueError) as e:
+                        print(f"[离线IP库] 无法打开 {path}: {e}")
+            return cls._shared_geo_db
+        
+    @property
+    def geo_db(self) -> Optional[GeoDatabase]:
+        """当前使用的离线IP库"""
+        if self._geo_db is None:
+            self._geo_db = self.shared_geo_db()
+        return self._geo_db
+        
+    def lookup_offline(self, ip: str) -> Optional[Dict]:
         """
-        # 国内IP查询服务列表
-        ip_services = [
-            ('https://api.ip.sb/ip', 'text'),  # IP.SB - 纯文本
-            ('https://ipinfo.io/ip', 'text'),  # IPInfo - 纯文本
-            ('https://api.ipify.org?format=text', 'text'),  # IPify - 纯文本
-            ('http://myip.ipip.net/s', 'text'),  # IPIP.NET - 纯文本
-        ]
+        在离线IP库中查询
         
-        for service, format_type in ip_services:
+        Args:
+            ip: IP地址
+            
+        Returns:
+            Optional[Dict]: IP信息字典，没有离线库或库中没有该地址时返回None
+        """
+        database = self.geo_db
+        return database.lookup(ip) if database is not None else None
+        
+    @property
+    def cache(self) -> IPInfoCache:
+        """当前使用的IP信息缓存"""
+        if self._cache is None:
+            self._cache = self.shared_cache()
+        return self._cache
+        
+
+    # 公网IP查询服务列表 (地址, 返回格式)
+    IP_SERVICES = [
+        ('https://api.ip.sb/ip', 'text'),  # IP.SB - 纯文本
+        ('https://ipinfo.io/ip', 'text'),  # IPInfo - 纯文本
+        ('https://api.ipify.org?format=text', 'text'),  # IPify - 纯文本
+        ('http://myip.ipip.net/s', 'text'),  # IPIP.NET - 纯文本
+    ]
+    
+    # 单个IP查询服务的超时（秒）
+    SERVICE_TIMEOUT = 5
+    
+    # 响应文本中可能是IP地址的片段
+    _IP_CANDIDATE = re.compile(r'[0-9A-Fa-f:.]{3,}')
+    
+    @classmethod
+    def parse_ip(cls, text: str) -> Optional[str]:
+        """
+        从响应文本中提取并校验IP地址
+        
+        整段文本是合法地址时直接返回，否则在文本中查找第一个合法的IPv4/IPv6地址
+        （例如 "当前 IP：1.2.3.4  来自于：..." 这样的响应）。
+        
+        Args:
+            text: 响应文本
+            
+        Returns:
+            Optional[str]: 规范化后的IP地址，没有合法地址时返回None
+        """
+        text = (text or '').strip()
+        for candidate in [text] + cls._IP_CANDIDATE.findall(text):
+            candidate = candidate.rstrip('.:')
+            if '.' not in candidate and ':' not in candidate:
+                continue
             try:
-                print(f"[IP查询] 尝试从 {service} 获取IP...")
-                response = requests.get(service, timeout=5)
-                response.raise_for_status()
-                
-                if format_type == 'text':
-                    ip = response.text.strip()
-                    print(f"[IP查询] 成功获取IP: {ip}")
-                    return ip
-                else:
-                    data = response.json()
-                    if 'ip' in data:
-                        ip = data['ip']
-                        print(f"[IP查询] 成功获取IP: {ip}")
-                        return ip
-            except Exception as e:
-                print(f"[IP查询] 从 {service} 获取IP失败: {e}")
+                return str(ipaddress.ip_address(candidate))
+            except ValueError:
                 continue
-        
-        print("[IP查询] 所有服务都失败")
         return None
+        
+    def _query_ip_service(self, service: str, format_type: str) -> Optional[str]:
+        """
+        从单个服务查询公网IP
+        
+        Args:
+            service: 服务地址
+            format_type: 返回格式 ('text' 或 'json')
+            
+        Returns:
+            Optional[str]: 校验通过的IP地址
             
-    def get_ip_info_primary(self, ip: str) -> Optional[Dict]:
+        Raises:
+            Exception: 请求失败
         """
-        获取IP详细信息（使用国内API）
+        with tracer.span('ip.service', 'net', service=service):
+            response = requests.get(service, timeout=self.SERVICE_TIMEOUT)
+        response.raise_for_status()
+        
+        if format_type == 'text':
+            return self.parse_ip(response.text)
+        data = response.json()
+        return self.parse_ip(str(data.get('ip', '')))
+        
+    def get_current_ip(self, agreement: int = 1) -> Optional[str]:
+        """
+        获取当前公网IP地址
+        
+        同时向所有服务发起查询，每个响应都校验为合法的IPv4/IPv6地址，
+        第一个（或第一个得到agreement个服务一致确认的）地址即为结果，
+        其余仍未返回的查询被放弃，最坏耗时约为一个服务的超时时间。
         
         Args:
-            ip: IP地址
+            agreement: 需要多少个服务返回相同地址才采用（1表示第一个合法结果即采用）
             
         Returns:
-            Optional[Dict]: IP信息字典，失败返回None
+            Optional[str]: IP地址，失败或未达到一致时返回None
         """
-        # 备用：使用IP.SB
+        services = self.IP_SERVICES
+        agreement = max(1, min(agreement, len(services)))
+        results = queue.Queue()
+        cancelled = threading.Event()
+        
+        def worker(service: str, format_type: str):
+            try:
+                ip = self._query_ip_service(service, format_type)
+                error = None if ip else '响应中没有合法的IP地址'
+            except Exception as e:
+                ip, error = None, str(e)
+            if not cancelled.is_set():
+                results.put((service, ip, error))
+        
+        print(f"[IP查询] 同时向 {len(services)} 个服务查询IP...")
+        # 守护线程：得到结果后不等待其余请求，它们在各自超时后自行结束
+        for service, format_type in services:
+            threading.Thread(target=worker, args=(service, format_type),
+                             name='ip-service', daemon=True).start()
+        
+        votes: Dict[str, int] = {}
+        deadline = time.monotonic() + self.SERVICE_TIMEOUT + 1
         try:
-            print(f"[IP信息] 尝试从 IP.SB 查询 {ip} 的信息...")
+            for pending in range(len(services) - 1, -1, -1):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    service, ip, error = results.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if ip:
+                    votes[ip] = votes.get(ip, 0) + 1
+                    if votes[ip] >= agreement:
+                        print(f"[IP查询] 成功获取IP: {ip}（来自 {service}）")
+                        return ip
+                    print(f"[IP查询] {service} 返回 {ip}，等待其他服务确认...")
+                else:
+                    print(f"[IP查询] 从 {service} 获取IP失败: {error}")
+                
+                # 剩余的服务全部同意也无法达到一致时提前结束
+                if max(votes.values(), default=0) + pending < agreement:
+                    break
+        finally:
+            cancelled.set()
+        
+        if votes:
+            answers = '、'.join(f"{ip}({count})" for ip, count in votes.items())
+            print(f"[IP查询] 未能得到 {agreement} 个服务一致的结果: {answers}")
+        else:
+            print("[IP查询] 所有服务都失败")
+        return None
+            
+    # IP信息查询接口 (名称, 最大并发数, 每秒最多请求数)，按优先顺序排列
+    INFO_PROVIDERS = [
+        ('ip.sb', 4, 5.0),
+        ('ipinfo.io', 4, 5.0),
+        ('ip-api.com', 2, 0.75),  # 免费接口限制每分钟45次
+    ]
+    
+    def _info_from_ip_sb(self, ip: str) -> Dict:
+        """从IP.SB查询IP信息，失败时抛出异常"""
+        with tracer.span('ip.info', 'net', provider='ip.sb'):
             response = requests.get(
                 f'https://api.ip.sb/geoip/{ip}',
                 timeout=self._timeout
             )
-            response.raise_for_status()
-            data = response.json()
+        response.raise_for_status()
+        data = response.json()
+        
+        return {
+            "ip": data.get("ip", ip),
+            "country": data.get("country", "未知"),
+            "countryCode": data.get("country_code", "未知"),
+            "city": data.get("city", "未知"),
+            "region": data.get("region", "未知"),
+            "isp": data.get("isp", "未知"),
+            "timezone": data.get("timezone", "未知")
+        }
+        
+    def _info_from_ipinfo(self, ip: str) -> Dict:
+        """从IPInfo.io查询IP信息，失败时抛出异常"""
+        with tracer.span('ip.info', 'net', provider='ipinfo.io'):
+            response = requests.get(
+                f"https://ipinfo.io/{ip}/json",
+                timeout=self._timeout
+            )
+        response.raise_for_status()
+        data = response.json()
+        if 'error' in data:
+            # 限流、地址无效等错误也可能以HTTP 200返回
+            error = data['error']
+            raise ValueError(error.get('message') or error.get('title') if isinstance(error, dict) else error)
+        
+        return {
+            "ip": data.get("ip", ip),
+            "country": data.get("country", "未知"),
+            "countryCode": data.get("country", "未知"),
+            "city": data.get("city", "未知"),
+            "region": data.get("region", "未知"),
+            "isp": data.get("org", "未知"),
+            "timezone": data.get("timezone", "未知")
+        }
+        
+    def _info_from_ip_api(self, ip: str) -> Dict:
+        """从ip-api.com查询IP信息，失败时抛出异常"""
+        with tracer.span('ip.info', 'net', provider='ip-api.com'):
+            response = requests.get(
+                f"http://ip-api.com/json/{ip}?lang=zh-CN",
+                timeout=self._timeout
+            )
+        response.raise_for_status()
+        data = response.json()
+        if data.get('status') == 'fail':
+            # 查询失败时仍返回HTTP 200，原因在message中（如 private range、invalid query）
+            raise ValueError(data.get('message') or '查询失败')
+        
+        return {
+            "ip": data.get("query", ip),
+            "country": data.get("country", "未知"),
+            "countryCode": data.get("countryCode", "未知"),
+            "city": data.get("city", "未知"),
+            "region": data.get("regionName", "未知"),
+            "isp": data.get("isp", "未知"),
+            "timezone": data.get("timezone", "未知")
+        }
+        
+    def query_provider(self, provider: str, ip: str) -> Dict:
+        """
+        从指定接口查询IP信息
+        
+        Args:
+            provider: 接口名称（见INFO_PROVIDERS）
+            ip: IP地址
             
-            result = {
-                "ip": data.get("ip", ip),
-                "country": data.get("country", "未知"),
-                "countryCode": data.get("country_code", "未知"),
-                "city": data.get("city", "未知"),
-                "region": data.get("region", "未知"),
-                "isp": data.get("isp", "未知"),
-                "timezone": data.get("timezone", "未知")
-            }
-            print(f"[IP信息] 成功获取: {result['country']} {result['city']}")
-            return result
-        except Exception as e:
-            print(f"[IP信息] IP.SB 查询失败: {e}")
-            return None
+        Returns:
+            Dict: IP信息字典
             
-    def get_ip_info_fallback(self, ip: str) -> Optional[Dict]:
+        Raises:
+            ValueError: 未知的接口名称
+            Exception: 请求失败
+        """
+        queries = {
+            'ip.sb': self._info_from_ip_sb,
+            'ipinfo.io': self._info_from_ipinfo,
+            'ip-api.com': self._info_from_ip_api,
+        }
+        if provider not in queries:
+            raise ValueError(f"未知的IP信息接口: {provider}")
+        return queries[provider](ip)
+        
+    def _timed_query(self, provider: str, ip: str) -> Optional[Dict]:
         """
-        获取IP详细信息（国际备用API）
+        从指定接口查询IP信息，并记录耗时和结果到接口健康度
         
         Args:
+            provider: 接口名称
             ip: IP地址
             
         Returns:
-            Optional[Dict]: IP信息字典，失败返回None
+            Optional[Dict]: IP信息字典
+            
+        Raises:
+            Exception: 请求失败
         """
-        # 尝试IPInfo.io
+        start = time.monotonic()
         try:
-            response = requests.get(
-                f"https://ipinfo.io/{ip}/json",
-                timeout=self._timeout
-            )
-            data = response.json()
-            
-            return {
-                "ip": data.get("ip", ip),
-                "country": data.get("country", "未知"),
-                "countryCode": data.get("country", "未知"),
-                "city": data.get("city", "未知"),
-                "region": data.get("region", "未知"),
-                "isp": data.get("org", "未知"),
-                "timezone": data.get("timezone", "未知")
-            }
-        except Exception as e:
-            print(f"获取IP信息失败(IPInfo): {e}")
+            info = self.query_provider(provider, ip)
+        except Exception:
+            self.health.record(provider, time.monotonic() - start, False)
+            raise
+        self.health.record(provider, time.monotonic() - start, bool(info))
+        return info
+        
+    def query_hedged(self, ip: str) -> Optional[Dict]:
+        """
+        按接口健康度顺序查询IP信息，并对慢请求发起对冲
+        
+        先请求得分最好的接口；超过该接口的对冲等待时间（最近延迟的P90）仍未返回时，
+        同时请求下一个接口，请求失败时立即换下一个接口，取最先返回的成功结果。
+        
+        Args:
+            ip: IP地址
             
-        # 最后备用：ip-api.com
+        Returns:
+            Optional[Dict]: IP信息字典，所有接口都失败时返回None
+        """
+        names = self.health.order([name for name, _, _ in self.INFO_PROVIDERS])
+        results = queue.Queue()
+        cancelled = threading.Event()
+        launched = []
+        
+        def worker(name: str):
+            try:
+                info = self._timed_query(name, ip)
+                error = None if info else '没有返回数据'
+            except Exception as e:
+                info, error = None, str(e)
+            if not cancelled.is_set():
+                results.put((name, info, error))
+        
+        def launch() -> float:
+            """向下一个接口发起请求，返回对冲截止时间"""
+            name = names[len(launched)]
+            launched.append(name)
+            print(f"[IP信息] 尝试从 {name} 查询 {ip} 的信息...")
+            threading.Thread(target=worker, args=(name,), name='ip-info', daemon=True).start()
+            return time.monotonic() + self.health.hedge_delay(name)
+        
+        pending = 0
         try:
-            response = requests.get(
-                f"http://ip-api.com/json/{ip}?lang=zh-CN",
-                timeout=self._timeout
-            )
-            data = response.json()
-            
-            return {
-                "ip": data.get("query", ip),
-                "country": data.get("country", "未知"),
-                "countryCode": data.get("countryCode", "未知"),
-                "city": data.get("city", "未知"),
-                "region": data.get("regionName", "未知"),
-                "isp": data.get("isp", "未知"),
-                "timezone": data.get("timezone", "未知")
-            }
-        except Exception as e:
-            print(f"获取IP信息失败(ip-api): {e}")
+            hedge_at = launch()
+            pending += 1
+            while pending:
+                if len(launched) < len(names):
+                    timeout = max(0.0, hedge_at - time.monotonic())
+                else:
+                    timeout = self._timeout + 1
+                try:
+                    name, info, error = results.get(timeout=timeout)
+                except queue.Empty:
+                    if len(launched) >= len(names):
+                        break
+                    print(f"[IP信息] {launched[-1]} 响应较慢，同时请求下一个接口")
+                    hedge_at = launch()
+                    pending += 1
+                    continue
+                
+                pending -= 1
+                if info:
+                    print(f"[IP信息] 成功获取({name}): {info['country']} {info['city']}")
+                    return info
+                print(f"[IP信息] {name} 查询失败: {error}")
+                if len(launched) < len(names):
+                    hedge_at = launch()
+                    pending += 1
             return None
-            
-    def get_ip_info(self, ip: str) -> Optional[Dict]:
+        finally:
+            cancelled.set()
+        
+    def get_ip_info(self, ip: str, use_cache: bool = True) -> Optional[Dict]:
         """
-        获取IP详细信息（自动尝试主备API）
+        获取IP详细信息（依次查询离线IP库、缓存，都未命中时按接口健康度查询在线接口）
         
         Args:
             ip: IP地址
+            use_cache: 是否使用缓存，False时总是重新查询（结果仍会写入缓存）
             
         Returns:
             Optional[Dict]: IP信息字典，失败返回None
         """
-        # 先尝试主API
-        info = self.get_ip_info_primary(ip)
+        key = self.parse_ip(ip) or ip.strip()
+        info = self.lookup_offline(key)
         if info:
+            print(f"[IP信息] {key} 命中离线IP库")
             return info
+        if self.offline_only:
+            print(f"[IP信息] 离线IP库中没有 {key}")
+            return None
+        
+        if use_cache:
+            hit, info = self.cache.get(key)
+            if hit:
+                print(f"[IP信息] {key} 命中缓存" + ("" if info else "（最近查询失败）"))
+                return dict(info) if info else None
+        
+        # 按接口健康度顺序查询，慢请求对冲到下一个接口
+        info = self.query_hedged(ip)
+        self.cache.put(key, info)
+        # 返回副本，调用方修改结果不会影响缓存
+        return dict(info) if info else None
+        
+    def lookup_many(self, ips: Iterable[str], use_cache: bool = True,
+                    providers: Optional[List[tuple]] = None) -> Iterator[Tuple[str, Optional[Dict]]]:
+        """
+        批量查询IP信息，结果按完成顺序逐条返回
+        
+        重复地址只查询一次，离线IP库或缓存命中的地址立即返回，其余地址按各接口的并发数和速率限制并行查询。
+        
+        Args:
+            ips: IP地址或包含IP地址的文本行（如连接日志）
+            use_cache: 是否读取缓存（查询结果总会写入缓存）
+            providers: 接口限制 [(名称, 最大并发数, 每秒最多请求数)]，默认使用INFO_PROVIDERS
             
-        # 主API失败，尝试备用API
-        return self.get_ip_info_fallback(ip)
+        Yields:
+            Tuple[str, Optional[Dict]]: (IP地址, IP信息)，查询失败或无法识别时IP信息为None
+        """
+        limits = [] if self.offline_only else [
+            ProviderLimit(name, concurrency, rate)
+            for name, concurrency, rate in (providers or self.INFO_PROVIDERS)]
+        # 只查离线库时不读写缓存，避免把离线库中没有的地址当作查询失败缓存下来
+        cache = None if self.offline_only else self.cache
+        self.last_bulk = BulkIPLookup(limits, self._timed_query, cache, self.lookup_offline, self.health)
+        yield from self.last_bulk.run(ips, self.parse_ip, use_cache)
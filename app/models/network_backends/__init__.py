@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+Network Backends
+平台相关的网络信息后端 - 首次使用时才按当前系统导入对应模块
+
+Windows: 注册表代理设置 + ipconfig 解析DNS
+Linux:   环境变量/GNOME代理设置 + resolv.conf/systemd-resolved 解析DNS
+其他系统: 环境变量代理设置 + resolv.conf
+"""
+
+import platform
+import importlib
+import threading
+from typing import Optional
+
+from .base import NetworkBackend
+
+# 系统名称 -> (模块名, 类名)
+BACKENDS = {
+    'Windows': ('.windows', 'WindowsBackend'),
+    'Linux': ('.linux', 'LinuxBackend'),
+}
+
+_backend: Optional[NetworkBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_backend() -> NetworkBackend:
+    """
+    获取当前系统的网络信息后端（首次调用时导入并缓存）
+
+    Returns:
+        NetworkBackend: 后端实例，当前系统没有专用后端或导入失败时返回通用后端
+    """
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = _load_backend(platform.system())
+        return _backend
+
+
+def _load_backend(system: str) -> NetworkBackend:
+    """
+    导入指定系统的后端
+
+    Args:
+        system: platform.system()的返回值
+
+    Returns:
+        NetworkBackend: 后端实例
+    """
+    entry = BACKENDS.get(system)
+    if entry:
+        module_name, class_name = entry
+        try:
+            module = importlib.import_module(module_name, __name__)
+            return getattr(module, class_name)()
+        except ImportError as e:
+            print(f"[网络信息] 加载{system}后端失败，使用通用后端: {e}")
+    return NetworkBackend()
+
+
+__all__ = ['NetworkBackend', 'get_backend']
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+Network Backend Base
+网络信息后端基类 - 通用实现（环境变量代理设置、resolv.conf）
+"""
+
+import os
+from typing import Dict, List
+
+
+def empty_proxy_info() -> Dict:
+    """
+    创建未配置代理时的代理信息
+
+    Returns:
+        Dict: 代理设置信息
+    """
+    return {
+        'enabled': False,
+        'http_proxy': None,
+        'https_proxy': None,
+        'ftp_proxy': None,
+        'socks_proxy': None,
+        'bypass_list': [],
+        'source': None,
+    }
+
+
+def env_proxy_settings() -> Dict:
+    """
+    读取环境变量中的代理设置（http_proxy、https_proxy、ftp_proxy、all_proxy、no_proxy，大小写均可）
+
+    Returns:
+        Dict: 代理设置信息
+    """
+    proxy_info = empty_proxy_info()
+
+    def read(name: str):
+        return os.environ.get(name.lower()) or os.environ.get(name.upper()) or None
+
+    for protocol in ('http', 'https', 'ftp'):
+        proxy_info[f'{protocol}_proxy'] = read(f'{protocol}_proxy')
+    all_proxy = read('all_proxy')
+    if all_proxy:
+        if all_proxy.lower().startswith('socks'):
+            proxy_info['socks_proxy'] = all_proxy
+        else:
+            for protocol in ('http', 'https', 'ftp'):
+                proxy_info[f'{protocol}_proxy'] = proxy_info[f'{protocol}_proxy'] or all_proxy
+
+    no_proxy = read('no_proxy')
+    if no_proxy:
+        proxy_info['bypass_list'] = [item.strip() for item in no_proxy.split(',') if item.strip()]
+
+    if any(proxy_info[key] for key in ('http_proxy', 'https_proxy', 'ftp_proxy', 'socks_proxy')):
+        proxy_info['enabled'] = True
+        proxy_info['source'] = '环境变量'
+    return proxy_info
+
+
+def parse_resolv_conf(path: str = '/etc/resolv.conf') -> List[str]:
+    """
+    解析resolv.conf中的nameserver
+
+    Args:
+        path: 文件路径
+
+    Returns:
+        List[str]: DNS服务器列表，文件不存在时返回空列表
+    """
+    servers = []
+    try:
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            for line in f:
+                parts = line.split('#', 1)[0].split()
+                if len(parts) >= 2 and parts[0] == 'nameserver' and parts[1] not in servers:
+                    servers.append(parts[1])
+    except OSError:
+        pass
+    return servers
+
+
+class NetworkBackend:
+    """
+    网络信息后端
+
+    子类按平台重写 get_proxy_settings() 和 get_dns_servers()，
+    没有专用后端的系统直接使用这里的通用实现。
+    """
+
+    name = 'generic'
+
+    def get_proxy_settings(self) -> Dict:
+        """
+        获取代理设置
+
+        Returns:
+            Dict: 代理设置信息
+        """
+        return env_proxy_settings()
+
+    def get_dns_servers(self) -> List[str]:
+        """
+        获取DNS服务器列表
+
+        Returns:
+            List[str]: DNS服务器列表
+        """
+        return parse_resolv_conf()
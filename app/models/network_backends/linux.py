@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+Linux Network Backend
+Linux网络信息后端 - 环境变量/GNOME代理设置和resolv.conf/systemd-resolved DNS解析
+"""
+
+import ast
+import shutil
+import subprocess
+from typing import Dict, List, Optional
+
+from .base import NetworkBackend, empty_proxy_info, env_proxy_settings, parse_resolv_conf
+
+
+class LinuxBackend(NetworkBackend):
+    """Linux网络信息后端"""
+
+    name = 'linux'
+
+    # systemd-resolved 本地存根解析器地址，实际上游服务器需要另外读取
+    STUB_RESOLVERS = ('127.0.0.53', '127.0.0.54')
+    # systemd-resolved 维护的上游服务器列表
+    RESOLVED_CONF = '/run/systemd/resolve/resolv.conf'
+    # 外部命令超时（秒）
+    COMMAND_TIMEOUT = 2
+
+    def _run(self, args: List[str]) -> Optional[str]:
+        """
+        运行外部命令
+
+        Args:
+            args: 命令及参数
+
+        Returns:
+            Optional[str]: 标准输出，命令不存在、超时或失败时返回None
+        """
+        if not shutil.which(args[0]):
+            return None
+        try:
+            result = subprocess.run(args, capture_output=True, text=True,
+                                    timeout=self.COMMAND_TIMEOUT)
+        except (OSError, subprocess.SubprocessError):
+            return None
+        return result.stdout if result.returncode == 0 else None
+
+    # ------------------------------------------------------------------ 代理
+
+    def _gsetting(self, schema: str, key: str):
+        """
+        读取一项GNOME设置
+
+        Args:
+            schema: 设置模式，如 org.gnome.system.proxy.http
+            key: 键名
+
+        Returns:
+            设置值（字符串、整数或列表），读取失败时返回None
+        """
+        output = self._run(['gsettings', 'get', schema, key])
+        if output is None:
+            return None
+        value = output.strip()
+        # 空数组输出为 "@as []"
+        if value.startswith('@'):
+            value = value.split(' ', 1)[-1]
+        try:
+            return ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            return value
+
+    def _gnome_proxy_settings(self) -> Optional[Dict]:
+        """
+        读取GNOME桌面的代理设置
+
+        Returns:
+            Optional[Dict]: 代理设置信息，非GNOME环境或未启用手动代理时返回None
+        """
+        mode = self._gsetting('org.gnome.system.proxy', 'mode')
+        if mode not in ('manual', 'auto'):
+            return None
+
+        proxy_info = empty_proxy_info()
+        proxy_info['source'] = 'GNOME'
+        if mode == 'auto':
+            # 自动配置脚本(PAC)，具体代理由脚本决定
+            url = self._gsetting('org.gnome.system.proxy', 'autoconfig-url')
+            proxy_info['enabled'] = bool(url)
+            proxy_info['http_proxy'] = proxy_info['https_proxy'] = f'PAC: {url}' if url else None
+            return proxy_info
+
+        for protocol in ('http', 'https', 'ftp', 'socks'):
+            schema = f'org.gnome.system.proxy.{protocol}'
+            host = self._gsetting(schema, 'host')
+            port = self._gsetting(schema, 'port')
+            if host:
+                proxy_info[f'{protocol}_proxy'] = f'{host}:{port}' if port else host
+        ignore_hosts = self._gsetting('org.gnome.system.proxy', 'ignore-hosts')
+        if isinstance(ignore_hosts, list):
+            proxy_info['bypass_list'] = ignore_hosts
+        proxy_info['enabled'] = any(proxy_info[f'{protocol}_proxy']
+                                    for protocol in ('http', 'https', 'ftp', 'socks'))
+        return proxy_info
+
+    def get_proxy_settings(self) -> Dict:
+        """
+        获取代理设置：优先环境变量（命令行程序实际使用的代理），其次GNOME桌面设置
+
+        Returns:
+            Dict: 代理设置信息
+        """
+        proxy_info = env_proxy_settings()
+        if proxy_info['enabled']:
+            return proxy_info
+        return self._gnome_proxy_settings() or proxy_info
+
+    # ------------------------------------------------------------------ DNS
+
+    def _resolvectl_servers(self) -> List[str]:
+        """
+        解析 resolvectl dns 的输出
+
+        输出格式:
+            Global: 1.1.1.1
+            Link 2 (eth0): 192.168.1.1 fe80::1%eth0
+
+        Returns:
+            List[str]: DNS服务器列表
+        """
+        output = self._run(['resolvectl', 'dns'])
+        servers = []
+        for line in (output or '').splitlines():
+            if ':' not in line:
+                continue
+            # 行首的 "Global" 或 "Link N (名称)" 与地址列表之间以第一个 ": " 分隔
+            _, _, addresses = line.partition(': ')
+            for address in addresses.split():
+                if address not in servers:
+                    servers.append(address)
+        return servers
+
+    def get_dns_servers(self) -> List[str]:
+        """
+        获取DNS服务器列表
+
+        /etc/resolv.conf 只指向 systemd-resolved 存根时，改为读取 resolved 维护的上游服务器。
+
+        Returns:
+            List[str]: DNS服务器列表
+        """
+        servers = parse_resolv_conf()
+        if servers and not all(server in self.STUB_RESOLVERS for server in servers):
+            return servers
+
+        upstream = parse_resolv_conf(self.RESOLVED_CONF) or self._resolvectl_servers()
+        return upstream or servers
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+Windows Network Backend
+Windows网络信息后端 - 注册表代理设置和ipconfig DNS解析
+"""
+
+import subprocess
+import winreg
+from typing import Dict, List
+
+from .base import NetworkBackend, empty_proxy_info, env_proxy_settings
+
+
+class WindowsBackend(NetworkBackend):
+    """Windows网络信息后端"""
+
+    name = 'windows'
+
+    INTERNET_SETTINGS_KEY = r'Software\Microsoft\Windows\CurrentVersion\Internet Settings'
+
+    def get_proxy_settings(self) -> Dict:
+        """
+        读取注册表中的系统代理设置，未启用时回退到环境变量
+
+        Returns:
+            Dict: 代理设置信息
+        """
+        proxy_info = empty_proxy_info()
+
+        key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, self.INTERNET_SETTINGS_KEY)
+        try:
+            try:
+                proxy_enable, _ = winreg.QueryValueEx(key, 'ProxyEnable')
+                proxy_info['enabled'] = bool(proxy_enable)
+            except OSError:
+                pass
+
+            try:
+                proxy_server, _ = winreg.QueryValueEx(key, 'ProxyServer')
+                if proxy_server:
+                    # 解析代理服务器
+                    if '=' in proxy_server:
+                        # 格式: http=proxy:port;https=proxy:port
+                        for item in proxy_server.split(';'):
+                            if '=' in item:
+                                protocol, server = item.split('=', 1)
+                                proxy_info[f'{protocol}_proxy'] = server
+                    else:
+                        # 格式: proxy:port（所有协议使用同一代理）
+                        proxy_info['http_proxy'] = proxy_server
+                        proxy_info['https_proxy'] = proxy_server
+            except OSError:
+                pass
+
+            try:
+                proxy_override, _ = winreg.QueryValueEx(key, 'ProxyOverride')
+                if proxy_override:
+                    proxy_info['bypass_list'] = proxy_override.split(';')
+            except OSError:
+                pass
+        finally:
+            winreg.CloseKey(key)
+
+        if proxy_info['enabled']:
+            proxy_info['source'] = '注册表'
+            return proxy_info
+        return env_proxy_settings()
+
+    def get_dns_servers(self) -> List[str]:
+        """
+        解析 ipconfig /all 输出中的DNS服务器
+
+        Returns:
+            List[str]: DNS服务器列表
+        """
+        dns_servers = []
+        result = subprocess.run(
+            ['ipconfig', '/all'],
+            capture_output=True,
+            text=True,
+            encoding='gbk',
+            errors='ignore'
+        )
+
+        lines = result.stdout.split('\n')
+        for line in lines:
+            if 'DNS' in line and ':' in line:
+                dns = line.split(':', 1)[1].strip()
+                if dns and dns not in dns_servers:
+                    dns_servers.append(dns)
+        return dns_servers
@@ -4,20 +4,231 @@ Network Info Model
 网络信息模型 - 获取网络适配器、代理等信息
 """
 
+import time
 import psutil
 import socket
-import platform
-import winreg
-from typing import List, Dict, Optional
+import threading
+import ipaddress
+from collections import deque
+from typing import List, Dict, Optional, Set
+
+from .network_backends import get_backend
+from .network_backends.base import empty_proxy_info
+
+
+def loopback_interfaces() -> Set[str]:
+    """
+    获取回环网卡名称
+
+    按地址判断：网卡有IP地址且全部是回环地址（127.0.0.0/8、::1）。不按名称判断，
+    Windows的“Local Area Connection”等真实网卡名称也以lo开头。
+
+    Returns:
+        Set[str]: 回环网卡名称集合，读取失败时为空集合
+    """
+    names = set()
+    try:
+        interfaces = psutil.net_if_addrs()
+    except Exception as e:
+        print(f"获取网络适配器信息失败: {e}")
+        return names
+    for name, addresses in interfaces.items():
+        ips = []
+        for addr in addresses:
+            if addr.family not in (socket.AF_INET, socket.AF_INET6):
+                continue
+            try:
+                ips.append(ipaddress.ip_address(addr.address.split('%')[0]))
+            except ValueError:
+                continue
+        if ips and all(ip.is_loopback for ip in ips):
+            names.add(name)
+    return names
+
+
+class InterfaceBandwidthMonitor:
+    """
+    实时网卡带宽监控
+
+    每次调用 sample() 读取一次 psutil.net_io_counters(pernic=True)，与上一次读数相减得到速率，
+    每个网卡的速率保存在固定长度的环形缓冲区中，内存占用与运行时长无关。
+    不自带线程，由调用方（如界面定时器）决定采样节奏。
+    """
+
+    # 环形缓冲区中每个元素的字段
+    FIELDS = ('time', 'recv_bps', 'sent_bps', 'recv_pps', 'sent_pps', 'err_ps', 'drop_ps')
+
+    def __init__(self, history_size: int = 120):
+        """
+        初始化监控
+
+        Args:
+            history_size: 每个网卡保留的采样点数
+        """
+        self.history_size = history_size
+        self._history: Dict[str, deque] = {}
+        self._last: Dict[str, tuple] = {}
+        self._last_time: Optional[float] = None
+
+    @staticmethod
+    def _read() -> Dict[str, tuple]:
+        """读取各网卡的累计计数"""
+        return {
+            name: (c.bytes_recv, c.bytes_sent, c.packets_recv, c.packets_sent,
+                   c.errin + c.errout, c.dropin + c.dropout)
+            for name, c in psutil.net_io_counters(pernic=True).items()
+        }
+
+    def sample(self) -> Dict[str, Dict]:
+        """
+        采样一次并计算自上次采样以来的速率
+
+        Returns:
+            Dict[str, Dict]: 本次有新数据的网卡及其速率，第一次调用只记录基准，返回空字典
+        """
+        now = time.time()
+        try:
+            current = self._read()
+        except Exception as e:
+            print(f"获取网卡计数失败: {e}")
+            return {}
+
+        updated = {}
+        if self._last_time is not None and now > self._last_time:
+            elapsed = now - self._last_time
+            for name, counters in current.items():
+                previous = self._last.get(name)
+                if previous is None:
+                    continue
+                # 计数器回绕或网卡重置时增量按0处理
+                deltas = [max(0, value - old) / elapsed for value, old in zip(counters, previous)]
+                entry = (now, deltas[0] * 8, deltas[1] * 8, deltas[2], deltas[3], deltas[4], deltas[5])
+                history = self._history.get(name)
+                if history is None:
+                    history = self._history[name] = deque(maxlen=self.history_size)
+                history.append(entry)
+                updated[name] = dict(zip(self.FIELDS, entry))
+
+        # 已消失的网卡不再保留历史
+        for name in list(self._history):
+            if name not in current:
+                del self._history[name]
+
+        self._last = current
+        self._last_time = now
+        return updated
+
+    def interfaces(self) -> List[str]:
+        """
+        获取有采样数据的网卡列表
+
+        Returns:
+            List[str]: 网卡名称
+        """
+        return list(self._history)
+
+    def latest(self, name: str) -> Optional[Dict]:
+        """
+        获取网卡最近一次的速率
+
+        Args:
+            name: 网卡名称
+
+        Returns:
+            Optional[Dict]: 速率字典，没有数据返回None
+        """
+        history = self._history.get(name)
+        if not history:
+            return None
+        return dict(zip(self.FIELDS, history[-1]))
+
+    def history(self, name: str, field: str = 'recv_bps') -> List[float]:
+        """
+        获取网卡某个字段的历史数据
+
+        Args:
+            name: 网卡名称
+            field: 字段名（见FIELDS）
+
+        Returns:
+            List[float]: 从旧到新的数据
+        """
+        index = self.FIELDS.index(field)
+        return [entry[index] for entry in self._history.get(name, ())]
+
+    def peak(self, name: str) -> Dict:
+        """
+        获取缓冲区时间窗口内的峰值速率
+
+        Args:
+            name: 网卡名称
+
+        Returns:
+            Dict: {'recv_bps': 峰值, 'sent_bps': 峰值}
+        """
+        history = self._history.get(name) or ()
+        return {
+            'recv_bps': max((entry[1] for entry in history), default=0.0),
+            'sent_bps': max((entry[2] for entry in history), default=0.0),
+        }
 
 
 class NetworkInfoModel:
     """网络信息模型类"""
     
+    # 可单独加载的信息项
+    COLLECTORS = ('adapters', 'proxy', 'stats', 'dns')
+    
+    # 各信息项的缓存有效期（秒），0表示不缓存（网络统计每次都重新读取）
+    CACHE_TTL = {'adapters': 30, 'proxy': 30, 'stats': 0, 'dns': 60}
+    
+    # 缓存在所有实例间共享，短时间内重复打开对话框不会重新执行ipconfig等耗时操作
+    _cache: Dict[str, tuple] = {}
+    _cache_lock = threading.Lock()
+    
     def __init__(self):
         """初始化"""
         pass
         
+    def collect(self, name: str, force: bool = False):
+        """
+        获取一项信息（带缓存）
+        
+        Args:
+            name: 信息项名称（见COLLECTORS）
+            force: 是否忽略缓存重新获取
+            
+        Returns:
+            对应get_*方法的返回值
+        """
+        getters = {
+            'adapters': self.get_network_adapters,
+            'proxy': self.get_proxy_settings,
+            'stats': self.get_network_stats,
+            'dns': self.get_dns_servers,
+        }
+        if name not in getters:
+            raise ValueError(f"未知的信息项: {name}")
+        
+        ttl = self.CACHE_TTL.get(name, 0)
+        if ttl > 0 and not force:
+            with self._cache_lock:
+                cached = self._cache.get(name)
+            if cached and time.time() - cached[0] < ttl:
+                return cached[1]
+        
+        value = getters[name]()
+        if ttl > 0:
+            with self._cache_lock:
+                self._cache[name] = (time.time(), value)
+        return value
+        
+    @classmethod
+    def clear_cache(cls):
+        """清空缓存"""
+        with cls._cache_lock:
+            cls._cache.clear()
+        
     def get_network_adapters(self) -> List[Dict]:
         """
         获取网络适配器信息
@@ -74,66 +285,85 @@ class NetworkInfoModel:
             
         return adapters
         
+    @staticmethod
+    def _usable_address(address: str, family: str) -> bool:
+        """
+        判断地址能否作为测速连接的源地址（排除回环、链路本地和未指定地址）
+
+        Args:
+            address: 地址文本（IPv6可能带有%网卡后缀）
+            family: 'IPv4' 或 'IPv6'
+
+        Returns:
+            bool: 是否可用
+        """
+        if family not in ('IPv4', 'IPv6'):
+            return False
+        try:
+            ip = ipaddress.ip_address(address.split('%')[0])
+        except ValueError:
+            return False
+        return not (ip.is_loopback or ip.is_link_local or ip.is_unspecified)
+
+    def get_testable_interfaces(self, family: Optional[str] = None) -> List[Dict]:
+        """
+        获取可以单独测速的网卡：已启用、且有可用作源地址（非回环、非链路本地）的IP地址
+
+        Args:
+            family: 'ipv4'、'ipv6'，None表示优先使用IPv4地址
+
+        Returns:
+            List[Dict]: [{'name': 网卡名称, 'address': 源地址, 'family': 'ipv4'/'ipv6', 'speed': 链路速率(Mbps)}]
+        """
+        wanted = ('IPv4', 'IPv6') if family is None else (family.upper().replace('V', 'v'),)
+        interfaces = []
+        for adapter in self.get_network_adapters():
+            # 回环网卡只有回环地址，由_usable_address排除，不按名称判断（Windows的“Local Area Connection”等也以lo开头）
+            name = adapter['name']
+            if adapter['status'] != 'up':
+                continue
+            for address_type in wanted:
+                address = next((addr['address'] for addr in adapter['addresses']
+                                if addr['type'] == address_type
+                                and self._usable_address(addr['address'], address_type)), None)
+                if address:
+                    interfaces.append({
+                        'name': name,
+                        'address': address.split('%')[0],
+                        'family': address_type.lower(),
+                        'speed': adapter['speed'],
+                    })
+                    break
+        return interfaces
+
+    def get_interface_address(self, name: str, family: Optional[str] = None) -> Optional[str]:
+        """
+        获取网卡用作源地址的IP地址
+
+        Args:
+            name: 网卡名称
+            family: 'ipv4'、'ipv6'，None表示优先使用IPv4地址
+
+        Returns:
+            Optional[str]: 地址，网卡不存在、未启用或没有可用地址时返回None
+        """
+        for interface in self.get_testable_interfaces(family):
+            if interface['name'] == name:
+                return interface['address']
+        return None
+
     def get_proxy_settings(self) -> Dict:
         """
-        获取系统代理设置（Windows）
+        获取系统代理设置（由当前平台的后端读取）
         
         Returns:
             Dict: 代理设置信息
         """
-        proxy_info = {
-            'enabled': False,
-            'http_proxy': None,
-            'https_proxy': None,
-            'ftp_proxy': None,
-            'socks_proxy': None,
-            'bypass_list': []
-        }
-        
         try:
-            if platform.system() == 'Windows':
-                # 读取Windows注册表
-                key = winreg.OpenKey(
-                    winreg.HKEY_CURRENT_USER,
-                    r'Software\Microsoft\Windows\CurrentVersion\Internet Settings'
-                )
-                
-                try:
-                    proxy_enable, _ = winreg.QueryValueEx(key, 'ProxyEnable')
-                    proxy_info['enabled'] = bool(proxy_enable)
-                except:
-                    pass
-                
-                try:
-                    proxy_server, _ = winreg.QueryValueEx(key, 'ProxyServer')
-                    if proxy_server:
-                        # 解析代理服务器
-                        if '=' in proxy_server:
-                            # 格式: http=proxy:port;https=proxy:port
-                            for item in proxy_server.split(';'):
-                                if '=' in item:
-                                    protocol, server = item.split('=', 1)
-                                    proxy_info[f'{protocol}_proxy'] = server
-                        else:
-                            # 格式: proxy:port（所有协议使用同一代理）
-                            proxy_info['http_proxy'] = proxy_server
-                            proxy_info['https_proxy'] = proxy_server
-                except:
-                    pass
-                
-                try:
-                    proxy_override, _ = winreg.QueryValueEx(key, 'ProxyOverride')
-                    if proxy_override:
-                        proxy_info['bypass_list'] = proxy_override.split(';')
-                except:
-                    pass
-                
-                winreg.CloseKey(key)
-                
+            return get_backend().get_proxy_settings()
         except Exception as e:
             print(f"获取代理设置失败: {e}")
-            
-        return proxy_info
+            return empty_proxy_info()
         
     def get_network_stats(self) -> Dict:
         """
@@ -168,32 +398,29 @@ class NetworkInfoModel:
             
         return stats
         
+    def create_bandwidth_monitor(self, history_size: int = 120) -> InterfaceBandwidthMonitor:
+        """
+        创建实时网卡带宽监控
+        
+        Args:
+            history_size: 每个网卡保留的采样点数
+            
+        Returns:
+            InterfaceBandwidthMonitor: 带宽监控（已记录基准读数）
+        """
+        monitor = InterfaceBandwidthMonitor(history_size)
+        monitor.sample()
+        return monitor
+        
     def get_dns_servers(self) -> List[str]:
         """
-        获取DNS服务器列表
+        获取DNS服务器列表（由当前平台的后端读取）
         
         Returns:
             List[str]: DNS服务器列表
         """
-        dns_servers = []
-        
         try:
-            if platform.system() == 'Windows':
-                import subprocess
-                result = subprocess.run(
-                    ['ipconfig', '/all'],
-                    capture_output=True,
-                    text=True,
-                    encoding='gbk'
-                )
-                
-                lines = result.stdout.split('\n')
-                for line in lines:
-                    if 'DNS' in line and ':' in line:
-                        dns = line.split(':', 1)[1].strip()
-                        if dns and dns not in dns_servers:
-                            dns_servers.append(dns)
+            return get_backend().get_dns_servers()
         except Exception as e:
             print(f"获取DNS服务器失败: {e}")
-            
-        return dns_servers
+            return []
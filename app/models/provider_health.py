@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+Provider Health
+查询接口健康度 - 按指数加权移动平均(EWMA)跟踪各接口的延迟和失败率，据此调整尝试顺序和对冲请求的等待时间
+"""
+
+import time
+import threading
+from collections import deque
+from typing import Dict, List, Optional
+
+
+class ProviderStats:
+    """单个接口的健康统计"""
+
+    def __init__(self, name: str, window: int = 50):
+        """
+        初始化统计
+
+        Args:
+            name: 接口名称
+            window: 计算延迟分位数时保留的最近成功请求数
+        """
+        self.name = name
+        self.latency_ewma: Optional[float] = None
+        self.error_ewma = 0.0
+        self.requests = 0
+        self.failures = 0
+        self.updated = 0.0
+        self.recent = deque(maxlen=window)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """
+        最近成功请求延迟的分位数
+
+        Args:
+            q: 分位（0~1）
+
+        Returns:
+            Optional[float]: 延迟（秒），没有样本时返回None
+        """
+        if not self.recent:
+            return None
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class ProviderHealth:
+    """
+    查询接口健康度跟踪（线程安全）
+
+    每次请求后更新该接口的延迟EWMA和失败率EWMA，得分 = 延迟EWMA + 失败率EWMA × FAILURE_PENALTY，
+    得分越低越优先。没有数据的接口按DEFAULT_LATENCY估计，得分相同时保持配置顺序，
+    因此启动时的顺序与配置一致，某个接口开始超时或出错后会自动排到后面，
+    之后得分随时间向默认值回归，一段时间后会被重新尝试。
+    """
+
+    # 失败的代价（秒）：一次失败大约等于一次超时后再换下一个接口
+    FAILURE_PENALTY = 5.0
+    # 没有数据时估计的延迟（秒）
+    DEFAULT_LATENCY = 0.5
+    # 对冲请求的等待时间范围（秒）
+    MIN_HEDGE_DELAY = 0.1
+    MAX_HEDGE_DELAY = 2.0
+    # 对冲等待时间取该接口最近延迟的分位数
+    HEDGE_PERCENTILE = 0.9
+    # 样本少于该数量时不用分位数，而用EWMA的两倍
+    MIN_PERCENTILE_SAMPLES = 5
+    # 得分向默认值回归的半衰期（秒）：排到后面不再被请求的接口，过一段时间后会重新被尝试
+    RECOVERY_HALF_LIFE = 60.0
+
+    def __init__(self, alpha: float = 0.3):
+        """
+        初始化跟踪器
+
+        Args:
+            alpha: EWMA平滑系数，越大越重视最近的请求
+        """
+        self.alpha = alpha
+        self._stats: Dict[str, ProviderStats] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, name: str) -> ProviderStats:
+        """获取接口统计，不存在时创建（调用方需持有锁）"""
+        stats = self._stats.get(name)
+        if stats is None:
+            stats = self._stats[name] = ProviderStats(name)
+        return stats
+
+    def record(self, name: str, latency: float, success: bool):
+        """
+        记录一次请求结果
+
+        Args:
+            name: 接口名称
+            latency: 请求耗时（秒），失败时为失败前的耗时
+            success: 是否成功
+        """
+        with self._lock:
+            stats = self._get(name)
+            stats.requests += 1
+            stats.updated = time.monotonic()
+            stats.error_ewma += self.alpha * ((0.0 if success else 1.0) - stats.error_ewma)
+            if success:
+                stats.recent.append(latency)
+            else:
+                stats.failures += 1
+            # 失败请求的耗时也计入延迟（超时的接口延迟会明显升高）
+            if stats.latency_ewma is None:
+                stats.latency_ewma = latency
+            else:
+                stats.latency_ewma += self.alpha * (latency - stats.latency_ewma)
+
+    def score(self, name: str) -> float:
+        """
+        计算接口得分（越低越好）
+
+        Args:
+            name: 接口名称
+
+        Returns:
+            float: 预期耗时（秒）
+        """
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None or stats.latency_ewma is None:
+                return self.DEFAULT_LATENCY
+            raw = stats.latency_ewma + stats.error_ewma * self.FAILURE_PENALTY
+            age = time.monotonic() - stats.updated
+        # 长时间没有新数据时逐渐回归默认值，避免故障恢复后的接口永远排在最后
+        decay = 0.5 ** (age / self.RECOVERY_HALF_LIFE)
+        return self.DEFAULT_LATENCY + (raw - self.DEFAULT_LATENCY) * decay
+
+    def order(self, names: List[str]) -> List[str]:
+        """
+        按得分排序接口
+
+        Args:
+            names: 按配置优先顺序排列的接口名称
+
+        Returns:
+            List[str]: 排序后的接口名称（得分相同时保持原顺序）
+        """
+        scores = {name: self.score(name) for name in names}
+        return sorted(names, key=lambda name: scores[name])
+
+    def hedge_delay(self, name: str) -> float:
+        """
+        计算对冲等待时间：请求超过该时间仍未返回时，同时向下一个接口发起请求
+
+        Args:
+            name: 当前接口名称
+
+        Returns:
+            float: 等待时间（秒）
+        """
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None or stats.latency_ewma is None:
+                delay = self.DEFAULT_LATENCY * 2
+            elif len(stats.recent) >= self.MIN_PERCENTILE_SAMPLES:
+                delay = stats.percentile(self.HEDGE_PERCENTILE)
+            else:
+                delay = stats.latency_ewma * 2
+        return min(self.MAX_HEDGE_DELAY, max(self.MIN_HEDGE_DELAY, delay))
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """
+        获取所有接口的健康统计
+
+        Returns:
+            Dict[str, Dict]: {接口名称: 统计信息}
+        """
+        with self._lock:
+            names = list(self._stats)
+        result = {}
+        for name in names:
+            with self._lock:
+                stats = self._stats[name]
+                entry = {
+                    'requests': stats.requests,
+                    'failures': stats.failures,
+                    'latency_ewma_ms': None if stats.latency_ewma is None else round(stats.latency_ewma * 1000, 1),
+                    'error_rate_ewma': round(stats.error_ewma, 3),
+                    'p90_ms': None if not stats.recent else round(stats.percentile(0.9) * 1000, 1),
+                }
+            entry['score'] = round(self.score(name), 3)
+            entry['hedge_delay_ms'] = round(self.hedge_delay(name) * 1000, 1)
+            result[name] = entry
+        return result
@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+"""
+Resource Monitor
+测试期间的资源采样 - 周期采样基类和本进程CPU占用监控
+"""
+
+import time
+import threading
+from typing import Dict, List, Optional
+
+import psutil
+
+
+class PeriodicSampler:
+    """
+    周期采样基类
+
+    在后台线程中按固定间隔调用 _sample()，子类负责保存数据和生成汇总。
+    支持with语句：进入时开始采样，退出时停止。
+    """
+
+    def __init__(self, interval: float = 0.5):
+        """
+        初始化采样器
+
+        Args:
+            interval: 采样间隔（秒）
+        """
+        self.interval = interval
+        self.start_time: Optional[float] = None
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _prepare(self):
+        """开始采样前的准备（子类可重写，如读取初始计数）"""
+        pass
+
+    def _sample(self, now: float):
+        """
+        采集一次数据（子类实现）
+
+        Args:
+            now: 当前时间戳
+        """
+        raise NotImplementedError
+
+    def _run(self):
+        """采样线程主循环"""
+        while not self._stop_event.wait(self.interval):
+            try:
+                self._sample(time.time())
+            except Exception as e:
+                print(f"[资源监控] 采样失败: {e}")
+                break
+
+    def start(self):
+        """开始采样"""
+        if self._thread and self._thread.is_alive():
+            return
+        self.start_time = time.time()
+        self._prepare()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name=type(self).__name__, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止采样，并补采最后一个不足一个间隔的时段"""
+        if not self._thread:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+        try:
+            self._sample(time.time())
+        except Exception:
+            pass
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+
+class CPUMonitor(PeriodicSampler):
+    """
+    本进程CPU占用监控
+
+    同时采样整个进程和测量线程的CPU占用（百分比以单核为100%）。
+    测速的数据收发都在测量线程中完成，测量线程接近100%说明它已经跑满一个核，
+    此时测得的速度可能是客户端自身的上限而不是网络的上限。
+    """
+
+    # 测量线程CPU占用达到该比例（单核百分比）视为饱和
+    SATURATION_PERCENT = 85.0
+
+    def __init__(self, interval: float = 0.5, thread_id: Optional[int] = None):
+        """
+        初始化监控
+
+        Args:
+            interval: 采样间隔（秒）
+            thread_id: 测量线程的系统线程ID（threading.get_native_id()），默认为创建监控的线程
+        """
+        super().__init__(interval)
+        self.thread_id = thread_id if thread_id is not None else threading.get_native_id()
+        self.cores = psutil.cpu_count() or 1
+        self._process = psutil.Process()
+        self._last_time = 0.0
+        self._last_process_cpu = 0.0
+        self._last_thread_cpu: Optional[float] = None
+        # 每个元素: (相对开始的秒数, 进程CPU%, 线程CPU%或None)
+        self.samples: List[tuple] = []
+
+    def _process_cpu(self) -> float:
+        """进程累计CPU时间（秒）"""
+        times = self._process.cpu_times()
+        return times.user + times.system
+
+    def _thread_cpu(self) -> Optional[float]:
+        """测量线程累计CPU时间（秒），平台不支持时返回None"""
+        try:
+            for thread in self._process.threads():
+                if thread.id == self.thread_id:
+                    return thread.user_time + thread.system_time
+        except (psutil.AccessDenied, psutil.NoSuchProcess, NotImplementedError):
+            pass
+        return None
+
+    def _prepare(self):
+        """记录初始CPU时间"""
+        self.samples = []
+        self._last_time = time.time()
+        self._last_process_cpu = self._process_cpu()
+        self._last_thread_cpu = self._thread_cpu()
+
+    def _sample(self, now: float):
+        """采集一次CPU占用"""
+        wall = now - self._last_time
+        if wall <= 0:
+            return
+        process_cpu = self._process_cpu()
+        thread_cpu = self._thread_cpu()
+
+        process_percent = (process_cpu - self._last_process_cpu) / wall * 100
+        thread_percent = None
+        if thread_cpu is not None and self._last_thread_cpu is not None:
+            thread_percent = (thread_cpu - self._last_thread_cpu) / wall * 100
+
+        self.samples.append((round(now - self.start_time, 3), round(process_percent, 1),
+                             None if thread_percent is None else round(thread_percent, 1)))
+        self._last_time = now
+        self._last_process_cpu = process_cpu
+        self._last_thread_cpu = thread_cpu
+
+    def _saturated(self, sample: tuple) -> bool:
+        """判断一个采样点是否饱和（优先看测量线程，其次看进程是否跑满所有核）"""
+        _, process_percent, thread_percent = sample
+        if thread_percent is not None:
+            return thread_percent >= self.SATURATION_PERCENT
+        return process_percent >= self.SATURATION_PERCENT * self.cores
+
+    def saturated_between(self, start: float, end: float) -> Optional[bool]:
+        """
+        判断某个时间段内CPU是否饱和
+
+        Args:
+            start: 起始秒数（相对开始）
+            end: 结束秒数（相对开始）
+
+        Returns:
+            Optional[bool]: 是否饱和，该时段没有采样时返回None
+        """
+        window = [sample for sample in self.samples if start < sample[0] <= end + self.interval / 2]
+        if not window:
+            return None
+        return sum(1 for sample in window if self._saturated(sample)) * 2 >= len(window)
+
+    def summary(self) -> Dict:
+        """
+        生成CPU占用汇总
+
+        Returns:
+            Dict: 进程/线程CPU占用的平均值、峰值和饱和比例
+        """
+        if not self.samples:
+            return {}
+        process = [sample[1] for sample in self.samples]
+        threads = [sample[2] for sample in self.samples if sample[2] is not None]
+        summary = {
+            'cores': self.cores,
+            'process_avg': round(sum(process) / len(process), 1),
+            'process_max': round(max(process), 1),
+            'saturated_ratio': round(sum(1 for s in self.samples if self._saturated(s)) / len(self.samples), 3),
+            'samples': len(self.samples),
+        }
+        if threads:
+            summary['thread_avg'] = round(sum(threads) / len(threads), 1)
+            summary['thread_max'] = round(max(threads), 1)
+        return summary
+
+
+def detect_client_limited(monitor: CPUMonitor, timestamps: List[float], speeds: List[float],
+                          plateau_cv: float = 0.1, min_windows: int = 3) -> bool:
+    """
+    判断测试是否受客户端CPU限制
+
+    条件：过半的每秒采样窗口中CPU饱和，且这些窗口内的速度是平台（变异系数不超过plateau_cv）。
+    只有CPU跑满而速度仍在波动时，瓶颈通常在网络，不会被判定为客户端受限。
+
+    Args:
+        monitor: 测试期间的CPU监控
+        timestamps: 每秒速度采样的时间（相对测试开始的秒数）
+        speeds: 每秒速度(Mbps)
+        plateau_cv: 平台判定的最大变异系数
+        min_windows: 至少需要的饱和窗口数
+
+    Returns:
+        bool: 是否受客户端限制
+    """
+    if not monitor.samples or not speeds:
+        return False
+
+    saturated_speeds = []
+    previous = 0.0
+    for timestamp, speed in zip(timestamps, speeds):
+        if monitor.saturated_between(previous, timestamp):
+            saturated_speeds.append(speed)
+        previous = timestamp
+
+    if len(saturated_speeds) < min_windows or len(saturated_speeds) * 2 < len(speeds):
+        return False
+
+    mean = sum(saturated_speeds) / len(saturated_speeds)
+    if mean <= 0:
+        return False
+    variance = sum((speed - mean) ** 2 for speed in saturated_speeds) / len(saturated_speeds)
+    return variance ** 0.5 / mean <= plateau_cv
@@ -0,0 +1,314 @@
+# -*- coding: utf-8 -*-
+"""
+Sample Series
+紧凑的采样序列 - 使用array('d')按列存储时间戳和数值
+"""
+
+import sys
+import zlib
+import struct
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+class SampleSeries:
+    """
+    采样序列类
+
+    时间戳（相对start_time的秒数）和数值分别保存在两个array('d')中，
+    每个采样点固定占用16字节，而list[float]每个元素约需32字节（对象+指针）。
+    序列实现了len/迭代/下标访问，可以在原先使用数值列表的地方直接使用。
+    """
+
+    # 二进制格式: 魔数, 版本, 标志位, 起始时间, 采样数
+    _MAGIC = b'SSR'
+    _VERSION = 1
+    _FLAG_ZLIB = 0x01
+    _HEADER = struct.Struct('<3sBBdI')
+
+    __slots__ = ('start_time', '_timestamps', '_values')
+
+    def __init__(self, values: Iterable[float] = None, timestamps: Iterable[float] = None,
+                 start_time: float = 0.0):
+        """
+        初始化序列
+
+        Args:
+            values: 初始数值
+            timestamps: 初始时间戳（相对start_time的秒数），默认按1秒间隔生成
+            start_time: 序列起始时间（Unix时间戳）
+        """
+        self.start_time = float(start_time)
+        self._values = array('d', values if values is not None else [])
+        if timestamps is not None:
+            self._timestamps = array('d', timestamps)
+        else:
+            self._timestamps = array('d', range(1, len(self._values) + 1))
+
+        if len(self._timestamps) != len(self._values):
+            raise ValueError("时间戳和数值的数量不一致")
+
+    def append(self, value: float, timestamp: Optional[float] = None):
+        """
+        追加一个采样点
+
+        Args:
+            value: 采样值
+            timestamp: 相对start_time的秒数，默认在上一个点之后1秒
+        """
+        if timestamp is None:
+            timestamp = self._timestamps[-1] + 1.0 if self._timestamps else 1.0
+        self._timestamps.append(timestamp)
+        self._values.append(value)
+
+    @property
+    def values(self) -> array:
+        """数值列（array('d')，请勿直接修改）"""
+        return self._values
+
+    @property
+    def timestamps(self) -> array:
+        """时间戳列（array('d')，请勿直接修改）"""
+        return self._timestamps
+
+    @property
+    def nbytes(self) -> int:
+        """数据占用的字节数"""
+        return (len(self._values) + len(self._timestamps)) * self._values.itemsize
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __iter__(self) -> Iterator[float]:
+        return iter(self._values)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return SampleSeries(self._values[index], self._timestamps[index], self.start_time)
+        return self._values[index]
+
+    def __bool__(self) -> bool:
+        return len(self._values) > 0
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, SampleSeries):
+            return (self._values == other._values and self._timestamps == other._timestamps
+                    and self.start_time == other.start_time)
+        if isinstance(other, (list, tuple)):
+            return list(self._values) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"SampleSeries(len={len(self)}, start_time={self.start_time})"
+
+    def items(self) -> Iterator[Tuple[float, float]]:
+        """
+        迭代(时间戳, 数值)对
+
+        Returns:
+            Iterator[Tuple[float, float]]: 采样点迭代器
+        """
+        return zip(self._timestamps, self._values)
+
+    def to_list(self) -> List[float]:
+        """
+        转换为数值列表（兼容旧版本的speeds字段格式）
+
+        Returns:
+            List[float]: 数值列表
+        """
+        return self._values.tolist()
+
+    def to_dict(self) -> Dict:
+        """
+        转换为包含时间戳的字典（用于JSON导出）
+
+        Returns:
+            Dict: {'start_time': 起始时间, 't': 时间戳列表, 'v': 数值列表}
+        """
+        return {
+            'start_time': self.start_time,
+            't': self._timestamps.tolist(),
+            'v': self._values.tolist()
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'SampleSeries':
+        """
+        从to_dict()的结果还原序列
+
+        Args:
+            data: 序列字典
+
+        Returns:
+            SampleSeries: 序列对象
+        """
+        return cls(data.get('v', []), data.get('t'), data.get('start_time', 0.0))
+
+    def to_numpy(self):
+        """
+        转换为NumPy数组（零拷贝视图，需要安装numpy）
+
+        Returns:
+            tuple: (时间戳数组, 数值数组)
+        """
+        import numpy as np
+        return (np.frombuffer(self._timestamps, dtype=np.float64),
+                np.frombuffer(self._values, dtype=np.float64))
+
+    def to_bytes(self, compress: bool = True) -> bytes:
+        """
+        序列化为紧凑的二进制格式（小端float64列存储，可选zlib压缩）
+
+        Args:
+            compress: 是否使用zlib压缩数据部分
+
+        Returns:
+            bytes: 二进制数据
+        """
+        timestamps = self._timestamps
+        values = self._values
+        if sys.byteorder == 'big':
+            timestamps = array('d', timestamps)
+            values = array('d', values)
+            timestamps.byteswap()
+            values.byteswap()
+
+        payload = timestamps.tobytes() + values.tobytes()
+        flags = 0
+        if compress:
+            payload = zlib.compress(payload)
+            flags |= self._FLAG_ZLIB
+
+        header = self._HEADER.pack(self._MAGIC, self._VERSION, flags, self.start_time, len(self._values))
+        return header + payload
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'SampleSeries':
+        """
+        从二进制数据还原序列
+
+        Args:
+            data: to_bytes()生成的二进制数据
+
+        Returns:
+            SampleSeries: 序列对象
+        """
+        magic, version, flags, start_time, count = cls._HEADER.unpack_from(data)
+        if magic != cls._MAGIC or version != cls._VERSION:
+            raise ValueError("无效的采样序列数据")
+
+        payload = bytes(data[cls._HEADER.size:])
+        if flags & cls._FLAG_ZLIB:
+            payload = zlib.decompress(payload)
+
+        series = cls(start_time=start_time)
+        series._timestamps.frombytes(payload[:count * 8])
+        series._values.frombytes(payload[count * 8:count * 16])
+        if sys.byteorder == 'big':
+            series._timestamps.byteswap()
+            series._values.byteswap()
+        return series
+
+    def downsample(self, max_points: int, mode: str = 'mean') -> 'SampleSeries':
+        """
+        降采样（用于图表显示），序列不超过max_points时直接返回副本
+
+        Args:
+            max_points: 最多保留的点数
+            mode: 'mean' 每段取平均值；'minmax' 每段保留最小和最大值（保留尖峰和低谷）
+
+        Returns:
+            SampleSeries: 降采样后的新序列
+        """
+        count = len(self._values)
+        if max_points <= 0:
+            raise ValueError("max_points必须大于0")
+        if count <= max_points:
+            return SampleSeries(self._values, self._timestamps, self.start_time)
+
+        if mode == 'minmax':
+            buckets = max(1, max_points // 2)
+        elif mode == 'mean':
+            buckets = max_points
+        else:
+            raise ValueError(f"不支持的降采样模式: {mode}")
+
+        result = SampleSeries(start_time=self.start_time)
+        for i in range(buckets):
+            lo = i * count // buckets
+            hi = (i + 1) * count // buckets
+            if hi <= lo:
+                continue
+            values = self._values[lo:hi]
+            timestamps = self._timestamps[lo:hi]
+
+            if mode == 'mean':
+                result.append(sum(values) / len(values), sum(timestamps) / len(timestamps))
+            else:
+                min_index = min(range(len(values)), key=values.__getitem__)
+                max_index = max(range(len(values)), key=values.__getitem__)
+                for index in sorted({min_index, max_index}):
+                    result.append(values[index], timestamps[index])
+        return result
+
+
+def split_series(data: Dict, prefix: str = '') -> Tuple[Dict, Dict[str, SampleSeries]]:
+    """
+    从（嵌套的）结果字典中分离出所有采样序列
+
+    Args:
+        data: 结果字典
+        prefix: 键路径前缀（递归使用）
+
+    Returns:
+        Tuple[Dict, Dict[str, SampleSeries]]: (不含序列的字典副本, {键路径: 序列})，
+            键路径用'.'连接，例如 'download_stats.speeds'
+    """
+    plain = {}
+    series = {}
+    for key, value in data.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, SampleSeries):
+            series[path] = value
+        elif isinstance(value, dict):
+            plain[key], nested = split_series(value, f"{path}.")
+            series.update(nested)
+        else:
+            plain[key] = value
+    return plain, series
+
+
+def merge_series(data: Dict, series: Dict[str, SampleSeries]) -> Dict:
+    """
+    将split_series()分离出的序列放回结果字典（原地修改）
+
+    Args:
+        data: 不含序列的结果字典
+        series: {键路径: 序列}
+
+    Returns:
+        Dict: 合并后的结果字典
+    """
+    for path, value in series.items():
+        target = data
+        keys = path.split('.')
+        for key in keys[:-1]:
+            target = target.setdefault(key, {})
+        target[keys[-1]] = value
+    return data
+
+
+def json_default(obj):
+    """
+    json.dumps的default回调：采样序列输出为数值列表
+
+    Args:
+        obj: 无法直接序列化的对象
+
+    Returns:
+        list: 可序列化的数值列表
+    """
+    if isinstance(obj, SampleSeries):
+        return obj.to_list()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
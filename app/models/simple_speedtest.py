@@ -9,8 +9,16 @@ import requests
 import threading
 import tempfile
 import os
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Tuple
 from datetime import datetime
+from urllib.parse import urlsplit
+from .sample_series import SampleSeries
+from .streaming_stats import StreamingStats
+from .tracer import tracer
+from .resource_monitor import CPUMonitor, detect_client_limited
+from .interface_counters import InterfaceCounterSampler, describe_cross_check
+from .network_info_model import NetworkInfoModel
+from . import transport
 
 
 class SimpleSpeedTest:
@@ -37,34 +45,147 @@ class SimpleSpeedTest:
         ]
     }
     
-    def __init__(self, log_callback=None):
-        """初始化"""
+    # Ping测试默认主机（使用国内常用服务和CDN）
+    PING_HOSTS = [
+        ('www.baidu.com', '百度'),
+        ('www.qq.com', '腾讯'),
+        ('www.taobao.com', '淘宝'),
+        ('www.163.com', '网易'),
+        ('www.jd.com', '京东'),
+        ('www.aliyun.com', '阿里云'),
+        ('cloud.tencent.com', '腾讯云'),
+        ('www.huaweicloud.com', '华为云'),
+        ('www.bilibili.com', '哔哩哔哩'),
+        ('www.douyin.com', '抖音'),
+    ]
+    
+    # 下载数据中最多保留用于上传测试的字节数（上传只使用开头的数据块）
+    UPLOAD_SEED_BYTES = 1024 * 1024
+    
+    def __init__(self, log_callback=None, keep_samples: bool = True, sample_callback=None,
+                 download_urls: Optional[List[Tuple]] = None, upload_urls: Optional[List[Tuple]] = None,
+                 ping_hosts: Optional[List[Tuple]] = None, address_family: Optional[str] = None,
+                 source_address: Optional[str] = None, interface: Optional[str] = None,
+                 proxy: Optional[str] = None):
+        """
+        初始化
+        
+        Args:
+            log_callback: 日志回调函数
+            keep_samples: 是否在统计结果中保留每秒速度序列；长时间运行时可关闭，只保留常数内存的流式统计
+                          （单次测试期间仍临时记录每秒速度用于判断是否受客户端CPU限制，测试结束后丢弃）
+            sample_callback: 采样回调函数，每产生一个每秒速度采样时调用
+                             sample_callback(direction, speed_mbps, elapsed)
+            download_urls: 下载测试地址列表 [(url, 大小说明, 名称)]，默认使用TEST_URLS['download']
+            upload_urls: 上传测试地址列表 [(url, 名称)]，默认使用TEST_URLS['upload']
+            ping_hosts: Ping测试主机列表 [(主机, 名称)]，默认使用PING_HOSTS
+            address_family: 强制使用的地址族 ('ipv4' 或 'ipv6')，None表示由解析器决定
+            source_address: 测试连接使用的本机地址，None表示由系统选择
+            interface: 测试使用的网卡名称（见 NetworkInfoModel.get_testable_interfaces），
+                       未指定source_address时使用该网卡的地址
+            proxy: 代理模式，'direct'直连，'system'使用系统代理设置（见 NetworkInfoModel.get_proxy_settings），
+                   其他值作为代理地址；None与requests默认行为相同，使用环境变量中的代理
+            
+        Raises:
+            ValueError: 网卡不存在、未启用或没有可用地址，代理地址无效，或系统代理无法直接使用
+        """
         self.download_speed = 0.0
         self.upload_speed = 0.0
         self.ping_time = 0.0
         self._log_callback = log_callback
         self._temp_files = []  # 存储临时文件路径
         self._downloaded_data = None  # 存储下载的数据用于上传测试
+        self._keep_samples = keep_samples
+        self._sample_callback = sample_callback
+        self._download_urls = list(download_urls) if download_urls else self.TEST_URLS['download']
+        self._upload_urls = list(upload_urls) if upload_urls else self.TEST_URLS['upload']
+        self._ping_hosts = list(ping_hosts) if ping_hosts else self.PING_HOSTS
+        self.address_family = address_family
+        if interface and not source_address:
+            source_address = NetworkInfoModel().get_interface_address(interface, address_family)
+            if source_address is None:
+                raise ValueError(f"网卡 {interface} 不存在、未启用或没有可用的IP地址")
+        self.source_address = source_address
+        self.interface = interface
+        self.proxy_mode, self.proxies = self._resolve_proxy(proxy)
+        # 最近一次单项测试在应用层传输的字节数和耗时（用于与网卡计数器交叉校验）
+        self._last_transfer_bytes = 0
+        self._last_transfer_elapsed = 0.0
+        
+        # 流式统计累加器（每个采样点实时更新，测试进行中可随时读取）
+        self.download_accumulator = StreamingStats()
+        self.upload_accumulator = StreamingStats()
         
         # 详细统计信息
         self.download_stats = {
             'max': 0.0,
             'min': 0.0,
             'avg': 0.0,
-            'speeds': []
+            'speeds': SampleSeries()
         }
         self.upload_stats = {
             'max': 0.0,
             'min': 0.0,
             'avg': 0.0,
-            'speeds': []
+            'speeds': SampleSeries()
         }
         
+    @staticmethod
+    def _resolve_proxy(proxy: Optional[str]) -> Tuple[str, Optional[Dict[str, str]]]:
+        """
+        解析代理模式
+        
+        Args:
+            proxy: None、'direct'、'system'或代理地址
+            
+        Returns:
+            Tuple[str, Optional[Dict]]: (模式名称 'env'/'direct'/'system'/'custom', proxies参数)
+        """
+        if proxy is None:
+            return 'env', None
+        if proxy == 'direct':
+            return 'direct', {}
+        if proxy == 'system':
+            return 'system', transport.proxies_from_settings(NetworkInfoModel().get_proxy_settings())
+        return 'custom', transport.proxies_from_url(proxy)
+        
+    def describe_proxy(self) -> Dict:
+        """
+        当前使用的代理（用于测试结果）
+        
+        Returns:
+            Dict: {'mode': 模式, 'url': 代理地址（直连或使用环境变量时为None）}
+        """
+        url = None
+        if self.proxies:
+            url = self.proxies.get('https') or self.proxies.get('http')
+            parts = urlsplit(url)
+            if parts.password:
+                # 不在结果和历史记录中保存代理密码
+                url = parts._replace(netloc=parts.netloc.replace(f':{parts.password}@', ':***@')).geturl()
+        return {'mode': self.proxy_mode, 'url': url}
+        
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        发送HTTP请求（按address_family、source_address、interface和代理模式约束连接，每次使用新连接）
+        
+        Args:
+            method: 请求方法
+            url: 地址
+            **kwargs: 传给requests的参数
+            
+        Returns:
+            requests.Response: 响应
+        """
+        return transport.request(method, url, self.address_family, self.source_address,
+                                 self.interface, self.proxies, **kwargs)
+        
     def _log(self, message: str):
         """输出日志"""
-        print(message)
-        if self._log_callback:
-            self._log_callback(message)
+        with tracer.span('log', 'log'):
+            print(message)
+            if self._log_callback:
+                self._log_callback(message)
         
     def test_download(self, test_duration: int = 10) -> Optional[float]:
         """
@@ -80,11 +201,18 @@ class SimpleSpeedTest:
         
         # 单次测试即可，使用第一个可用的URL
         speed = 0
-        second_speeds = []
-        for url, size, name in self.TEST_URLS['download'][:3]:  # 尝试前3个URL
+        second_speeds = SampleSeries()
+        cpu_monitor = None
+        counter_sampler = None
+        for url, size, name in self._download_urls[:3]:  # 尝试前3个URL
             try:
                 self._log(f"[下载测试] 正在从 {name} 下载测试...")
-                speed, second_speeds = self._test_download_single(url, test_duration)
+                self.download_accumulator = StreamingStats()
+                cpu_monitor = CPUMonitor()
+                counter_sampler = InterfaceCounterSampler()
+                with tracer.span('download', 'phase', server=name), tracer.profile_thread('download'), \
+                        cpu_monitor, counter_sampler:
+                    speed, second_speeds = self._test_download_single(url, test_duration, self.download_accumulator)
                 if speed > 0:
                     break  # 成功就退出
             except Exception as e:
@@ -95,22 +223,15 @@ class SimpleSpeedTest:
             self._log(f"[下载测试] 所有测试都失败")
             return None
         
-        # 计算统计信息（基于每秒速度）
-        if second_speeds:
-            max_speed = max(second_speeds)
-            min_speed = min(second_speeds)
-            avg_speed = speed  # 总平均速度
-        else:
-            max_speed = min_speed = avg_speed = speed
+        # 计算统计信息（基于流式累加器，不再遍历每秒速度列表）
+        self.download_stats = self._build_stats(speed, second_speeds, self.download_accumulator, cpu_monitor)
+        self.download_stats['interface_check'] = self._cross_check_interfaces('下载测试', 'download', counter_sampler)
+        self.download_speed = self.download_stats['avg']
+        max_speed = self.download_stats['max']
+        min_speed = self.download_stats['min']
+        avg_speed = self.download_stats['avg']
         
-        # 保存结果
-        self.download_speed = round(avg_speed, 3)
-        self.download_stats = {
-            'max': round(max_speed, 3),
-            'min': round(min_speed, 3),
-            'avg': round(avg_speed, 3),
-            'speeds': second_speeds
-        }
+        self._log_cpu('下载测试', self.download_stats)
         
         # 显示最终统计
         self._log(f"[下载测试] ========== 下载速度统计 ==========")
@@ -120,23 +241,123 @@ class SimpleSpeedTest:
         self._log(f"[下载测试] =====================================")
         return self.download_speed
             
-    def _test_download_single(self, url: str, duration: int = 10) -> tuple:
+    def _build_stats(self, speed: float, second_speeds: SampleSeries, accumulator: StreamingStats,
+                     cpu_monitor: Optional[CPUMonitor] = None) -> Dict:
+        """
+        根据流式累加器生成统计字典
+        
+        Args:
+            speed: 总平均速度(Mbps)
+            second_speeds: 每秒速度序列
+            accumulator: 每秒速度的流式累加器
+            cpu_monitor: 测试期间的CPU监控
+            
+        Returns:
+            Dict: 包含max/min/avg/speeds、stddev/p50/p90/p95/p99，
+                  以及cpu（CPU占用汇总）和client_limited（是否受客户端CPU限制）的统计字典
+        """
+        snapshot = accumulator.snapshot()
+        if accumulator.count:
+            max_speed = accumulator.max
+            min_speed = accumulator.min
+        else:
+            max_speed = min_speed = speed
+            
+        stats = {
+            'max': round(max_speed, 3),
+            'min': round(min_speed, 3),
+            'avg': round(speed, 3),  # 总平均速度
+            # 不保留采样时每秒速度只用于本次的客户端受限判断，不随结果长期保存
+            'speeds': second_speeds if self._keep_samples else SampleSeries()
+        }
+        for key in ('stddev', 'p50', 'p90', 'p95', 'p99'):
+            stats[key] = snapshot.get(key)
+        if cpu_monitor is not None:
+            stats['cpu'] = cpu_monitor.summary()
+            stats['client_limited'] = detect_client_limited(
+                cpu_monitor, list(second_speeds.timestamps), list(second_speeds.values))
+        return stats
+        
+    def _log_cpu(self, tag: str, stats: Dict):
+        """
+        输出测试期间的CPU占用，受客户端限制时给出警告
+        
+        Args:
+            tag: 日志标签
+            stats: 统计字典
+        """
+        cpu = stats.get('cpu')
+        if not cpu:
+            return
+        thread = f"，测量线程平均 {cpu['thread_avg']}%" if 'thread_avg' in cpu else ''
+        self._log(f"[{tag}] 本进程CPU平均 {cpu['process_avg']}%（峰值 {cpu['process_max']}%）{thread}")
+        if stats.get('client_limited'):
+            self._log(f"[{tag}] 警告: CPU已饱和且速度处于平台期，结果可能受本机性能限制而非网络带宽")
+        
+    def _cross_check_interfaces(self, tag: str, direction: str,
+                                counter_sampler: Optional[InterfaceCounterSampler]) -> Dict:
+        """
+        用网卡计数器校验应用层统计的传输量
+        
+        Args:
+            tag: 日志标签
+            direction: 测试方向
+            counter_sampler: 测试期间的网卡计数器采样
+            
+        Returns:
+            Dict: 校验结果（见InterfaceCounterSampler.cross_check）
+        """
+        if counter_sampler is None:
+            return {}
+        check = counter_sampler.cross_check(direction, self._last_transfer_bytes, self._last_transfer_elapsed)
+        if not check:
+            return check
+        self._log(f"[{tag}] 网卡 {check['interface']}: {check['interface_mbps'] / 8:.2f} MB/s，"
+                  f"应用层: {check['app_mbps'] / 8:.2f} MB/s")
+        if 'protocol_overhead_ratio' in check:
+            self._log(f"[{tag}] 协议开销约 {check['protocol_overhead_ratio'] * 100:.1f}%")
+        warning = describe_cross_check(check)
+        if warning:
+            self._log(f"[{tag}] 警告: {warning}")
+        return check
+        
+    def get_live_stats(self, direction: str = 'download') -> Dict:
+        """
+        获取测试进行中的实时统计（可从其他线程调用）
+        
+        Args:
+            direction: 'download' 或 'upload'
+            
+        Returns:
+            Dict: 统计快照（count/mean/stddev/min/max/分位数）
+        """
+        accumulator = self.download_accumulator if direction == 'download' else self.upload_accumulator
+        return accumulator.snapshot()
+        
+    def _test_download_single(self, url: str, duration: int = 10,
+                              accumulator: Optional[StreamingStats] = None) -> tuple:
         """
         单个URL下载测试（限时，实时显示速度，循环下载直到时间到）
         
         Args:
             url: 测试URL
             duration: 测试持续时间
+            accumulator: 每秒速度的流式累加器
             
         Returns:
-            tuple: (平均速度Mbps, 每秒速度列表)
+            tuple: (平均速度Mbps, 每秒速度序列)
         """
         start_time = time.time()
         downloaded = 0
-        downloaded_chunks = []  # 保存下载的数据块
+        downloaded_chunks = []  # 保存下载的数据块（只保留开头部分用于上传测试）
+        kept_bytes = 0
         last_log_time = start_time
         last_downloaded = 0
-        second_speeds = []  # 记录每秒的速度
+        second_speeds = SampleSeries(start_time=start_time)  # 记录每秒的速度
+        # 性能追踪（关闭时热路径只多一次布尔判断）
+        trace = tracer.enabled
+        chunk_stride = tracer.chunk_stride
+        chunk_index = 0
         
         try:
             headers = {
@@ -146,13 +367,25 @@ class SimpleSpeedTest:
             # 持续下载直到时间到
             while time.time() - start_time < duration:
                 try:
-                    response = requests.get(url, stream=True, timeout=5, headers=headers, allow_redirects=True)
+                    request_start = time.perf_counter()
+                    response = self._request('GET', url, stream=True, timeout=5, headers=headers, allow_redirects=True)
+                    if trace:
+                        tracer.add_span('download.request', request_start, time.perf_counter(), 'net',
+                                        {'status': response.status_code})
+                        first_chunk = True
                     response.raise_for_status()
                     
                     for chunk in response.iter_content(chunk_size=8192):
+                        if trace:
+                            chunk_start = time.perf_counter()
+                            if first_chunk:
+                                tracer.add_span('download.first_byte', request_start, chunk_start, 'net')
+                                first_chunk = False
                         if chunk:
                             downloaded += len(chunk)
-                            downloaded_chunks.append(chunk)  # 保存数据块
+                            if kept_bytes < self.UPLOAD_SEED_BYTES:
+                                downloaded_chunks.append(chunk)  # 保存数据块
+                                kept_bytes += len(chunk)
                             
                             # 每秒显示一次速度
                             current_time = time.time()
@@ -161,10 +394,20 @@ class SimpleSpeedTest:
                                 bytes_in_second = downloaded - last_downloaded
                                 speed_mbps = (bytes_in_second * 8) / (current_time - last_log_time) / 1_000_000
                                 avg_speed_mbps = (downloaded * 8) / elapsed / 1_000_000
-                                second_speeds.append(speed_mbps)  # 记录每秒速度
+                                second_speeds.append(speed_mbps, elapsed)  # 记录每秒速度
+                                if accumulator is not None:
+                                    accumulator.update(speed_mbps)
+                                if self._sample_callback:
+                                    self._sample_callback('download', speed_mbps, elapsed)
                                 self._log(f"[下载测试] 第{int(elapsed)}秒: {speed_mbps / 8:.2f} MB/s | 平均: {avg_speed_mbps / 8:.2f} MB/s")
                                 last_log_time = current_time
                                 last_downloaded = downloaded
+                        
+                        if trace:
+                            chunk_index += 1
+                            if chunk_index % chunk_stride == 0:
+                                tracer.add_span('download.chunk', chunk_start, time.perf_counter(), 'chunk',
+                                                {'bytes': len(chunk)})
                             
                         # 检查是否超时
                         elapsed = time.time() - start_time
@@ -176,9 +419,10 @@ class SimpleSpeedTest:
                         break
                         
                 except Exception as e:
-                    # 单次请求失败，继续尝试
+                    # 单次请求失败，稍等后继续尝试（避免断网时空转占满CPU）
                     if time.time() - start_time >= duration:
                         break
+                    time.sleep(0.2)
                     continue
             
             elapsed = time.time() - start_time
@@ -189,27 +433,31 @@ class SimpleSpeedTest:
                 
                 # 计算最终平均速度
                 speed_mbps = (downloaded * 8) / elapsed / 1_000_000
+                self._last_transfer_bytes = downloaded
+                self._last_transfer_elapsed = elapsed
                 self._log(f"[下载测试] 完成: 平均 {speed_mbps / 8:.2f} MB/s - 下载了 {downloaded / (1024*1024):.2f} MB，耗时 {elapsed:.1f} 秒")
                 return speed_mbps, second_speeds
             
         except Exception as e:
             self._log(f"[下载测试] 下载出错: {e}")
             
-        return 0.0, []
+        return 0.0, SampleSeries()
         
-    def _test_upload_single(self, duration: int = 10) -> tuple:
+    def _test_upload_single(self, duration: int = 10,
+                            accumulator: Optional[StreamingStats] = None) -> tuple:
         """
         单次上传测试（限时）
         
         Args:
             duration: 测试持续时间（秒）
+            accumulator: 每秒速度的流式累加器
             
         Returns:
-            tuple: (平均速度Mbps, 每秒速度列表)
+            tuple: (平均速度Mbps, 每秒速度序列)
         """
         chunk_size = 8192  # 8KB per chunk
         
-        for url, name in self.TEST_URLS['upload'][:1]:
+        for url, name in self._upload_urls[:1]:
             try:
                 self._log(f"[上传测试] 正在向 {name} 上传测试...")
                 
@@ -223,13 +471,19 @@ class SimpleSpeedTest:
                 start_time = time.time()
                 last_log_time = start_time
                 last_uploaded = 0
-                second_speeds = []  # 记录每秒的速度
+                second_speeds = SampleSeries(start_time=start_time)  # 记录每秒的速度
+                
+                trace = tracer.enabled
+                chunk_stride = tracer.chunk_stride
                 
                 def data_generator():
                     nonlocal uploaded_bytes, last_log_time, last_uploaded
                     test_start = time.time()
+                    chunk_index = 0
                     
                     while time.time() - test_start < duration:
+                        if trace:
+                            chunk_start = time.perf_counter()
                         # 使用下载的数据或生成新数据
                         if self._downloaded_data and len(self._downloaded_data) >= chunk_size:
                             chunk = self._downloaded_data[:chunk_size]
@@ -244,20 +498,32 @@ class SimpleSpeedTest:
                             bytes_in_second = uploaded_bytes - last_uploaded
                             speed_mbps = (bytes_in_second * 8) / (current_time - last_log_time) / 1_000_000
                             avg_speed_mbps = (uploaded_bytes * 8) / elapsed / 1_000_000
-                            second_speeds.append(speed_mbps)  # 记录每秒速度
+                            second_speeds.append(speed_mbps, elapsed)  # 记录每秒速度
+                            if accumulator is not None:
+                                accumulator.update(speed_mbps)
+                            if self._sample_callback:
+                                self._sample_callback('upload', speed_mbps, elapsed)
                             self._log(f"[上传测试] 第{int(elapsed)}秒: {speed_mbps / 8:.2f} MB/s | 平均: {avg_speed_mbps / 8:.2f} MB/s")
                             last_log_time = current_time
                             last_uploaded = uploaded_bytes
                         
+                        if trace:
+                            chunk_index += 1
+                            if chunk_index % chunk_stride == 0:
+                                tracer.add_span('upload.chunk', chunk_start, time.perf_counter(), 'chunk',
+                                                {'bytes': len(chunk)})
                         yield chunk
                 
                 # 发送请求
-                response = requests.post(url, data=data_generator(), timeout=duration + 5, headers=headers)
+                with tracer.span('upload.request', 'net', server=name):
+                    response = self._request('POST', url, data=data_generator(), timeout=duration + 5, headers=headers)
                 elapsed = time.time() - start_time
                 
                 if elapsed > 0 and uploaded_bytes > 0:
                     # 计算最终平均速度
                     speed_mbps = (uploaded_bytes * 8) / elapsed / 1_000_000
+                    self._last_transfer_bytes = uploaded_bytes
+                    self._last_transfer_elapsed = elapsed
                     self._log(f"[上传测试] {name} 完成: 平均 {speed_mbps / 8:.2f} MB/s - 上传了 {uploaded_bytes / (1024*1024):.2f} MB，耗时 {elapsed:.1f} 秒")
                     return speed_mbps, second_speeds
                     
@@ -266,12 +532,14 @@ class SimpleSpeedTest:
                 elapsed = time.time() - start_time
                 if elapsed > 0 and uploaded_bytes > 0:
                     speed_mbps = (uploaded_bytes * 8) / elapsed / 1_000_000
+                    self._last_transfer_bytes = uploaded_bytes
+                    self._last_transfer_elapsed = elapsed
                     self._log(f"[上传测试] {name} 限时完成: 平均 {speed_mbps / 8:.2f} MB/s - 上传了 {uploaded_bytes / (1024*1024):.2f} MB，耗时 {elapsed:.1f} 秒")
                     return speed_mbps, second_speeds
             except Exception as e:
                 self._log(f"[上传测试] {name} 测试失败: {e}")
                 
-        return 0.0, []
+        return 0.0, SampleSeries()
         
     def test_upload(self, test_duration: int = 10) -> Optional[float]:
         """
@@ -286,7 +554,11 @@ class SimpleSpeedTest:
         self._log(f"[上传测试] 开始测试上传速度（限时{test_duration}秒）...")
         
         # 单次测试即可，已经有每秒实时速度统计
-        speed, second_speeds = self._test_upload_single(test_duration)
+        self.upload_accumulator = StreamingStats()
+        cpu_monitor = CPUMonitor()
+        counter_sampler = InterfaceCounterSampler()
+        with tracer.span('upload', 'phase'), tracer.profile_thread('upload'), cpu_monitor, counter_sampler:
+            speed, second_speeds = self._test_upload_single(test_duration, self.upload_accumulator)
         
         if speed <= 0:
             self._log(f"[上传测试] 测试失败")
@@ -297,22 +569,15 @@ class SimpleSpeedTest:
             self._log(f"[上传测试] 清理下载数据...")
             self._downloaded_data = None
         
-        # 计算统计信息（基于每秒速度）
-        if second_speeds:
-            max_speed = max(second_speeds)
-            min_speed = min(second_speeds)
-            avg_speed = speed  # 总平均速度
-        else:
-            max_speed = min_speed = avg_speed = speed
+        # 计算统计信息（基于流式累加器，不再遍历每秒速度列表）
+        self.upload_stats = self._build_stats(speed, second_speeds, self.upload_accumulator, cpu_monitor)
+        self.upload_stats['interface_check'] = self._cross_check_interfaces('上传测试', 'upload', counter_sampler)
+        self.upload_speed = self.upload_stats['avg']
+        max_speed = self.upload_stats['max']
+        min_speed = self.upload_stats['min']
+        avg_speed = self.upload_stats['avg']
         
-        # 保存结果
-        self.upload_speed = round(avg_speed, 3)
-        self.upload_stats = {
-            'max': round(max_speed, 3),
-            'min': round(min_speed, 3),
-            'avg': round(avg_speed, 3),
-            'speeds': second_speeds
-        }
+        self._log_cpu('上传测试', self.upload_stats)
         
         # 显示最终统计
         self._log(f"[上传测试] ========== 上传速度统计 ==========")
@@ -333,19 +598,7 @@ class SimpleSpeedTest:
             Optional[Dict]: Ping结果字典
         """
         if hosts is None:
-            # 使用国内常用服务和CDN
-            hosts = [
-                ('www.baidu.com', '百度'),
-                ('www.qq.com', '腾讯'),
-                ('www.taobao.com', '淘宝'),
-                ('www.163.com', '网易'),
-                ('www.jd.com', '京东'),
-                ('www.aliyun.com', '阿里云'),
-                ('cloud.tencent.com', '腾讯云'),
-                ('www.huaweicloud.com', '华为云'),
-                ('www.bilibili.com', '哔哩哔哩'),
-                ('www.douyin.com', '抖音'),
-            ]
+            hosts = self._ping_hosts
         
         self._log(f"[Ping测试] 开始测试 {len(hosts)} 个网站的延迟...")
         
@@ -401,7 +654,8 @@ class SimpleSpeedTest:
         
         try:
             start_time = time.time()
-            response = requests.head(url, timeout=5, allow_redirects=True)
+            with tracer.span('ping.probe', 'net', host=host):
+                response = self._request('HEAD', url, timeout=5, allow_redirects=True)
             elapsed = (time.time() - start_time) * 1000  # 转换为毫秒
             
             if response.status_code < 500:  # 只要不是服务器错误就算成功
@@ -0,0 +1,328 @@
+# -*- coding: utf-8 -*-
+"""
+Soak Test
+长时间稳定性测试 - 按占空比周期性测速，记录吞吐量下降和断网时段，并定期写入检查点
+"""
+
+import os
+import json
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, Optional
+
+from ..utils.paths import get_data_dir
+from .simple_speedtest import SimpleSpeedTest
+from .streaming_stats import StreamingStats
+
+
+class SoakTest:
+    """长时间稳定性测试类"""
+
+    # 吞吐量分布直方图的桶上限(Mbps)，最后一个桶收集所有更大的值
+    HISTOGRAM_BOUNDS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+    # 保留明细的最近断网时段数，更早的只计入断网次数和总时长
+    MAX_OUTAGES = 100
+
+    def __init__(self, duration: float = 3600, cycle_seconds: float = 60,
+                 duty_cycle: float = 0.25, direction: str = 'download',
+                 outage_threshold: float = 0.1, checkpoint_path: Optional[str] = None,
+                 log_callback=None):
+        """
+        初始化稳定性测试
+
+        Args:
+            duration: 总运行时长（秒）
+            cycle_seconds: 每个周期的时长（秒）
+            duty_cycle: 占空比（每个周期中测速时间所占比例，0~1）
+            direction: 测试方向 ('download' 或 'upload')
+            outage_threshold: 低于该速度(Mbps)的采样视为断网
+            checkpoint_path: 检查点文件路径（JSON Lines），默认保存在应用数据目录下
+            log_callback: 日志回调函数
+        """
+        if not duration > 0:
+            raise ValueError("总运行时长必须大于0")
+        if not cycle_seconds > 0:
+            raise ValueError("周期时长必须大于0")
+        if not 0.0 < duty_cycle <= 1.0:
+            raise ValueError("占空比必须在0和1之间")
+        if direction not in ('download', 'upload'):
+            raise ValueError(f"不支持的测试方向: {direction}")
+
+        self.duration = duration
+        self.cycle_seconds = cycle_seconds
+        self.duty_cycle = duty_cycle
+        self.direction = direction
+        self.outage_threshold = outage_threshold
+        self._log_callback = log_callback
+
+        if checkpoint_path is None:
+            filename = f"soak-{datetime.now().strftime('%Y%m%d-%H%M%S')}.jsonl"
+            checkpoint_path = os.path.join(get_data_dir(), filename)
+        self.checkpoint_path = checkpoint_path
+
+        # 整个运行期间的统计（常数内存）
+        self._stats = StreamingStats()
+        self._histogram = [0] * (len(self.HISTOGRAM_BOUNDS) + 1)
+        self._outages: deque = deque(maxlen=self.MAX_OUTAGES)
+        self._outage_count = 0
+        self._outage_seconds = 0.0
+        self._outage_start: Optional[float] = None
+        self._last_sample_time: Optional[float] = None
+        self._interval_count = 0
+        self._active_seconds = 0.0
+
+        # 当前周期的统计
+        self._interval_stats: Optional[StreamingStats] = None
+
+        self._speedtest = SimpleSpeedTest(
+            log_callback=None,
+            keep_samples=False,
+            sample_callback=self._on_sample
+        )
+
+    def _log(self, message: str):
+        """输出日志"""
+        print(message)
+        if self._log_callback:
+            self._log_callback(message)
+
+    def _begin_outage(self, start: float):
+        """记录断网开始时间"""
+        if self._outage_start is None:
+            self._outage_start = start
+
+    def _end_outage(self, end: float):
+        """结束当前断网时段"""
+        if self._outage_start is not None:
+            start = self._outage_start
+            self._outage_start = None
+            if end > start:
+                outage = {
+                    'start': datetime.fromtimestamp(start).strftime('%Y-%m-%d %H:%M:%S'),
+                    'end': datetime.fromtimestamp(end).strftime('%Y-%m-%d %H:%M:%S'),
+                    'duration': round(end - start, 1)
+                }
+                self._outages.append(outage)
+                self._outage_count += 1
+                self._outage_seconds += end - start
+                self._log(f"[稳定性测试] 检测到断网: {outage['start']} ~ {outage['end']}（{outage['duration']} 秒）")
+
+    def _on_sample(self, direction: str, speed_mbps: float, elapsed: float):
+        """
+        每秒速度采样回调
+
+        Args:
+            direction: 测试方向
+            speed_mbps: 本秒速度(Mbps)
+            elapsed: 本次测速已运行的秒数
+        """
+        now = time.time()
+
+        # 两次采样间隔过长说明中间没有任何数据到达
+        if self._last_sample_time is not None and now - self._last_sample_time > 2.0:
+            self._begin_outage(self._last_sample_time)
+        self._last_sample_time = now
+
+        if speed_mbps < self.outage_threshold:
+            self._begin_outage(now - 1.0)
+        else:
+            self._end_outage(now - 1.0)
+
+        self._stats.update(speed_mbps)
+        if self._interval_stats is not None:
+            self._interval_stats.update(speed_mbps)
+
+        bucket = 0
+        while bucket < len(self.HISTOGRAM_BOUNDS) and speed_mbps >= self.HISTOGRAM_BOUNDS[bucket]:
+            bucket += 1
+        self._histogram[bucket] += 1
+
+    def _run_interval(self, active_seconds: float) -> Dict:
+        """
+        执行一个测速时段
+
+        Args:
+            active_seconds: 测速时长（秒）
+
+        Returns:
+            Dict: 本时段的聚合结果
+        """
+        self._interval_stats = StreamingStats()
+        start = time.time()
+        self._last_sample_time = start
+
+        duration = max(1, int(round(active_seconds)))
+        if self.direction == 'download':
+            speed = self._speedtest.test_download(duration)
+        else:
+            speed = self._speedtest.test_upload(duration)
+
+        end = time.time()
+        stats = self._speedtest.download_stats if self.direction == 'download' else self._speedtest.upload_stats
+        if speed is None:
+            # 整个时段都失败
+            self._begin_outage(start)
+        elif self._last_sample_time is not None and end - self._last_sample_time > 2.0:
+            # 时段末尾没有数据到达
+            self._begin_outage(self._last_sample_time)
+
+        snapshot = self._interval_stats.snapshot()
+        self._interval_stats = None
+        self._active_seconds += end - start
+
+        return {
+            'index': self._interval_count,
+            'start': datetime.fromtimestamp(start).strftime('%Y-%m-%d %H:%M:%S'),
+            'duration': round(end - start, 1),
+            'speed': speed,
+            'ok': speed is not None,
+            'samples': snapshot['count'],
+            'min': snapshot['min'],
+            'max': snapshot['max'],
+            'p50': snapshot['p50'],
+            'client_limited': speed is not None and stats.get('client_limited', False),
+        }
+
+    def _histogram_dict(self) -> Dict[str, int]:
+        """
+        生成直方图字典
+
+        Returns:
+            Dict[str, int]: {区间标签: 采样数}
+        """
+        labels = []
+        lower = 0
+        for upper in self.HISTOGRAM_BOUNDS:
+            labels.append(f"{lower}-{upper}")
+            lower = upper
+        labels.append(f"{lower}+")
+        return dict(zip(labels, self._histogram))
+
+    def get_summary(self) -> Dict:
+        """
+        获取当前汇总结果（运行中也可调用）
+
+        Returns:
+            Dict: 汇总结果，包含吞吐量分布、断网时段（只含最近MAX_OUTAGES个）、
+                  断网次数和总时长（整个运行期间）以及运行时间
+        """
+        outages = list(self._outages)
+        outage_count = self._outage_count
+        outage_seconds = self._outage_seconds
+        if self._outage_start is not None:
+            ongoing = time.time() - self._outage_start
+            outages.append({
+                'start': datetime.fromtimestamp(self._outage_start).strftime('%Y-%m-%d %H:%M:%S'),
+                'end': None,
+                'duration': round(ongoing, 1)
+            })
+            outage_count += 1
+            outage_seconds += ongoing
+
+        return {
+            'direction': self.direction,
+            'intervals': self._interval_count,
+            'active_seconds': round(self._active_seconds, 1),
+            'throughput': self._stats.snapshot(),
+            'histogram': self._histogram_dict(),
+            'outages': outages,
+            'outage_count': outage_count,
+            'outage_seconds': round(outage_seconds, 1),
+            'checkpoint': self.checkpoint_path,
+        }
+
+    def _write_checkpoint(self, record: Dict):
+        """
+        追加写入检查点（每行一个JSON对象，写入后立即落盘）
+
+        Args:
+            record: 检查点记录
+        """
+        try:
+            with open(self.checkpoint_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError as e:
+            self._log(f"[稳定性测试] 写入检查点失败: {e}")
+
+    def run(self, is_cancelled=None) -> Dict:
+        """
+        运行稳定性测试（阻塞直到达到总时长或被取消）
+
+        Args:
+            is_cancelled: 取消检查函数，返回True时提前结束
+
+        Returns:
+            Dict: 汇总结果
+        """
+        active_seconds = self.cycle_seconds * self.duty_cycle
+        started = time.time()
+        deadline = started + self.duration
+
+        self._log(f"[稳定性测试] 开始运行 {self.duration / 3600:.1f} 小时，"
+                  f"周期 {self.cycle_seconds:.0f} 秒，占空比 {self.duty_cycle:.0%}")
+        self._log(f"[稳定性测试] 检查点文件: {self.checkpoint_path}")
+
+        while time.time() < deadline:
+            if is_cancelled and is_cancelled():
+                self._log("[稳定性测试] 已取消")
+                break
+
+            cycle_start = time.time()
+            interval = self._run_interval(min(active_seconds, max(1.0, deadline - cycle_start)))
+            self._interval_count += 1
+
+            self._write_checkpoint({'type': 'interval', 'interval': interval, 'summary': self.get_summary()})
+            speed_text = f"{interval['speed'] / 8:.2f} MB/s" if interval['ok'] else '失败'
+            self._log(f"[稳定性测试] 第{self._interval_count}个周期: {speed_text}")
+
+            # 空闲等待到下一个周期（分段休眠以便及时响应取消）
+            next_cycle = min(cycle_start + self.cycle_seconds, deadline)
+            while time.time() < next_cycle:
+                if is_cancelled and is_cancelled():
+                    break
+                time.sleep(min(1.0, max(0.0, next_cycle - time.time())))
+
+        # 运行结束时断网仍在持续，以结束时间截止
+        self._end_outage(time.time())
+        self._speedtest.cleanup()
+
+        summary = self.get_summary()
+        summary['timestamp'] = datetime.fromtimestamp(started).strftime('%Y-%m-%d %H:%M:%S')
+        summary['elapsed'] = round(time.time() - started, 1)
+        self._write_checkpoint({'type': 'summary', 'summary': summary})
+
+        throughput = summary['throughput']
+        self._log(f"[稳定性测试] 运行结束: {summary['intervals']} 个周期，"
+                  f"断网 {summary['outage_count']} 次共 {summary['outage_seconds']} 秒")
+        if throughput['count']:
+            self._log(f"[稳定性测试] 吞吐量 P50/P90/P99: {throughput['p50'] / 8:.2f} / "
+                      f"{throughput['p90'] / 8:.2f} / {throughput['p99'] / 8:.2f} MB/s")
+        return summary
+
+    @staticmethod
+    def load_checkpoint(path: str) -> Optional[Dict]:
+        """
+        从检查点文件恢复最近一次的汇总结果（用于进程崩溃后查看已记录的数据）
+
+        Args:
+            path: 检查点文件路径
+
+        Returns:
+            Optional[Dict]: 最后一条完整记录中的汇总结果，文件无有效记录返回None
+        """
+        summary = None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # 崩溃时可能留下写了一半的最后一行
+                        continue
+                    summary = record.get('summary', summary)
+        except OSError as e:
+            print(f"[稳定性测试] 读取检查点失败: {e}")
+        return summary
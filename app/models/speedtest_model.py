@@ -4,21 +4,47 @@ SpeedTest Model
 网速测试数据模型
 """
 
+import os
+import socket
 import subprocess
 import platform
 from datetime import datetime
 from typing import Dict, Optional, List
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
 from .simple_speedtest import SimpleSpeedTest
+from .network_info_model import NetworkInfoModel
+from .udp_test import UDPTest, parse_server
+from .soak_test import SoakTest
+from .transport import happy_eyeballs, resolve
 
 
 class SpeedTestModel:
     """网速测试模型类（使用自实现的HTTP测速）"""
     
-    def __init__(self, log_callback=None):
-        """初始化模型"""
+    # UDP反射服务器地址的环境变量（host:port），未在udp_options中指定server时使用
+    UDP_SERVER_ENV = 'SPEEDTEST_UDP_SERVER'
+    # UDP测试的默认参数（见 UDPTest.run）
+    UDP_DEFAULTS = {'rate_mbps': 10.0, 'duration': 10.0, 'mode': 'cbr', 'steps': 5, 'payload': 1200, 'echo': True}
+    
+    def __init__(self, log_callback=None, sample_callback=None, speedtest_options: Optional[Dict] = None,
+                 udp_options: Optional[Dict] = None):
+        """
+        初始化模型
+        
+        Args:
+            log_callback: 日志回调函数
+            sample_callback: 每秒速度采样回调 sample_callback(direction, speed_mbps, elapsed)
+            speedtest_options: 传给SimpleSpeedTest的额外参数（如download_urls/upload_urls/ping_hosts）
+            udp_options: UDP测试参数，server为反射服务器地址(host:port)，其余见UDP_DEFAULTS
+        """
         self._simple_speedtest: SimpleSpeedTest = None
         self._last_results: Dict = {}
+        self._last_error: str = ''
         self._log_callback = log_callback  # 日志回调函数
+        self._sample_callback = sample_callback
+        self._speedtest_options = dict(speedtest_options or {})
+        self._udp_options = dict(udp_options or {})
         
     def _log(self, message: str):
         """输出日志"""
@@ -35,10 +61,18 @@ class SpeedTestModel:
         """
         try:
             self._log("[初始化] 使用HTTP直接测速模式")
-            self._simple_speedtest = SimpleSpeedTest(log_callback=self._log_callback)
+            self._simple_speedtest = SimpleSpeedTest(
+                log_callback=self._log_callback,
+                sample_callback=self._sample_callback,
+                **self._speedtest_options
+            )
+            if self._simple_speedtest.source_address:
+                self._log(f"[初始化] 绑定网卡: {self._simple_speedtest.interface or '-'}，"
+                          f"源地址: {self._simple_speedtest.source_address}")
             return True
         except Exception as e:
             self._log(f"[初始化] 初始化失败: {e}")
+            self._last_error = f"无法初始化网速测试服务: {e}"
             return False
             
     def get_servers(self, use_china_servers: bool = True) -> bool:
@@ -118,6 +152,561 @@ class SpeedTestModel:
         """
         return {}
         
+    def run_test(self, test_type: str, progress_callback=None,
+                 is_cancelled=None) -> Optional[Dict]:
+        """
+        执行一次完整测试并组装结果字典（供GUI工作线程和命令行共用）
+        
+        Args:
+            test_type: 测试类型 ('download', 'upload', 'both', 'ping', 'udp')
+            progress_callback: 进度回调函数，接收进度文本
+            is_cancelled: 取消检查函数，返回True时提前结束
+            
+        Returns:
+            Optional[Dict]: 测试结果字典，失败或取消返回None（失败原因见get_last_error）
+        """
+        def progress(message: str):
+            if progress_callback:
+                progress_callback(message)
+                
+        def cancelled() -> bool:
+            return bool(is_cancelled and is_cancelled())
+            
+        def fail(message: str) -> None:
+            self._last_error = message
+            return None
+            
+        self._last_error = ''
+        
+        if test_type == 'udp':
+            return self._run_udp_test(progress, cancelled)
+        
+        # 初始化
+        progress("正在初始化测试服务...")
+        if not self.initialize():
+            return fail(self._last_error or "无法初始化网速测试服务")
+            
+        if cancelled():
+            return None
+            
+        # 获取服务器列表
+        progress("正在获取服务器列表...")
+        if not self.get_servers():
+            return fail("无法获取服务器列表，请检查网络连接")
+            
+        if cancelled():
+            return None
+            
+        # 选择最佳服务器（HTTP模式直接准备就绪）
+        progress("准备开始测速...")
+        server_info = self.select_best_server()
+        if server_info is None:
+            return fail("无法找到合适的测试服务器")
+            
+        # HTTP模式返回空字典表示准备就绪
+        server_name = server_info.get('sponsor', 'HTTP直接测速')
+        server_country = server_info.get('country', '国内CDN')
+        progress(f"测速模式: {server_name} ({server_country})")
+        
+        if cancelled():
+            return None
+            
+        # 执行测试
+        result = {
+            'test_type': test_type,
+            'server': server_info,
+            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+        if self._simple_speedtest.interface:
+            result['interface'] = self._simple_speedtest.interface
+        if self._simple_speedtest.source_address:
+            result['source_address'] = self._simple_speedtest.source_address
+        if self._simple_speedtest.proxy_mode != 'env':
+            result['proxy'] = self._simple_speedtest.describe_proxy()
+        
+        if test_type in ('download', 'both'):
+            progress("正在测试下载速度...")
+            download_speed = self.test_download()
+            if download_speed is None:
+                return fail("下载速度测试失败")
+            result['download'] = download_speed
+            # 添加下载统计信息
+            result['download_stats'] = self._simple_speedtest.download_stats
+            
+            if cancelled():
+                return None
+                
+        if test_type in ('upload', 'both'):
+            progress("正在测试上传速度...")
+            upload_speed = self.test_upload()
+            if upload_speed is None:
+                return fail("上传速度测试失败")
+            result['upload'] = upload_speed
+            # 添加上传统计信息
+            result['upload_stats'] = self._simple_speedtest.upload_stats
+            
+            if cancelled():
+                return None
+                
+        if test_type == 'ping':
+            progress("正在测试多个国内服务器的Ping...")
+            ping_results = self.ping_multiple_hosts()
+            if ping_results is None:
+                return fail("Ping测试失败")
+            result['ping'] = ping_results['average']
+            result['ping_min'] = ping_results['min']
+            result['ping_max'] = ping_results['max']
+            result['ping_details'] = ping_results['results']
+            result['ping_success_rate'] = f"{ping_results['success_count']}/{ping_results['total_count']}"
+            
+        # 任一方向受客户端CPU限制时整体标记
+        if test_type in ('download', 'upload', 'both'):
+            result['client_limited'] = any(
+                result.get(key, {}).get('client_limited', False) for key in ('download_stats', 'upload_stats'))
+            # 网卡计数器显示测试期间存在其他流量
+            result['background_traffic'] = any(
+                result.get(key, {}).get('interface_check', {}).get('background_traffic', False)
+                for key in ('download_stats', 'upload_stats'))
+            
+        self._last_results = result
+        return result
+        
+    def _run_udp_test(self, progress, cancelled) -> Optional[Dict]:
+        """
+        执行UDP测试（需要对端运行 app.services.udp_reflector）
+        
+        Args:
+            progress: 进度回调
+            cancelled: 取消检查函数
+            
+        Returns:
+            Optional[Dict]: 测试结果，UDP相关指标在'udp'字段中；失败或取消返回None
+        """
+        options = dict(self.UDP_DEFAULTS)
+        options.update(self._udp_options)
+        server = options.pop('server', None) or os.environ.get(self.UDP_SERVER_ENV)
+        if not server:
+            self._last_error = f"未配置UDP反射服务器（设置环境变量{self.UDP_SERVER_ENV}=主机:端口）"
+            return None
+        try:
+            host, port = parse_server(server)
+            udp_result = UDPTest(host, port, log_callback=self._log_callback).run(
+                cancelled=cancelled, progress=progress, **options)
+        except ValueError as e:
+            self._last_error = f"UDP测试参数无效: {e}"
+            return None
+        if cancelled():
+            return None
+        if udp_result is None:
+            self._last_error = f"无法连接UDP反射服务器 {server}"
+            return None
+        if not udp_result['report_received'] and not udp_result.get('rtt_avg_ms'):
+            self._last_error = f"UDP反射服务器 {server} 无响应"
+            return None
+        
+        summary = f"[UDP测试] 发送 {udp_result['offered_mbps']} Mbps"
+        if udp_result['report_received']:
+            summary += (f"，到达 {udp_result['achieved_mbps']} Mbps，丢包 {udp_result['loss_percent']}%，"
+                        f"抖动 {udp_result['jitter_ms']} ms，乱序 {udp_result['reordered']}")
+        self._log(summary)
+        
+        result = {
+            'test_type': 'udp',
+            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'udp': udp_result,
+        }
+        self._last_results = result
+        return result
+        
+    def run_soak(self, duration: float = 3600, cycle_seconds: float = 60,
+                 duty_cycle: float = 0.25, direction: str = 'download',
+                 checkpoint_path: Optional[str] = None, is_cancelled=None) -> Optional[Dict]:
+        """
+        执行长时间稳定性测试
+        
+        Args:
+            duration: 总运行时长（秒）
+            cycle_seconds: 每个周期的时长（秒）
+            duty_cycle: 占空比（每个周期中测速时间所占比例）
+            direction: 测试方向 ('download' 或 'upload')
+            checkpoint_path: 检查点文件路径，默认保存在应用数据目录下
+            is_cancelled: 取消检查函数，返回True时提前结束
+            
+        Returns:
+            Optional[Dict]: 汇总结果（吞吐量分布、断网时段等），失败返回None
+        """
+        self._last_error = ''
+        try:
+            soak = SoakTest(
+                duration=duration,
+                cycle_seconds=cycle_seconds,
+                duty_cycle=duty_cycle,
+                direction=direction,
+                checkpoint_path=checkpoint_path,
+                log_callback=self._log_callback
+            )
+        except ValueError as e:
+            self._last_error = f"稳定性测试参数错误: {e}"
+            return None
+            
+        summary = soak.run(is_cancelled=is_cancelled)
+        result = {
+            'test_type': 'soak',
+            'timestamp': summary['timestamp'],
+            'soak': summary
+        }
+        self._last_results = result
+        return result
+        
+    def _test_family(self, family: str, test_duration: int, progress, cancelled) -> Dict:
+        """
+        强制使用一个地址族完成下载、上传和延迟测试
+        
+        Args:
+            family: 'ipv4' 或 'ipv6'
+            test_duration: 下载/上传测试时长（秒）
+            progress: 进度回调
+            cancelled: 取消检查函数
+            
+        Returns:
+            Dict: 该地址族的测试结果，无法使用时包含error字段
+        """
+        label = family.upper().replace('V', 'v')
+        host, port = self._first_download_target()
+        try:
+            addresses = resolve(host, port, family)
+        except socket.gaierror as e:
+            self._log(f"[双栈测试] {host} 没有{label}地址，跳过{label}测试")
+            return {'available': False, 'error': f'没有{label}地址: {e}'}
+        
+        speedtest = SimpleSpeedTest(
+            log_callback=self._log_callback,
+            sample_callback=self._sample_callback,
+            address_family=family,
+            **self._speedtest_options
+        )
+        entry = {'available': True, 'address': addresses[0]}
+        self._measure(speedtest, label, test_duration, progress, cancelled, entry)
+        return entry
+        
+    @staticmethod
+    def _measure(speedtest: SimpleSpeedTest, label: str, test_duration: int, progress, cancelled,
+                 entry: Dict) -> Dict:
+        """
+        用一个测速实例依次完成下载、上传和延迟测试，结果写入entry（完成后清理测速实例）
+        
+        Args:
+            speedtest: 测速实例
+            label: 进度文本中的名称
+            test_duration: 下载/上传测试时长（秒）
+            progress: 进度回调
+            cancelled: 取消检查函数
+            entry: 结果字典
+            
+        Returns:
+            Dict: entry
+        """
+        try:
+            progress(f"正在通过{label}测试下载速度...")
+            entry['download'] = speedtest.test_download(test_duration)
+            if entry['download'] is not None:
+                entry['download_stats'] = speedtest.download_stats
+            if cancelled():
+                return entry
+            
+            progress(f"正在通过{label}测试上传速度...")
+            entry['upload'] = speedtest.test_upload(test_duration)
+            if entry['upload'] is not None:
+                entry['upload_stats'] = speedtest.upload_stats
+            if cancelled():
+                return entry
+            
+            progress(f"正在通过{label}测试延迟...")
+            ping_results = speedtest.test_ping()
+            if ping_results:
+                entry['ping'] = ping_results['average']
+                entry['ping_min'] = ping_results['min']
+                entry['ping_max'] = ping_results['max']
+                entry['ping_success_rate'] = f"{ping_results['success_count']}/{ping_results['total_count']}"
+            else:
+                entry['ping'] = None
+        finally:
+            speedtest.cleanup()
+        return entry
+        
+    def _first_download_target(self) -> tuple:
+        """
+        第一个下载测试地址的主机和端口（双栈测试的地址解析和连接竞速都针对它）
+        
+        Returns:
+            tuple: (主机, 端口)
+        """
+        urls = self._speedtest_options.get('download_urls') or SimpleSpeedTest.TEST_URLS['download']
+        parts = urlsplit(urls[0][0])
+        return parts.hostname, parts.port or (443 if parts.scheme == 'https' else 80)
+        
+    def run_dual_stack(self, test_duration: int = 10, progress_callback=None,
+                       is_cancelled=None) -> Optional[Dict]:
+        """
+        IPv4/IPv6双栈对比测试：分别强制使用两个地址族完成下载、上传和延迟测试，
+        并对测速主机做一次Happy Eyeballs连接竞速
+        
+        Args:
+            test_duration: 每项下载/上传测试的时长（秒）
+            progress_callback: 进度回调函数，接收进度文本
+            is_cancelled: 取消检查函数，返回True时提前结束
+            
+        Returns:
+            Optional[Dict]: 两个地址族并列的结果，两个地址族都不可用或取消时返回None
+        """
+        def progress(message: str):
+            if progress_callback:
+                progress_callback(message)
+                
+        def cancelled() -> bool:
+            return bool(is_cancelled and is_cancelled())
+            
+        self._last_error = ''
+        result = {
+            'test_type': 'dual_stack',
+            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+        
+        for family in ('ipv4', 'ipv6'):
+            result[family] = self._test_family(family, test_duration, progress, cancelled)
+            if cancelled():
+                return None
+        
+        if not result['ipv4']['available'] and not result['ipv6']['available']:
+            self._last_error = "测速主机没有可用的IPv4或IPv6地址"
+            return None
+        
+        host, port = self._first_download_target()
+        progress("正在进行Happy Eyeballs连接竞速...")
+        result['happy_eyeballs'] = happy_eyeballs(host, port)
+        winner = result['happy_eyeballs'].get('winner')
+        self._log(f"[双栈测试] 连接竞速: {winner.upper() if winner else '两个地址族都无法连接'}")
+        
+        # IPv6相对IPv4的差异（速度为比值，延迟为差值）
+        comparison = {}
+        for key in ('download', 'upload'):
+            v4, v6 = result['ipv4'].get(key), result['ipv6'].get(key)
+            if v4 and v6:
+                comparison[f'{key}_ratio'] = round(v6 / v4, 3)
+        v4_ping, v6_ping = result['ipv4'].get('ping'), result['ipv6'].get('ping')
+        if v4_ping is not None and v6_ping is not None:
+            comparison['ping_diff_ms'] = round(v6_ping - v4_ping, 1)
+        result['comparison'] = comparison
+        
+        self._last_results = result
+        return result
+        
+    def run_proxy_comparison(self, test_duration: int = 5, proxy: str = 'system', progress_callback=None,
+                             is_cancelled=None) -> Optional[Dict]:
+        """
+        直连/代理对比测试：同样的短时测试先直连进行一次，再通过代理进行一次，量化代理带来的开销
+        
+        Args:
+            test_duration: 每项下载/上传测试的时长（秒）
+            proxy: 对比的代理，'system'使用系统代理设置，其他值作为代理地址
+            progress_callback: 进度回调函数，接收进度文本
+            is_cancelled: 取消检查函数，返回True时提前结束
+            
+        Returns:
+            Optional[Dict]: 直连和代理并列的结果，代理不可用或取消时返回None
+        """
+        def progress(message: str):
+            if progress_callback:
+                progress_callback(message)
+                
+        def cancelled() -> bool:
+            return bool(is_cancelled and is_cancelled())
+            
+        self._last_error = ''
+        options = dict(self._speedtest_options)
+        options.pop('proxy', None)
+        try:
+            proxied = SimpleSpeedTest(log_callback=self._log_callback, sample_callback=self._sample_callback,
+                                      proxy=proxy, **options)
+        except ValueError as e:
+            self._last_error = str(e)
+            return None
+        if not proxied.proxies:
+            proxied.cleanup()
+            self._last_error = "系统未配置代理，无法对比"
+            return None
+        direct = SimpleSpeedTest(log_callback=self._log_callback, sample_callback=self._sample_callback,
+                                 proxy='direct', **options)
+        
+        result = {
+            'test_type': 'proxy_comparison',
+            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        }
+        self._log(f"[代理对比] 代理: {proxied.describe_proxy()['url']}")
+        result['direct'] = self._measure(direct, '直连', test_duration, progress, cancelled,
+                                         direct.describe_proxy())
+        if cancelled():
+            proxied.cleanup()
+            return None
+        result['proxied'] = self._measure(proxied, '代理', test_duration, progress, cancelled,
+                                          proxied.describe_proxy())
+        if cancelled():
+            return None
+        
+        # 代理相对直连的开销（速度为比值，延迟为差值）
+        comparison = {}
+        for key in ('download', 'upload'):
+            direct_speed, proxied_speed = result['direct'].get(key), result['proxied'].get(key)
+            if direct_speed and proxied_speed:
+                comparison[f'{key}_ratio'] = round(proxied_speed / direct_speed, 3)
+        direct_ping, proxied_ping = result['direct'].get('ping'), result['proxied'].get('ping')
+        if direct_ping is not None and proxied_ping is not None:
+            comparison['ping_overhead_ms'] = round(proxied_ping - direct_ping, 1)
+        result['comparison'] = comparison
+        self._log(f"[代理对比] 结果: {comparison or '无法比较（至少一方测试失败）'}")
+        
+        self._last_results = result
+        return result
+        
+    def _interface_speedtest(self, interface: Dict) -> SimpleSpeedTest:
+        """
+        创建绑定到指定网卡的测速实例
+        
+        Args:
+            interface: get_testable_interfaces()返回的网卡信息
+            
+        Returns:
+            SimpleSpeedTest: 测速实例
+        """
+        options = dict(self._speedtest_options)
+        options.update(source_address=interface['address'], interface=interface['name'])
+        return SimpleSpeedTest(log_callback=self._log_callback, sample_callback=self._sample_callback,
+                               **options)
+        
+    def _ping_interface(self, interface: Dict) -> Dict:
+        """
+        通过一个网卡测试延迟（在线程池中运行）
+        
+        Args:
+            interface: get_testable_interfaces()返回的网卡信息
+            
+        Returns:
+            Dict: 延迟结果，全部失败时ping为None
+        """
+        speedtest = self._interface_speedtest(interface)
+        try:
+            ping_results = speedtest.test_ping()
+        finally:
+            speedtest.cleanup()
+        if not ping_results:
+            return {'ping': None}
+        return {
+            'ping': ping_results['average'],
+            'ping_min': ping_results['min'],
+            'ping_max': ping_results['max'],
+            'ping_success_rate': f"{ping_results['success_count']}/{ping_results['total_count']}",
+        }
+        
+    def run_per_interface(self, test_duration: int = 10, interfaces: Optional[List[str]] = None,
+                          bandwidth: bool = True, progress_callback=None,
+                          is_cancelled=None) -> Optional[Dict]:
+        """
+        逐个网卡对比测试：所有网卡的延迟测试并行进行，下载/上传测试逐个网卡依次进行
+        （同时测带宽会互相争抢上游链路，结果没有可比性）
+        
+        Args:
+            test_duration: 每项下载/上传测试的时长（秒）
+            interfaces: 要测试的网卡名称，None表示所有已启用且有可用地址的网卡
+            bandwidth: 是否测试下载/上传，False时只测延迟
+            progress_callback: 进度回调函数，接收进度文本
+            is_cancelled: 取消检查函数，返回True时提前结束
+            
+        Returns:
+            Optional[Dict]: 各网卡并列的结果，没有可测试的网卡或取消时返回None
+        """
+        def progress(message: str):
+            if progress_callback:
+                progress_callback(message)
+                
+        def cancelled() -> bool:
+            return bool(is_cancelled and is_cancelled())
+            
+        self._last_error = ''
+        candidates = NetworkInfoModel().get_testable_interfaces()
+        if interfaces:
+            available = {c['name'] for c in candidates}
+            for name in (name for name in interfaces if name not in available):
+                self._log(f"[多网卡测试] 网卡 {name} 不存在、未启用或没有可用的IP地址，已跳过")
+            candidates = [c for c in candidates if c['name'] in interfaces]
+        if not candidates:
+            self._last_error = "没有可以测试的网卡"
+            return None
+        
+        names = ', '.join(f"{c['name']}({c['address']})" for c in candidates)
+        self._log(f"[多网卡测试] 测试网卡: {names}")
+        result = {
+            'test_type': 'per_interface',
+            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'interfaces': {c['name']: dict(c) for c in candidates},
+        }
+        
+        progress(f"正在并行测试 {len(candidates)} 个网卡的延迟...")
+        with ThreadPoolExecutor(max_workers=len(candidates), thread_name_prefix='iface-ping') as executor:
+            futures = {c['name']: executor.submit(self._ping_interface, c) for c in candidates}
+            for name, future in futures.items():
+                try:
+                    result['interfaces'][name].update(future.result())
+                except Exception as e:
+                    self._log(f"[多网卡测试] {name} 延迟测试失败: {e}")
+                    result['interfaces'][name].update(ping=None, error=str(e))
+        if cancelled():
+            return None
+        
+        if bandwidth:
+            for interface in candidates:
+                entry = result['interfaces'][interface['name']]
+                if entry.get('ping') is None:
+                    self._log(f"[多网卡测试] {interface['name']} 无法连通，跳过带宽测试")
+                    continue
+                speedtest = self._interface_speedtest(interface)
+                try:
+                    progress(f"正在通过 {interface['name']} 测试下载速度...")
+                    entry['download'] = speedtest.test_download(test_duration)
+                    if entry['download'] is not None:
+                        entry['download_stats'] = speedtest.download_stats
+                    if cancelled():
+                        return None
+                    progress(f"正在通过 {interface['name']} 测试上传速度...")
+                    entry['upload'] = speedtest.test_upload(test_duration)
+                    if entry['upload'] is not None:
+                        entry['upload_stats'] = speedtest.upload_stats
+                    if cancelled():
+                        return None
+                finally:
+                    speedtest.cleanup()
+        
+        # 各项指标最好的网卡
+        entries = result['interfaces']
+        comparison = {}
+        for key, label, pick in (('download', 'fastest_download', max), ('upload', 'fastest_upload', max),
+                                  ('ping', 'lowest_ping', min)):
+            measured = {name: entry[key] for name, entry in entries.items() if entry.get(key) is not None}
+            if measured:
+                comparison[label] = pick(measured, key=measured.get)
+        result['comparison'] = comparison
+        
+        self._last_results = result
+        return result
+        
+    def get_last_error(self) -> str:
+        """
+        获取最后一次测试的失败原因
+        
+        Returns:
+            str: 失败原因，成功时为空字符串
+        """
+        return self._last_error
+        
     def get_last_results(self) -> Dict:
         """
         获取最后的测试结果
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""
+Streaming Statistics
+在线统计累加器 - 常数内存计算均值/方差/最值/分位数
+"""
+
+import math
+import threading
+from typing import Dict, Iterable, Optional, Sequence
+
+
+class P2Quantile:
+    """
+    P²分位数估计器（Jain & Chlamtac, 1985）
+
+    只保存5个标记点，每次更新O(1)，无需保存历史样本。
+    样本数不超过5个时返回精确值。
+    """
+
+    __slots__ = ('p', '_heights', '_positions', '_desired', '_increments', '_count')
+
+    def __init__(self, p: float):
+        """
+        初始化估计器
+
+        Args:
+            p: 目标分位（0~1之间，例如0.9表示P90）
+        """
+        if not 0.0 < p < 1.0:
+            raise ValueError("分位数必须在0和1之间")
+        self.p = p
+        self._heights = []
+        self._positions = [1, 2, 3, 4, 5]
+        self._desired = [1.0, 1.0 + 2.0 * p, 1.0 + 4.0 * p, 3.0 + 2.0 * p, 5.0]
+        self._increments = [0.0, p / 2.0, p, (1.0 + p) / 2.0, 1.0]
+        self._count = 0
+
+    def update(self, value: float):
+        """
+        加入一个样本
+
+        Args:
+            value: 样本值
+        """
+        self._count += 1
+        heights = self._heights
+
+        if self._count <= 5:
+            heights.append(value)
+            heights.sort()
+            return
+
+        # 找到样本所在的区间，必要时扩展端点
+        if value < heights[0]:
+            heights[0] = value
+            k = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            k = 3
+        else:
+            k = 0
+            while k < 3 and value >= heights[k + 1]:
+                k += 1
+
+        positions = self._positions
+        for i in range(k + 1, 5):
+            positions[i] += 1
+        for i in range(5):
+            self._desired[i] += self._increments[i]
+
+        # 调整中间3个标记点的高度
+        for i in range(1, 4):
+            delta = self._desired[i] - positions[i]
+            if ((delta >= 1 and positions[i + 1] - positions[i] > 1) or
+                    (delta <= -1 and positions[i - 1] - positions[i] < -1)):
+                step = 1 if delta > 0 else -1
+                height = self._parabolic(i, step)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    height = self._linear(i, step)
+                heights[i] = height
+                positions[i] += step
+
+    def _parabolic(self, i: int, step: int) -> float:
+        """分段抛物线插值"""
+        n = self._positions
+        q = self._heights
+        return q[i] + step / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + step) * (q[i + 1] - q[i]) / (n[i + 1] - n[i]) +
+            (n[i + 1] - n[i] - step) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def _linear(self, i: int, step: int) -> float:
+        """线性插值（抛物线结果越界时使用）"""
+        n = self._positions
+        q = self._heights
+        return q[i] + step * (q[i + step] - q[i]) / (n[i + step] - n[i])
+
+    @property
+    def value(self) -> Optional[float]:
+        """当前分位数估计值，无样本时为None"""
+        if not self._count:
+            return None
+        if self._count <= 5:
+            # 样本不足时直接按最近秩取精确值
+            index = min(len(self._heights) - 1, max(0, math.ceil(self.p * len(self._heights)) - 1))
+            return self._heights[index]
+        return self._heights[2]
+
+
+class StreamingStats:
+    """
+    流式统计累加器
+
+    使用Welford算法计算均值和方差，配合P²估计器计算分位数，
+    内存占用与样本数无关，可以在测试进行中随时读取统计快照（线程安全）。
+    """
+
+    DEFAULT_QUANTILES = (0.5, 0.9, 0.95, 0.99)
+
+    def __init__(self, quantiles: Sequence[float] = DEFAULT_QUANTILES):
+        """
+        初始化累加器
+
+        Args:
+            quantiles: 需要跟踪的分位数列表
+        """
+        self._lock = threading.Lock()
+        self._quantiles = {q: P2Quantile(q) for q in quantiles}
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.total = 0.0
+
+    def update(self, value: float):
+        """
+        加入一个样本
+
+        Args:
+            value: 样本值
+        """
+        with self._lock:
+            self.count += 1
+            self.total += value
+            delta = value - self.mean
+            self.mean += delta / self.count
+            self._m2 += delta * (value - self.mean)
+
+            if self.min is None or value < self.min:
+                self.min = value
+            if self.max is None or value > self.max:
+                self.max = value
+
+            for estimator in self._quantiles.values():
+                estimator.update(value)
+
+    def update_many(self, values: Iterable[float]):
+        """
+        批量加入样本
+
+        Args:
+            values: 样本序列
+        """
+        for value in values:
+            self.update(value)
+
+    @property
+    def variance(self) -> float:
+        """样本方差（n-1），样本不足2个时为0"""
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def stddev(self) -> float:
+        """样本标准差"""
+        return math.sqrt(self.variance)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        获取分位数估计值
+
+        Args:
+            q: 分位数（必须是初始化时指定的分位数之一）
+
+        Returns:
+            Optional[float]: 估计值，无样本时为None
+        """
+        with self._lock:
+            estimator = self._quantiles.get(q)
+            if estimator is None:
+                raise KeyError(f"未跟踪的分位数: {q}")
+            return estimator.value
+
+    def snapshot(self, ndigits: int = 3) -> Dict:
+        """
+        获取当前统计快照
+
+        Args:
+            ndigits: 保留的小数位数
+
+        Returns:
+            Dict: 包含count/mean/stddev/min/max以及p50/p90等分位数的字典
+        """
+        def rounded(value):
+            return round(value, ndigits) if value is not None else None
+
+        with self._lock:
+            variance = self._m2 / (self.count - 1) if self.count > 1 else 0.0
+            snapshot = {
+                'count': self.count,
+                'mean': rounded(self.mean) if self.count else None,
+                'stddev': rounded(math.sqrt(variance)) if self.count else None,
+                'min': rounded(self.min),
+                'max': rounded(self.max),
+            }
+            for q, estimator in self._quantiles.items():
+                snapshot[f'p{q * 100:g}'] = rounded(estimator.value)
+        return snapshot
@@ -0,0 +1,481 @@
+# -*- coding: utf-8 -*-
+"""
+Tracer
+性能追踪 - 低开销的内存计时区间记录、Chrome Trace导出和采样分析器
+
+默认关闭，关闭时 span() 返回共享的空对象，热路径只多一次属性判断。
+开启方式:
+    - 代码中调用 tracer.enable()
+    - 命令行 python -m app.cli --trace trace.json [--profile] download
+    - 图形界面设置环境变量 SPEEDTEST_TRACE=trace.json（SPEEDTEST_PROFILE=1 开启采样分析），退出时自动导出
+
+导出的JSON可在 chrome://tracing 或 https://ui.perfetto.dev 中打开。
+"""
+
+import os
+import sys
+import json
+import time
+import atexit
+import threading
+from collections import deque, Counter
+from typing import Dict, List, Optional, Tuple
+
+
+def _frame_label(code) -> str:
+    """生成栈帧的显示名称"""
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    采样分析器
+
+    在后台线程中按固定间隔读取目标线程的调用栈（sys._current_frames），
+    不修改目标线程的执行，开销只与采样频率有关。
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.005, max_samples: int = 100000,
+                 thread_name: str = ''):
+        """
+        初始化分析器
+
+        Args:
+            thread_id: 目标线程ID（threading.get_ident()）
+            interval: 采样间隔（秒）
+            max_samples: 最多保留的带时间戳采样数（汇总计数不受限制）
+            thread_name: 目标线程名称
+        """
+        self.thread_id = thread_id
+        self.thread_name = thread_name
+        self.interval = interval
+        self.counts: Counter = Counter()
+        self.samples: deque = deque(maxlen=max_samples)  # (时间戳, 调用栈)
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """开始采样"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='SamplingProfiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止采样"""
+        self._stop_event.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def _run(self):
+        """采样线程主循环"""
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                # 目标线程已结束
+                break
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            stack = tuple(reversed(stack))  # 从最外层到最内层
+            self.counts[stack] += 1
+            self.samples.append((time.perf_counter(), stack))
+
+    @property
+    def total(self) -> int:
+        """采样总数"""
+        return sum(self.counts.values())
+
+    def collapsed(self) -> str:
+        """
+        生成折叠栈文本（可直接用于flamegraph.pl或speedscope）
+
+        Returns:
+            str: 每行 "外层;...;内层 次数"
+        """
+        return ''.join(f"{';'.join(stack)} {count}\n" for stack, count in self.counts.most_common())
+
+    def top(self, limit: int = 20) -> List[Tuple[str, int, float]]:
+        """
+        统计自身耗时最多的函数
+
+        Args:
+            limit: 返回条数
+
+        Returns:
+            List[Tuple[str, int, float]]: [(函数, 采样次数, 占比)]
+        """
+        total = self.total
+        self_counts: Counter = Counter()
+        for stack, count in self.counts.items():
+            if stack:
+                self_counts[stack[-1]] += count
+        return [(name, count, round(count / total, 4)) for name, count in self_counts.most_common(limit)]
+
+
+class _NullSpan:
+    """追踪关闭时使用的空区间"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **args):
+        """忽略附加参数"""
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """计时区间（with语句）"""
+
+    __slots__ = ('_tracer', '_name', '_cat', '_args', '_start')
+
+    def __init__(self, tracer: 'Tracer', name: str, cat: str, args: Dict):
+        self._tracer = tracer
+        self._name = name
+        self._cat = cat
+        self._args = args
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self._args['error'] = exc_type.__name__
+        self._tracer.add_span(self._name, self._start, time.perf_counter(), self._cat, self._args)
+        return False
+
+    def set(self, **args):
+        """附加参数（如传输字节数）"""
+        self._args.update(args)
+
+
+class Tracer:
+    """
+    内存计时追踪器
+
+    事件保存在定长deque中（超出上限时丢弃最早的事件），
+    append在CPython中是原子操作，多线程记录无需加锁。
+    """
+
+    def __init__(self, max_events: int = 200000):
+        """
+        初始化追踪器
+
+        Args:
+            max_events: 最多保留的事件数
+        """
+        self.enabled = False
+        self.profile_enabled = False
+        self.profile_interval = 0.005
+        # 每N个数据块记录一次块处理区间，控制高吞吐时的事件量
+        self.chunk_stride = 16
+        self._events: deque = deque(maxlen=max_events)
+        self._thread_names: Dict[int, str] = {}
+        self._profilers: List[SamplingProfiler] = []
+        self._epoch = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def enable(self, profile: bool = False, profile_interval: float = 0.005, chunk_stride: int = 16):
+        """
+        开启追踪
+
+        Args:
+            profile: 是否在测量线程上运行采样分析器
+            profile_interval: 采样间隔（秒）
+            chunk_stride: 每N个数据块记录一次块处理区间（1表示每块都记录）
+        """
+        self.profile_enabled = profile
+        self.profile_interval = profile_interval
+        self.chunk_stride = max(1, int(chunk_stride))
+        self.enabled = True
+        _instrument_urllib3()
+
+    def disable(self):
+        """关闭追踪（已记录的事件保留）"""
+        self.enabled = False
+        self.profile_enabled = False
+
+    def clear(self):
+        """清空已记录的事件和采样"""
+        self._events.clear()
+        with self._lock:
+            self._profilers = []
+        self._epoch = time.perf_counter()
+
+    def _remember_thread(self) -> int:
+        """记录当前线程名称并返回线程ID"""
+        tid = threading.get_ident()
+        if tid not in self._thread_names:
+            self._thread_names[tid] = threading.current_thread().name
+        return tid
+
+    def span(self, name: str, cat: str = 'app', **args):
+        """
+        创建计时区间
+
+        Args:
+            name: 区间名称
+            cat: 分类
+            **args: 附加参数
+
+        Returns:
+            with语句使用的区间对象（追踪关闭时为空对象）
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, cat, args)
+
+    def add_span(self, name: str, start: float, end: float, cat: str = 'app', args: Optional[Dict] = None):
+        """
+        直接记录一个已完成的区间（用于热路径中手动计时）
+
+        Args:
+            name: 区间名称
+            start: 开始时间（time.perf_counter()）
+            end: 结束时间（time.perf_counter()）
+            cat: 分类
+            args: 附加参数
+        """
+        if self.enabled:
+            self._events.append(('X', name, cat, start, end - start, self._remember_thread(), args))
+
+    def instant(self, name: str, cat: str = 'app', **args):
+        """
+        记录瞬时事件
+
+        Args:
+            name: 事件名称
+            cat: 分类
+            **args: 附加参数
+        """
+        if self.enabled:
+            self._events.append(('i', name, cat, time.perf_counter(), 0.0, self._remember_thread(), args))
+
+    def profile_thread(self, name: str = ''):
+        """
+        在当前线程上运行采样分析器（with语句，采样分析未开启时不做任何事）
+
+        Args:
+            name: 分析区间名称
+
+        Returns:
+            上下文管理器
+        """
+        if not (self.enabled and self.profile_enabled):
+            return _NULL_SPAN
+        return _ProfileScope(self, name)
+
+    def _add_profiler(self, profiler: SamplingProfiler):
+        """保存已完成的采样结果"""
+        with self._lock:
+            self._profilers.append(profiler)
+
+    @property
+    def event_count(self) -> int:
+        """已记录的事件数"""
+        return len(self._events)
+
+    def summary(self) -> Dict[str, Dict]:
+        """
+        按名称汇总区间耗时
+
+        Returns:
+            Dict[str, Dict]: {名称: {'count', 'total_ms', 'avg_ms', 'max_ms'}}
+        """
+        totals: Dict[str, List[float]] = {}
+        for phase, name, _cat, _start, duration, _tid, _args in list(self._events):
+            if phase != 'X':
+                continue
+            entry = totals.setdefault(name, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += duration
+            entry[2] = max(entry[2], duration)
+        return {
+            name: {
+                'count': count,
+                'total_ms': round(total * 1000, 3),
+                'avg_ms': round(total / count * 1000, 4),
+                'max_ms': round(peak * 1000, 3),
+            }
+            for name, (count, total, peak) in sorted(totals.items(), key=lambda item: -item[1][1])
+        }
+
+    def to_chrome_trace(self) -> Dict:
+        """
+        转换为Chrome Trace Event格式
+
+        Returns:
+            Dict: 可直接序列化为JSON的追踪数据
+        """
+        pid = os.getpid()
+        epoch = self._epoch
+
+        def us(value: float) -> float:
+            return round((value - epoch) * 1_000_000, 3)
+
+        events = []
+        for phase, name, cat, start, duration, tid, args in list(self._events):
+            event = {'name': name, 'cat': cat, 'ph': phase, 'ts': us(start), 'pid': pid, 'tid': tid}
+            if phase == 'X':
+                event['dur'] = round(duration * 1_000_000, 3)
+            else:
+                event['s'] = 't'
+            if args:
+                event['args'] = args
+            events.append(event)
+
+        thread_names = dict(self._thread_names)
+        stack_frames: Dict[str, Dict] = {}
+        samples = []
+        frame_ids: Dict[Tuple, str] = {}
+        with self._lock:
+            profilers = list(self._profilers)
+        for profiler in profilers:
+            thread_names.setdefault(profiler.thread_id, profiler.thread_name)
+            for timestamp, stack in profiler.samples:
+                parent = None
+                for depth in range(1, len(stack) + 1):
+                    key = stack[:depth]
+                    frame_id = frame_ids.get(key)
+                    if frame_id is None:
+                        frame_id = str(len(frame_ids) + 1)
+                        frame_ids[key] = frame_id
+                        frame = {'category': 'python', 'name': stack[depth - 1]}
+                        if parent:
+                            frame['parent'] = parent
+                        stack_frames[frame_id] = frame
+                    parent = frame_id
+                if parent:
+                    samples.append({'cpu': 0, 'tid': profiler.thread_id, 'ts': us(timestamp),
+                                    'name': 'cpu-sample', 'sf': parent, 'weight': 1})
+
+        for tid, name in thread_names.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}})
+
+        trace = {'traceEvents': events, 'displayTimeUnit': 'ms'}
+        if samples:
+            trace['stackFrames'] = stack_frames
+            trace['samples'] = samples
+        return trace
+
+    def export_chrome_trace(self, path: str) -> str:
+        """
+        导出为Chrome Trace JSON文件，开启了采样分析时同时导出折叠栈文件（path + '.collapsed'）
+
+        Args:
+            path: 输出文件路径
+
+        Returns:
+            str: 输出文件路径
+        """
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_chrome_trace(), f, ensure_ascii=False, default=str)
+
+        with self._lock:
+            profilers = list(self._profilers)
+        if profilers:
+            merged: Counter = Counter()
+            for profiler in profilers:
+                merged.update(profiler.counts)
+            with open(path + '.collapsed', 'w', encoding='utf-8') as f:
+                f.writelines(f"{';'.join(stack)} {count}\n" for stack, count in merged.most_common())
+        return path
+
+
+class _ProfileScope:
+    """在当前线程上运行采样分析器的上下文"""
+
+    __slots__ = ('_tracer', '_profiler', '_name', '_start')
+
+    def __init__(self, tracer: Tracer, name: str):
+        self._tracer = tracer
+        self._name = name
+        self._profiler = SamplingProfiler(threading.get_ident(), tracer.profile_interval,
+                                          thread_name=threading.current_thread().name)
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        self._profiler.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._profiler.stop()
+        self._tracer._add_profiler(self._profiler)
+        self._tracer.add_span(f'profile:{self._name}', self._start, time.perf_counter(), 'profiler',
+                              {'samples': self._profiler.total})
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_urllib3_instrumented = False
+
+
+def _instrument_urllib3():
+    """
+    为urllib3的连接建立过程记录 http.connect 区间（TCP+TLS握手）
+
+    只在第一次开启追踪时安装；追踪关闭后包装函数只多一次属性判断。
+    """
+    global _urllib3_instrumented
+    if _urllib3_instrumented:
+        return
+    try:
+        from urllib3.connection import HTTPConnection, HTTPSConnection
+    except ImportError:
+        return
+
+    def wrap(cls):
+        original_connect = cls.__dict__['connect']
+
+        def connect(self, *args, **kwargs):
+            if not tracer.enabled:
+                return original_connect(self, *args, **kwargs)
+            with tracer.span('http.connect', 'net', host=self.host, port=self.port):
+                return original_connect(self, *args, **kwargs)
+
+        cls.connect = connect
+
+    # HTTPSConnection重写了connect（不调用父类实现），两个类都需要包装
+    for cls in (HTTPConnection, HTTPSConnection):
+        if 'connect' in cls.__dict__:
+            wrap(cls)
+    _urllib3_instrumented = True
+
+
+# 全局追踪器
+tracer = Tracer()
+
+
+def _enable_from_environment():
+    """根据环境变量开启追踪，并在进程退出时导出"""
+    path = os.environ.get('SPEEDTEST_TRACE')
+    if not path:
+        return
+    tracer.enable(profile=os.environ.get('SPEEDTEST_PROFILE', '') not in ('', '0'))
+
+    def export():
+        try:
+            tracer.export_chrome_trace(path)
+            print(f"[性能追踪] 已导出 {tracer.event_count} 个事件到 {path}")
+        except OSError as e:
+            print(f"[性能追踪] 导出失败: {e}")
+
+    atexit.register(export)
+
+
+_enable_from_environment()
@@ -0,0 +1,422 @@
+# -*- coding: utf-8 -*-
+"""
+Transport
+HTTP传输层 - 为requests会话指定地址族(IPv4/IPv6)、源地址、出口网卡和代理，以及Happy Eyeballs连接竞速计时
+"""
+
+import time
+import socket
+import threading
+import ipaddress
+import importlib.util
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.utils import should_bypass_proxies
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NameResolutionError, NewConnectionError
+from urllib3.util.connection import create_connection
+
+
+# 地址族名称 -> socket常量
+FAMILIES = {
+    'ipv4': socket.AF_INET,
+    'ipv6': socket.AF_INET6,
+}
+
+
+def resolve(host: str, port: int, family: str) -> List[str]:
+    """
+    解析主机的指定地址族地址
+
+    Args:
+        host: 主机名或地址
+        port: 端口
+        family: 'ipv4' 或 'ipv6'
+
+    Returns:
+        List[str]: 去重后的地址列表（保持解析器返回的顺序）
+
+    Raises:
+        socket.gaierror: 没有该地址族的地址
+    """
+    addresses = []
+    for _, _, _, _, sockaddr in socket.getaddrinfo(host.strip('[]'), port, FAMILIES[family],
+                                                   socket.SOCK_STREAM):
+        if sockaddr[0] not in addresses:
+            addresses.append(sockaddr[0])
+    return addresses
+
+
+# Windows代理绕过列表中的<local>：不含点的主机名（内网单标签主机名）直连
+LOCAL_BYPASS = '<local>'
+
+
+def bypass_proxy(url: str, no_proxy: str) -> bool:
+    """
+    判断地址是否在代理绕过列表中
+
+    Args:
+        url: 请求地址
+        no_proxy: 逗号分隔的绕过列表（与no_proxy环境变量格式相同，可包含<local>）
+
+    Returns:
+        bool: 是否直连
+    """
+    entries = [item.strip() for item in no_proxy.split(',') if item.strip()]
+    if LOCAL_BYPASS in entries:
+        host = urlsplit(url).hostname or ''
+        if host and '.' not in host and ':' not in host:
+            return True
+        entries = [item for item in entries if item != LOCAL_BYPASS]
+    return bool(entries) and should_bypass_proxies(url, no_proxy=','.join(entries))
+
+
+def proxies_from_url(proxy_url: str) -> Dict[str, str]:
+    """
+    把代理地址转换为requests的proxies参数（HTTP和HTTPS请求都使用该代理）
+
+    Args:
+        proxy_url: 代理地址，如 http://127.0.0.1:8080、socks5://127.0.0.1:1080，省略协议时按HTTP代理处理
+
+    Returns:
+        Dict[str, str]: proxies参数
+
+    Raises:
+        ValueError: 地址无效、协议不支持，或SOCKS代理缺少PySocks（pip install requests[socks]）
+    """
+    if '://' not in proxy_url:
+        proxy_url = f'http://{proxy_url}'
+    parts = urlsplit(proxy_url)
+    if parts.scheme not in ('http', 'https', 'socks4', 'socks4a', 'socks5', 'socks5h') or not parts.hostname:
+        raise ValueError(f"无效的代理地址: {proxy_url}")
+    if parts.scheme.startswith('socks') and importlib.util.find_spec('socks') is None:
+        # requests的SOCKS支持依赖可选的PySocks，缺少时每个请求都会失败(InvalidSchema)
+        raise ValueError(f"SOCKS代理需要安装PySocks（pip install requests[socks]），无法直接使用: {proxy_url}")
+    return {'http': proxy_url, 'https': proxy_url}
+
+
+def proxies_from_settings(proxy_info: Dict) -> Dict[str, str]:
+    """
+    把系统代理设置（NetworkInfoModel.get_proxy_settings()的返回值）转换为requests的proxies参数
+
+    Args:
+        proxy_info: 代理设置信息
+
+    Returns:
+        Dict[str, str]: proxies参数，未启用代理时为空字典（直连）；
+                        绕过列表保存在'no_proxy'键中，由request()按地址判断
+                        （Windows的<local>保留原样，表示不含点的内网主机名）
+
+    Raises:
+        ValueError: 代理由自动配置脚本(PAC)决定，或是SOCKS代理但缺少PySocks，无法直接使用
+    """
+    if not proxy_info.get('enabled'):
+        return {}
+    proxies = {}
+    for scheme in ('http', 'https'):
+        server = proxy_info.get(f'{scheme}_proxy') or proxy_info.get('socks_proxy')
+        if not server:
+            continue
+        if server.startswith('PAC:'):
+            raise ValueError(f"系统代理使用自动配置脚本，无法直接使用: {server[4:].strip()}")
+        if '://' not in server and server == proxy_info.get('socks_proxy'):
+            server = f'socks5://{server}'
+        proxies[scheme] = proxies_from_url(server)[scheme]
+    bypass = [item if item == LOCAL_BYPASS else item.lstrip('*')
+              for item in proxy_info.get('bypass_list') or [] if item]
+    if proxies and bypass:
+        proxies['no_proxy'] = ','.join(bypass)
+    return proxies
+
+
+class _FamilyConnectionMixin:
+    """
+    只连接指定地址族的连接
+
+    建立连接时自行解析主机名，依次连接该地址族的地址。连接对象的主机名保持不变，
+    Host请求头和TLS的SNI/证书校验仍使用原主机名。
+    """
+
+    # 'ipv4'、'ipv6'，None表示不限制
+    address_family: Optional[str] = None
+
+    def _new_conn(self):
+        if not self.address_family:
+            return super()._new_conn()
+        try:
+            addresses = resolve(self._dns_host, self.port, self.address_family)
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+
+        error = None
+        for address in addresses:
+            try:
+                return create_connection((address, self.port), self.timeout,
+                                         source_address=self.source_address,
+                                         socket_options=self.socket_options)
+            except OSError as e:
+                error = e
+        if isinstance(error, socket.timeout):
+            raise ConnectTimeoutError(
+                self, f"Connection to {self.host} timed out. (connect timeout={self.timeout})") from error
+        raise NewConnectionError(self, f"Failed to establish a new connection: {error}") from error
+
+
+_pool_classes: Dict[str, Dict] = {}
+_pool_classes_lock = threading.Lock()
+
+
+def _pool_classes_for(family: str) -> Dict:
+    """
+    获取只连接指定地址族的连接池类（按地址族缓存）
+
+    Args:
+        family: 'ipv4' 或 'ipv6'
+
+    Returns:
+        Dict: {'http': 连接池类, 'https': 连接池类}
+    """
+    with _pool_classes_lock:
+        if family not in _pool_classes:
+            suffix = family.upper()
+            http_connection = type(f'HTTPConnection{suffix}', (_FamilyConnectionMixin, HTTPConnection),
+                                   {'address_family': family})
+            https_connection = type(f'HTTPSConnection{suffix}', (_FamilyConnectionMixin, HTTPSConnection),
+                                    {'address_family': family})
+            _pool_classes[family] = {
+                'http': type(f'HTTPConnectionPool{suffix}', (HTTPConnectionPool,),
+                             {'ConnectionCls': http_connection}),
+                'https': type(f'HTTPSConnectionPool{suffix}', (HTTPSConnectionPool,),
+                              {'ConnectionCls': https_connection}),
+            }
+        return _pool_classes[family]
+
+
+def source_family(source_address: str) -> str:
+    """
+    源地址所属的地址族
+
+    Args:
+        source_address: 本机IP地址
+
+    Returns:
+        str: 'ipv4' 或 'ipv6'
+
+    Raises:
+        ValueError: 不是有效的IP地址
+    """
+    return 'ipv6' if ipaddress.ip_address(source_address.split('%')[0]).version == 6 else 'ipv4'
+
+
+class TransportAdapter(HTTPAdapter):
+    """
+    可以指定地址族、源地址和出口网卡的requests传输适配器
+
+    指定源地址时连接只使用该地址所属的地址族（IPv4源地址无法连接IPv6目标）。
+    源地址只决定连接使用的本机地址，Linux默认按目的地址选路，多网卡时还需要指定
+    interface（SO_BINDTODEVICE）才能保证流量从该网卡发出；其他平台绑定源地址即可。
+    """
+
+    def __init__(self, family: Optional[str] = None, source_address: Optional[str] = None,
+                 interface: Optional[str] = None, **kwargs):
+        """
+        初始化适配器
+
+        Args:
+            family: 'ipv4'、'ipv6'，None表示由解析器决定（与默认行为相同）
+            source_address: 连接使用的本机地址，None表示由系统选择
+            interface: 出口网卡名称（仅在支持SO_BINDTODEVICE的平台上生效）
+            **kwargs: 传给HTTPAdapter的参数
+
+        Raises:
+            ValueError: 地址族未知、源地址无效或与地址族不一致
+        """
+        if family is not None and family not in FAMILIES:
+            raise ValueError(f"未知的地址族: {family}")
+        if source_address:
+            bound_family = source_family(source_address)
+            if family is not None and family != bound_family:
+                raise ValueError(f"源地址 {source_address} 不属于{family.upper()}")
+            family = bound_family
+        self.family = family
+        self.source_address = source_address
+        self.interface = interface
+        super().__init__(**kwargs)
+
+    def _pool_kwargs(self, kwargs: Dict) -> Dict:
+        """在连接池参数中加入源地址和出口网卡"""
+        if self.source_address:
+            kwargs['source_address'] = (self.source_address, 0)
+        if self.interface and hasattr(socket, 'SO_BINDTODEVICE'):
+            kwargs['socket_options'] = list(kwargs.get('socket_options') or HTTPConnection.default_socket_options) + [
+                (socket.SOL_SOCKET, socket.SO_BINDTODEVICE, self.interface.encode())]
+        return kwargs
+
+    def _apply(self, manager):
+        """让连接池管理器使用指定地址族的连接池"""
+        if self.family:
+            manager.pool_classes_by_scheme = _pool_classes_for(self.family)
+        return manager
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        super().init_poolmanager(connections, maxsize, block, **self._pool_kwargs(pool_kwargs))
+        self._apply(self.poolmanager)
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        # 使用代理时约束的是到代理服务器的连接
+        return self._apply(super().proxy_manager_for(proxy, **self._pool_kwargs(proxy_kwargs)))
+
+
+def create_session(family: Optional[str] = None, source_address: Optional[str] = None,
+                   interface: Optional[str] = None, proxies: Optional[Dict[str, str]] = None) -> requests.Session:
+    """
+    创建requests会话
+
+    Args:
+        family: 'ipv4'、'ipv6'，None表示不限制
+        source_address: 连接使用的本机地址，None表示由系统选择
+        interface: 出口网卡名称，None表示由路由决定
+        proxies: 使用的代理，空字典表示直连；None表示与requests默认行为相同，读取环境变量中的代理。
+                 指定时不再读取环境变量（trust_env=False），测试结果不受终端环境影响
+
+    Returns:
+        requests.Session: 会话
+    """
+    session = requests.Session()
+    if proxies is not None:
+        session.trust_env = False
+        session.proxies = {scheme: url for scheme, url in proxies.items() if scheme != 'no_proxy'}
+    if family or source_address or interface:
+        adapter = TransportAdapter(family, source_address, interface)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+    return session
+
+
+def request(method: str, url: str, family: Optional[str] = None, source_address: Optional[str] = None,
+            interface: Optional[str] = None, proxies: Optional[Dict[str, str]] = None,
+            **kwargs) -> requests.Response:
+    """
+    发送一次请求（与requests.request相同，每次使用新会话，不复用连接）
+
+    Args:
+        method: 请求方法
+        url: 地址
+        family: 'ipv4'、'ipv6'，None表示不限制
+        source_address: 连接使用的本机地址，None表示由系统选择
+        interface: 出口网卡名称，None表示由路由决定
+        proxies: 使用的代理（见create_session），地址在'no_proxy'绕过列表中时直连
+        **kwargs: 传给requests的参数
+
+    Returns:
+        requests.Response: 响应
+    """
+    if proxies and proxies.get('no_proxy') and bypass_proxy(url, proxies['no_proxy']):
+        proxies = {}
+    with create_session(family, source_address, interface, proxies) as session:
+        return session.request(method, url, **kwargs)
+
+
+def _timed_connect(address: str, port: int, family: str, timeout: float) -> float:
+    """
+    建立一次TCP连接并返回耗时
+
+    Args:
+        address: 目标地址
+        port: 端口
+        family: 'ipv4' 或 'ipv6'
+        timeout: 超时（秒）
+
+    Returns:
+        float: 连接耗时（毫秒）
+
+    Raises:
+        OSError: 连接失败
+    """
+    sock = socket.socket(FAMILIES[family], socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        start = time.perf_counter()
+        sock.connect((address, port))
+        return (time.perf_counter() - start) * 1000
+    finally:
+        sock.close()
+
+
+def happy_eyeballs(host: str, port: int = 443, attempt_delay: float = 0.25,
+                   timeout: float = 5.0) -> Dict:
+    """
+    Happy Eyeballs (RFC 8305) 连接竞速计时
+
+    先向IPv6地址发起连接，attempt_delay秒后（或IPv6提前完成时）再向IPv4地址发起连接，
+    先连上的地址族获胜。两个连接都会等到完成，以便分别给出各自的连接耗时。
+
+    Args:
+        host: 主机名
+        port: 端口
+        attempt_delay: 发起IPv4连接前等待IPv6的时间（秒，RFC建议250ms）
+        timeout: 单个连接的超时（秒）
+
+    Returns:
+        Dict: 各地址族的地址、连接耗时或错误，获胜的地址族和竞速耗时(ms)
+    """
+    result = {'host': host, 'port': port, 'attempt_delay_ms': attempt_delay * 1000}
+    attempts = {}
+    for family in ('ipv6', 'ipv4'):
+        try:
+            attempts[family] = resolve(host, port, family)[0]
+            result[family] = {'address': attempts[family]}
+        except (socket.gaierror, IndexError) as e:
+            result[family] = {'error': f'没有{family.upper()}地址: {e}'}
+
+    if not attempts:
+        result['winner'] = None
+        return result
+
+    done = {}
+    finished = threading.Condition()
+    race_start = time.perf_counter()
+
+    def attempt(family: str):
+        started = time.perf_counter()
+        try:
+            connect_ms = _timed_connect(attempts[family], port, family, timeout)
+            outcome = {'connect_ms': round(connect_ms, 2),
+                       'finished_ms': round((time.perf_counter() - race_start) * 1000, 2)}
+        except OSError as e:
+            outcome = {'error': str(e) or type(e).__name__}
+        outcome['started_ms'] = round((started - race_start) * 1000, 2)
+        with finished:
+            done[family] = outcome
+            finished.notify_all()
+
+    threads = []
+    if 'ipv6' in attempts:
+        threads.append(threading.Thread(target=attempt, args=('ipv6',), daemon=True))
+        threads[-1].start()
+    if 'ipv4' in attempts:
+        if 'ipv6' in attempts:
+            # 最多等待IPv6 attempt_delay秒，IPv6提前完成（成功或失败）时立即开始IPv4；
+            # IPv6已获胜时IPv4连接仍然进行，只用于给出IPv4自身的连接耗时
+            with finished:
+                finished.wait_for(lambda: 'ipv6' in done, timeout=attempt_delay)
+        threads.append(threading.Thread(target=attempt, args=('ipv4',), daemon=True))
+        threads[-1].start()
+    for thread in threads:
+        thread.join(timeout + attempt_delay + 1)
+
+    successes = [(outcome['finished_ms'], family) for family, outcome in done.items()
+                 if 'connect_ms' in outcome]
+    for family, outcome in done.items():
+        result[family].update(outcome)
+    if successes:
+        race_ms, winner = min(successes)
+        result['winner'] = winner
+        result['race_ms'] = race_ms
+    else:
+        result['winner'] = None
+    return result
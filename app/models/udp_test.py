@@ -0,0 +1,462 @@
+# -*- coding: utf-8 -*-
+"""
+UDP Test
+UDP测试 - 按恒定码率或阶梯递增码率发送带序号的数据报，由反射服务器统计到达情况，得到速率、抖动、丢包和乱序
+
+数据报格式（网络字节序）:
+    magic(4) 版本(uint8) 类型(uint8) 标志(uint8) 阶段(uint8) 会话(uint32) 序号(uint32) 发送时间(double)
+之后是填充字节，凑足指定的数据报大小。
+
+发送端在全部阶段结束后向服务器请求该会话的统计报告（由服务器端测得上行方向的单向抖动和丢包），
+开启回显时服务器同时把每个数据报原样发回，发送端据此统计往返时间、往返抖动和往返丢包。
+"""
+
+import os
+import json
+import math
+import time
+import queue
+import socket
+import struct
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+MAGIC = b'SUDP'
+VERSION = 1
+HEADER = struct.Struct('!4sBBBBIId')
+
+# 数据报类型
+KIND_DATA = 1
+KIND_REPORT_REQUEST = 2
+KIND_REPORT = 3
+KIND_ECHO = 4
+
+# 标志位：要求服务器回显
+FLAG_ECHO = 0x01
+
+# 报告请求的最小长度：报告比请求大，服务器忽略较短的请求，避免被用来放大流量
+REPORT_REQUEST_SIZE = 1200
+
+# 最多的阶段数（阶段序号占一个字节，报告需放得进一个数据报）
+MAX_STEPS = 10
+
+
+def parse_server(server: str, default_port: int = 9000) -> Tuple[str, int]:
+    """
+    解析服务器地址
+
+    Args:
+        server: 'host'、'host:port'、'[IPv6]:port' 或 IPv6地址
+        default_port: 未指定端口时使用的端口
+
+    Returns:
+        Tuple[str, int]: (主机, 端口)
+
+    Raises:
+        ValueError: 端口无效
+    """
+    server = server.strip()
+    if server.startswith('['):
+        host, _, rest = server[1:].partition(']')
+        port = rest.lstrip(':')
+    elif server.count(':') == 1:
+        host, port = server.split(':')
+    else:
+        host, port = server, ''
+    return host, int(port) if port else default_port
+
+
+class UDPStreamStats:
+    """
+    单个数据报流的到达统计
+
+    抖动按RFC 3550计算：相邻两个到达的数据报，传输时间（到达时间 - 发送时间）之差的绝对值做1/16平滑。
+    两端时钟不同步只会让传输时间整体偏移，不影响差值，因此服务器端得到的是上行方向的单向抖动估计。
+    序号小于已到达的最大序号视为乱序，已到达过的序号视为重复。
+
+    只记住最大序号之前WINDOW个序号的到达情况（序号来自不可信的数据报，内存占用不能随序号增长），
+    比最大序号落后WINDOW个以上的数据报无法判断是否重复，计为迟到，不计入到达数。
+    """
+
+    # 判断重复的序号窗口大小
+    WINDOW = 65536
+
+    def __init__(self):
+        self.received = 0
+        self.bytes = 0
+        self.duplicates = 0
+        self.reordered = 0
+        self.late = 0
+        self.max_seq = -1
+        self.jitter = 0.0
+        self.first_arrival: Optional[float] = None
+        self.last_arrival: Optional[float] = None
+        self.transit_sum = 0.0
+        self.transit_min: Optional[float] = None
+        self.transit_max: Optional[float] = None
+        self._last_transit: Optional[float] = None
+        # 第i位表示序号 max_seq - i 已到达
+        self._seen = 0
+
+    def record(self, seq: int, sent: float, arrival: float, size: int):
+        """
+        记录一个到达的数据报
+
+        Args:
+            seq: 序号
+            sent: 发送时间（发送端时钟，秒）
+            arrival: 到达时间（接收端时钟，秒）
+            size: 数据报字节数
+        """
+        if seq > self.max_seq:
+            shift = seq - self.max_seq
+            self._seen = ((self._seen << shift) | 1) & ((1 << self.WINDOW) - 1) if shift < self.WINDOW else 1
+            self.max_seq = seq
+        else:
+            offset = self.max_seq - seq
+            if offset >= self.WINDOW:
+                self.late += 1
+                return
+            if self._seen >> offset & 1:
+                self.duplicates += 1
+                return
+            self._seen |= 1 << offset
+            self.reordered += 1
+
+        self.received += 1
+        self.bytes += size
+        if self.first_arrival is None:
+            self.first_arrival = arrival
+        self.last_arrival = arrival
+
+        transit = arrival - sent
+        if self._last_transit is not None:
+            self.jitter += (abs(transit - self._last_transit) - self.jitter) / 16
+        self._last_transit = transit
+        self.transit_sum += transit
+        self.transit_min = transit if self.transit_min is None else min(self.transit_min, transit)
+        self.transit_max = transit if self.transit_max is None else max(self.transit_max, transit)
+
+    def to_dict(self) -> Dict:
+        """
+        转换为报告字典（不含传输时间，两端时钟不同步时没有意义）
+
+        Returns:
+            Dict: 统计信息
+        """
+        return {
+            'received': self.received,
+            'bytes': self.bytes,
+            'duplicates': self.duplicates,
+            'reordered': self.reordered,
+            'late': self.late,
+            'max_seq': self.max_seq,
+            'jitter_ms': round(self.jitter * 1000, 3),
+            'span': None if self.first_arrival is None else round(self.last_arrival - self.first_arrival, 6),
+        }
+
+
+class UDPTest:
+    """
+    UDP测试客户端
+
+    需要对端运行 app.services.udp_reflector。速率按UDP载荷计算（不含IP/UDP头）。
+    """
+
+    # 阶段结束后等待在途数据报到达的时间（秒）
+    DRAIN_SECONDS = 0.5
+    # 报告请求的超时（秒）和重试次数
+    REPORT_TIMEOUT = 1.0
+    REPORT_RETRIES = 3
+    # 阶梯模式中认为“无明显丢包”的丢包率上限（%）
+    LOSS_THRESHOLD = 1.0
+
+    def __init__(self, host: str, port: int, log_callback=None):
+        """
+        初始化客户端
+
+        Args:
+            host: 反射服务器地址
+            port: 反射服务器端口
+            log_callback: 日志回调函数
+        """
+        self.host = host
+        self.port = port
+        self._log_callback = log_callback
+        self._session = int.from_bytes(os.urandom(4), 'big')
+        self._sock: Optional[socket.socket] = None
+        self._reports: 'queue.Queue[Dict]' = queue.Queue()
+        self._echo: Dict[int, UDPStreamStats] = {}
+        self._echo_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._unreachable = False
+
+    def _log(self, message: str):
+        """输出日志"""
+        print(message)
+        if self._log_callback:
+            self._log_callback(message)
+
+    def _connect(self):
+        """创建连接到服务器的UDP套接字（按解析结果选择地址族）"""
+        family, _, _, _, address = socket.getaddrinfo(self.host, self.port, type=socket.SOCK_DGRAM)[0]
+        self._sock = socket.socket(family, socket.SOCK_DGRAM)
+        try:
+            self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+        except OSError:
+            pass
+        self._sock.connect(address)
+        self._sock.settimeout(0.2)
+
+    def _receive_loop(self):
+        """接收回显和报告（在后台线程中运行）"""
+        while not self._stop_event.is_set():
+            try:
+                data = self._sock.recv(65535)
+            except socket.timeout:
+                continue
+            except ConnectionRefusedError:
+                # 服务器端口不可达(ICMP)，继续等待，可能只是个别报文
+                self._unreachable = True
+                continue
+            except OSError:
+                break
+            arrival = time.perf_counter()
+            if len(data) < HEADER.size:
+                continue
+            magic, version, kind, _, step, session, seq, sent = HEADER.unpack_from(data)
+            if magic != MAGIC or version != VERSION or session != self._session:
+                continue
+            if kind == KIND_ECHO:
+                with self._echo_lock:
+                    stats = self._echo.setdefault(step, UDPStreamStats())
+                    stats.record(seq, sent, arrival, len(data))
+            elif kind == KIND_REPORT:
+                try:
+                    self._reports.put(json.loads(data[HEADER.size:].decode('utf-8')))
+                except ValueError:
+                    pass
+
+    def _send_step(self, step: int, rate_mbps: float, duration: float, payload: int, echo: bool,
+                   cancelled: Callable[[], bool]) -> Tuple[int, float, int]:
+        """
+        按恒定码率发送一个阶段
+
+        按时间表发送：每个数据报有预定的发送时刻，落后时（如睡眠精度不足）立即补发，
+        因此平均码率与设定值一致，短时间内可能有小的突发。
+
+        Args:
+            step: 阶段序号
+            rate_mbps: 码率(Mbps)
+            duration: 时长（秒）
+            payload: 数据报大小（字节）
+            echo: 是否要求回显
+            cancelled: 取消检查函数
+
+        Returns:
+            Tuple[int, float, int]: (发送的数据报数, 实际发送时长, 发送失败次数)
+        """
+        buffer = bytearray(payload)
+        flags = FLAG_ECHO if echo else 0
+        interval = payload * 8 / (rate_mbps * 1_000_000)
+        seq = 0
+        errors = 0
+        start = time.perf_counter()
+        end = start + duration
+        next_send = start
+        while not cancelled():
+            now = time.perf_counter()
+            if now >= end:
+                break
+            if now < next_send:
+                time.sleep(min(next_send - now, 0.002))
+                continue
+            while next_send <= now and next_send < end:
+                HEADER.pack_into(buffer, 0, MAGIC, VERSION, KIND_DATA, flags, step, self._session, seq,
+                                 time.perf_counter())
+                try:
+                    self._sock.send(buffer)
+                    seq += 1
+                except ConnectionRefusedError:
+                    self._unreachable = True
+                    errors += 1
+                except OSError:
+                    # 发送缓冲区满(ENOBUFS)等，视为本地丢弃
+                    errors += 1
+                next_send += interval
+        return seq, time.perf_counter() - start, errors
+
+    def _request_report(self) -> Optional[Dict]:
+        """
+        向服务器请求本会话的统计报告
+
+        Returns:
+            Optional[Dict]: {阶段序号(str): 统计}，服务器无响应时返回None
+        """
+        request = bytearray(REPORT_REQUEST_SIZE)
+        HEADER.pack_into(request, 0, MAGIC, VERSION, KIND_REPORT_REQUEST, 0, 0, self._session, 0,
+                         time.perf_counter())
+        for _ in range(self.REPORT_RETRIES):
+            try:
+                self._sock.send(request)
+            except OSError:
+                pass
+            try:
+                return self._reports.get(timeout=self.REPORT_TIMEOUT).get('steps', {})
+            except queue.Empty:
+                continue
+        return None
+
+    def run(self, rate_mbps: float = 10.0, duration: float = 10.0, mode: str = 'cbr', steps: int = 5,
+            payload: int = 1200, echo: bool = True, cancelled: Optional[Callable[[], bool]] = None,
+            progress: Optional[Callable[[str], None]] = None) -> Optional[Dict]:
+        """
+        执行UDP测试
+
+        Args:
+            rate_mbps: 码率(Mbps)；阶梯模式下为最后一个阶段的码率，各阶段从rate/steps开始等差递增
+            duration: 总时长（秒），阶梯模式下平均分配给各阶段
+            mode: 'cbr'（恒定码率）或 'ramp'（阶梯递增）
+            steps: 阶梯模式的阶段数（最多MAX_STEPS）
+            payload: 数据报大小（字节，不小于头部长度）
+            echo: 是否要求服务器回显（统计往返时间和往返丢包）
+            cancelled: 取消检查函数
+            progress: 进度回调函数
+
+        Returns:
+            Optional[Dict]: 各阶段和汇总结果，无法连接或取消时返回None
+
+        Raises:
+            ValueError: 发送模式未知，或码率、时长、数据报大小不是正数
+        """
+        if mode not in ('cbr', 'ramp'):
+            raise ValueError(f"未知的发送模式: {mode}")
+        # NaN和无穷大同样会让发送循环无法结束
+        if not (rate_mbps > 0 and math.isfinite(rate_mbps)):
+            raise ValueError("码率必须是大于0的有限值")
+        if not (duration > 0 and math.isfinite(duration)):
+            raise ValueError("测试时长必须是大于0的有限值")
+        if payload <= 0:
+            raise ValueError("数据报大小必须大于0")
+        cancelled = cancelled or (lambda: False)
+        steps = 1 if mode == 'cbr' else max(1, min(MAX_STEPS, steps))
+        payload = max(HEADER.size, min(payload, 65507))
+        rates = [rate_mbps * (i + 1) / steps for i in range(steps)] if mode == 'ramp' else [rate_mbps]
+        step_duration = duration / steps
+
+        try:
+            self._connect()
+        except OSError as e:
+            self._log(f"[UDP测试] 无法连接 {self.host}:{self.port}: {e}")
+            return None
+
+        receiver = threading.Thread(target=self._receive_loop, name='udp-test-recv', daemon=True)
+        receiver.start()
+        self._log(f"[UDP测试] 目标 {self.host}:{self.port}，模式 {mode}，数据报 {payload} 字节，"
+                  f"{'开启' if echo else '关闭'}回显")
+
+        sent_counts = []
+        try:
+            for step, rate in enumerate(rates):
+                if progress:
+                    progress(f"正在发送UDP数据（{rate:.1f} Mbps，阶段 {step + 1}/{steps}）...")
+                sent, elapsed, errors = self._send_step(step, rate, step_duration, payload, echo, cancelled)
+                sent_counts.append((rate, sent, elapsed, errors))
+                if cancelled():
+                    return None
+            time.sleep(self.DRAIN_SECONDS)
+            if progress:
+                progress("正在获取服务器统计...")
+            report = self._request_report()
+        finally:
+            self._stop_event.set()
+            receiver.join(1.0)
+            self._sock.close()
+
+        if report is None:
+            reason = '服务器端口不可达' if self._unreachable else '服务器无响应'
+            self._log(f"[UDP测试] 未收到服务器统计报告（{reason}）")
+
+        step_results = []
+        for step, (rate, sent, elapsed, errors) in enumerate(sent_counts):
+            entry = {
+                'step': step,
+                'target_mbps': round(rate, 3),
+                'offered_mbps': round(sent * payload * 8 / elapsed / 1_000_000, 3) if elapsed > 0 else 0.0,
+                'sent': sent,
+                'send_errors': errors,
+            }
+            upstream = (report or {}).get(str(step))
+            if report is not None:
+                upstream = upstream or UDPStreamStats().to_dict()
+                lost = max(0, sent - upstream['received'])
+                entry.update({
+                    'received': upstream['received'],
+                    'lost': lost,
+                    'loss_percent': round(lost / sent * 100, 3) if sent else 0.0,
+                    'reordered': upstream['reordered'],
+                    'duplicates': upstream['duplicates'],
+                    'late': upstream.get('late', 0),
+                    'jitter_ms': upstream['jitter_ms'],
+                    'achieved_mbps': round(upstream['bytes'] * 8 / elapsed / 1_000_000, 3) if elapsed > 0 else 0.0,
+                })
+            if echo:
+                with self._echo_lock:
+                    echoed = self._echo.get(step) or UDPStreamStats()
+                entry.update({
+                    'echo_received': echoed.received,
+                    'echo_loss_percent': round(max(0, sent - echoed.received) / sent * 100, 3) if sent else 0.0,
+                    'echo_reordered': echoed.reordered,
+                    'rtt_avg_ms': round(echoed.transit_sum / echoed.received * 1000, 3) if echoed.received else None,
+                    'rtt_min_ms': None if echoed.transit_min is None else round(echoed.transit_min * 1000, 3),
+                    'rtt_max_ms': None if echoed.transit_max is None else round(echoed.transit_max * 1000, 3),
+                    'rtt_jitter_ms': round(echoed.jitter * 1000, 3),
+                })
+            step_results.append(entry)
+
+        result = {
+            'server': f'[{self.host}]:{self.port}' if ':' in self.host else f'{self.host}:{self.port}',
+            'mode': mode,
+            'payload_bytes': payload,
+            'duration': duration,
+            'echo': echo,
+            'report_received': report is not None,
+            'steps': step_results,
+        }
+        result.update(self._summarize(step_results))
+        return result
+
+    def _summarize(self, step_results: List[Dict]) -> Dict:
+        """
+        汇总各阶段结果
+
+        Args:
+            step_results: 各阶段结果
+
+        Returns:
+            Dict: 汇总字段（速率和抖动取最后一个阶段，丢包和乱序为合计；阶梯模式下给出丢包率不超过
+                  LOSS_THRESHOLD的最高码率）
+        """
+        last = step_results[-1]
+        sent = sum(entry['sent'] for entry in step_results)
+        summary = {
+            'sent': sent,
+            'offered_mbps': last['offered_mbps'],
+        }
+        if 'received' in last:
+            lost = sum(entry['lost'] for entry in step_results)
+            summary.update({
+                'achieved_mbps': last['achieved_mbps'],
+                'jitter_ms': last['jitter_ms'],
+                'lost': lost,
+                'loss_percent': round(lost / sent * 100, 3) if sent else 0.0,
+                'reordered': sum(entry['reordered'] for entry in step_results),
+            })
+            clean = [entry['target_mbps'] for entry in step_results if entry['loss_percent'] <= self.LOSS_THRESHOLD]
+            if len(step_results) > 1:
+                summary['max_clean_rate_mbps'] = max(clean) if clean else None
+        if 'rtt_avg_ms' in last:
+            summary['rtt_avg_ms'] = last['rtt_avg_ms']
+            summary['rtt_jitter_ms'] = last['rtt_jitter_ms']
+        return summary
@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+"""
+Services Package
+无界面后台服务包（调度器等），不依赖Qt
+"""
+
+from .scheduler import TestPlan, TestScheduler
+from .metrics_exporter import MetricsRegistry, MetricsExporter
+from .job_queue import Job, JobQueue
+from .api_server import ApiServer
+from .test_server import ReferenceServer, NetworkConditions
+from .udp_reflector import UDPReflector
+
+__all__ = ['TestPlan', 'TestScheduler', 'MetricsRegistry', 'MetricsExporter',
+           'Job', 'JobQueue', 'ApiServer', 'ReferenceServer', 'NetworkConditions', 'UDPReflector']
@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""
+API Server
+本地REST控制接口 - 远程触发测试、查询状态、流式读取每秒采样、按ID获取结果
+
+接口:
+    POST   /jobs                  提交任务，请求体 {"type": "download", "params": {...}}
+    GET    /jobs                  列出任务
+    GET    /jobs/<id>             查询任务状态（含结果）
+    GET    /jobs/<id>/result      获取任务结果（未完成返回409）
+    GET    /jobs/<id>/samples     以NDJSON流式输出每秒采样，直到任务结束（?since=N 从第N个开始，?stream=0 只返回已有采样）
+    DELETE /jobs/<id>             取消任务
+"""
+
+import json
+import hmac
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import urlparse, parse_qs
+
+from ..models.sample_series import json_default
+from .job_queue import Job, JobQueue
+
+
+class _ApiHandler(BaseHTTPRequestHandler):
+    """REST请求处理器"""
+
+    server_version = 'InternetSpeedTestAPI/1.0'
+
+    # ---------- 工具方法 ----------
+
+    def _send_json(self, status: int, data: Dict):
+        """发送JSON响应"""
+        body = json.dumps(data, ensure_ascii=False, default=json_default).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error_json(self, status: int, message: str):
+        """发送错误响应"""
+        self._send_json(status, {'error': message})
+
+    def _authorized(self) -> bool:
+        """校验访问令牌（未配置令牌时不校验）"""
+        token = self.server.token
+        if not token:
+            return True
+        header = self.headers.get('Authorization', '')
+        if header.startswith('Bearer ') and hmac.compare_digest(header[7:], token):
+            return True
+        self._send_error_json(401, '未授权')
+        return False
+
+    def _route(self):
+        """
+        解析请求路径
+
+        Returns:
+            tuple: (路径片段列表, 查询参数)
+        """
+        parsed = urlparse(self.path)
+        parts = [part for part in parsed.path.split('/') if part]
+        return parts, parse_qs(parsed.query)
+
+    def _get_job(self, job_id: str) -> Optional[Job]:
+        """获取任务，不存在时发送404"""
+        job = self.server.jobs.get(job_id)
+        if job is None:
+            self._send_error_json(404, f"任务不存在: {job_id}")
+        return job
+
+    # ---------- 请求处理 ----------
+
+    def do_POST(self):
+        """提交任务"""
+        if not self._authorized():
+            return
+        parts, _ = self._route()
+        if parts != ['jobs']:
+            self._send_error_json(404, '接口不存在')
+            return
+
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            payload = json.loads(self.rfile.read(length) or b'{}')
+            if not isinstance(payload, dict):
+                raise ValueError("请求体必须是JSON对象")
+            job = self.server.jobs.submit(payload.get('type'), payload.get('params'))
+        except ValueError as e:
+            self._send_error_json(400, str(e))
+            return
+
+        self._send_json(202, job.to_dict(include_result=False))
+
+    def do_GET(self):
+        """查询任务"""
+        if not self._authorized():
+            return
+        parts, query = self._route()
+
+        if parts == ['jobs']:
+            self._send_json(200, {
+                'jobs': [job.to_dict(include_result=False) for job in self.server.jobs.list()],
+                'pending_bandwidth_jobs': self.server.jobs.pending_bandwidth_jobs()
+            })
+            return
+
+        if len(parts) < 2 or parts[0] != 'jobs':
+            self._send_error_json(404, '接口不存在')
+            return
+
+        job = self._get_job(parts[1])
+        if job is None:
+            return
+
+        if len(parts) == 2:
+            self._send_json(200, job.to_dict())
+        elif parts[2:] == ['result']:
+            if not job.is_finished:
+                self._send_error_json(409, f"任务尚未完成（{job.status}）")
+            elif job.status != Job.DONE:
+                self._send_error_json(410, job.error or '任务未成功完成')
+            else:
+                self._send_json(200, job.result)
+        elif parts[2:] == ['samples']:
+            try:
+                since = int(query.get('since', ['0'])[0])
+                if since < 0:
+                    raise ValueError
+            except ValueError:
+                self._send_error_json(400, "since参数必须是非负整数")
+                return
+            if query.get('stream', ['1'])[0] == '0':
+                self._send_json(200, {'status': job.status, 'samples': job.samples[since:]})
+            else:
+                self._stream_samples(job, since)
+        else:
+            self._send_error_json(404, '接口不存在')
+
+    def do_DELETE(self):
+        """取消任务"""
+        if not self._authorized():
+            return
+        parts, _ = self._route()
+        if len(parts) != 2 or parts[0] != 'jobs':
+            self._send_error_json(404, '接口不存在')
+            return
+
+        job = self._get_job(parts[1])
+        if job is None:
+            return
+        job.cancel()
+        self._send_json(202, job.to_dict(include_result=False))
+
+    def _stream_samples(self, job: Job, since: int):
+        """
+        以NDJSON流式输出采样，任务结束后输出一行状态并关闭连接
+
+        Args:
+            job: 任务
+            since: 起始采样序号
+        """
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson; charset=utf-8')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+
+        try:
+            while True:
+                samples = job.wait_for_samples(since, timeout=15)
+                for sample in samples:
+                    self.wfile.write((json.dumps(sample) + '\n').encode('utf-8'))
+                since += len(samples)
+                if job.is_finished and since >= len(job.samples):
+                    break
+                if not samples:
+                    # 心跳，尽早发现客户端断开
+                    self.wfile.write(b'\n')
+                self.wfile.flush()
+            end = {'status': job.status, 'error': job.error}
+            self.wfile.write((json.dumps(end, ensure_ascii=False) + '\n').encode('utf-8'))
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        self.close_connection = True
+
+    def log_message(self, format, *args):
+        """访问日志输出到控制台"""
+        print(f"[控制接口] {self.address_string()} {format % args}")
+
+
+class ApiServer:
+    """本地REST控制接口服务"""
+
+    def __init__(self, jobs: JobQueue, host: str = '127.0.0.1', port: int = 8765,
+                 token: Optional[str] = None):
+        """
+        初始化服务
+
+        Args:
+            jobs: 任务队列
+            host: 监听地址（默认只监听本机）
+            port: 监听端口（0表示随机端口）
+            token: 访问令牌，设置后请求需携带 Authorization: Bearer <token>
+        """
+        self.jobs = jobs
+        self._server = ThreadingHTTPServer((host, port), _ApiHandler)
+        self._server.daemon_threads = True
+        self._server.jobs = jobs
+        self._server.token = token
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        """实际监听的端口"""
+        return self._server.server_address[1]
+
+    def start(self):
+        """在后台线程中启动服务"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._server.serve_forever, name='ApiServer', daemon=True)
+        self._thread.start()
+        print(f"[控制接口] 已在端口 {self.port} 启动")
+
+    def stop(self):
+        """停止服务"""
+        # 未启动时调用shutdown()会一直阻塞
+        if self._thread and self._thread.is_alive():
+            self._server.shutdown()
+            self._thread.join()
+        self._server.server_close()
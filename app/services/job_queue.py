@@ -0,0 +1,330 @@
+# -*- coding: utf-8 -*-
+"""
+Job Queue
+测试任务队列 - 带宽测试串行执行，延迟和IP查询可并行执行
+"""
+
+import time
+import uuid
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from ..models.speedtest_model import SpeedTestModel
+from ..models.ip_model import IPModel
+
+
+class Job:
+    """测试任务"""
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+
+    FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+    # 每个任务最多保留的采样点数
+    MAX_SAMPLES = 36000
+
+    def __init__(self, job_type: str, params: Optional[Dict] = None):
+        """
+        初始化任务
+
+        Args:
+            job_type: 任务类型
+            params: 任务参数
+        """
+        self.id = uuid.uuid4().hex[:12]
+        self.type = job_type
+        self.params = params or {}
+        self.status = self.QUEUED
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.samples: List[Dict] = []
+        self._cancel_requested = False
+        self._changed = threading.Condition()
+
+    def add_sample(self, direction: str, speed_mbps: float, elapsed: float):
+        """
+        记录一个每秒速度采样并唤醒等待中的流式读取
+
+        Args:
+            direction: 测试方向
+            speed_mbps: 速度(Mbps)
+            elapsed: 测试已运行的秒数
+        """
+        with self._changed:
+            if len(self.samples) < self.MAX_SAMPLES:
+                self.samples.append({
+                    'seq': len(self.samples),
+                    'direction': direction,
+                    'speed': round(speed_mbps, 3),
+                    'elapsed': round(elapsed, 3)
+                })
+            self._changed.notify_all()
+
+    def set_status(self, status: str, result: Optional[Dict] = None, error: Optional[str] = None):
+        """
+        更新任务状态
+
+        Args:
+            status: 新状态
+            result: 测试结果
+            error: 错误信息
+        """
+        with self._changed:
+            self.status = status
+            if status == self.RUNNING:
+                self.started = time.time()
+            elif status in self.FINISHED_STATES:
+                self.finished = time.time()
+                self.result = result
+                self.error = error
+            self._changed.notify_all()
+
+    def wait_for_samples(self, since: int, timeout: float) -> List[Dict]:
+        """
+        等待新的采样点（用于流式输出）
+
+        Args:
+            since: 已读取的采样数
+            timeout: 最长等待时间（秒）
+
+        Returns:
+            List[Dict]: 新的采样点，超时或任务结束时可能为空
+        """
+        with self._changed:
+            if len(self.samples) <= since and self.status not in self.FINISHED_STATES:
+                self._changed.wait(timeout)
+            return self.samples[since:]
+
+    def cancel(self):
+        """请求取消任务（排队中的任务直接取消，运行中的任务在当前阶段结束后退出）"""
+        self._cancel_requested = True
+        if self.status == self.QUEUED:
+            self.set_status(self.CANCELLED, error='任务已取消')
+
+    @property
+    def cancel_requested(self) -> bool:
+        """是否已请求取消"""
+        return self._cancel_requested
+
+    @property
+    def is_finished(self) -> bool:
+        """任务是否已结束"""
+        return self.status in self.FINISHED_STATES
+
+    def to_dict(self, include_result: bool = True) -> Dict:
+        """
+        转换为字典
+
+        Args:
+            include_result: 是否包含测试结果
+
+        Returns:
+            Dict: 任务信息
+        """
+        def fmt(ts):
+            return datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S') if ts else None
+
+        data = {
+            'id': self.id,
+            'type': self.type,
+            'params': self.params,
+            'status': self.status,
+            'created': fmt(self.created),
+            'started': fmt(self.started),
+            'finished': fmt(self.finished),
+            'samples': len(self.samples),
+            'error': self.error,
+        }
+        if include_result:
+            data['result'] = self.result
+        return data
+
+
+class JobQueue:
+    """
+    测试任务队列
+
+    带宽测试（download/upload/both）由单个工作线程按提交顺序执行，同一时间最多一个；
+    延迟和IP查询（ping/ip/ip_info/ip_lookup）由线程池并行执行，不占用带宽队列。
+    """
+
+    BANDWIDTH_TYPES = ('download', 'upload', 'both')
+    LIGHT_TYPES = ('ping', 'ip', 'ip_info', 'ip_lookup')
+
+    def __init__(self, max_light_workers: int = 4, max_jobs: int = 200,
+                 on_finished: Optional[Callable] = None):
+        """
+        初始化任务队列
+
+        Args:
+            max_light_workers: 并行执行延迟/IP查询的线程数
+            max_jobs: 最多保留的任务记录数（超出后淘汰最早结束的任务）
+            on_finished: 任务结束回调 on_finished(job)
+        """
+        self._jobs: 'OrderedDict[str, Job]' = OrderedDict()
+        self._jobs_lock = threading.Lock()
+        self._max_jobs = max_jobs
+        self._on_finished = on_finished
+
+        self._bandwidth_queue: 'queue.Queue[Optional[Job]]' = queue.Queue()
+        self._bandwidth_thread = threading.Thread(target=self._bandwidth_loop, name='BandwidthJobs', daemon=True)
+        self._bandwidth_thread.start()
+        self._light_pool = ThreadPoolExecutor(max_workers=max_light_workers, thread_name_prefix='LightJobs')
+
+    @classmethod
+    def job_types(cls) -> tuple:
+        """支持的任务类型"""
+        return cls.BANDWIDTH_TYPES + cls.LIGHT_TYPES
+
+    def submit(self, job_type: str, params: Optional[Dict] = None) -> Job:
+        """
+        提交任务
+
+        Args:
+            job_type: 任务类型
+            params: 任务参数（ip_lookup需要{'ip': ...}）
+
+        Returns:
+            Job: 新建的任务
+
+        Raises:
+            ValueError: 任务类型不支持或参数无效
+        """
+        if params is not None and not isinstance(params, dict):
+            raise ValueError("任务参数必须是JSON对象")
+        if job_type not in self.job_types():
+            raise ValueError(f"不支持的任务类型: {job_type}")
+        if job_type == 'ip_lookup' and not (params or {}).get('ip'):
+            raise ValueError("ip_lookup任务需要提供ip参数")
+
+        job = Job(job_type, params)
+        with self._jobs_lock:
+            self._jobs[job.id] = job
+            self._evict()
+
+        if job_type in self.BANDWIDTH_TYPES:
+            self._bandwidth_queue.put(job)
+        else:
+            self._light_pool.submit(self._execute, job)
+        return job
+
+    def _evict(self):
+        """淘汰超出数量上限的已结束任务（调用方需持有锁）"""
+        if len(self._jobs) <= self._max_jobs:
+            return
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.is_finished]:
+            if len(self._jobs) <= self._max_jobs:
+                break
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """
+        按ID获取任务
+
+        Args:
+            job_id: 任务ID
+
+        Returns:
+            Optional[Job]: 任务，不存在返回None
+        """
+        with self._jobs_lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        """
+        列出所有任务（按提交顺序）
+
+        Returns:
+            List[Job]: 任务列表
+        """
+        with self._jobs_lock:
+            return list(self._jobs.values())
+
+    def pending_bandwidth_jobs(self) -> int:
+        """排队中的带宽测试数量"""
+        return self._bandwidth_queue.qsize()
+
+    def _bandwidth_loop(self):
+        """带宽测试工作线程"""
+        while True:
+            job = self._bandwidth_queue.get()
+            if job is None:
+                break
+            if job.is_finished:
+                # 排队期间已被取消
+                continue
+            self._execute(job)
+
+    def _execute(self, job: Job):
+        """
+        执行任务
+
+        Args:
+            job: 任务
+        """
+        if job.is_finished:
+            return
+        job.set_status(Job.RUNNING)
+        try:
+            if job.type in self.BANDWIDTH_TYPES or job.type == 'ping':
+                result, error = self._run_speed_test(job)
+            else:
+                result, error = self._run_ip_query(job)
+        except Exception as e:
+            result, error = None, f"任务执行出错: {e}"
+
+        if job.cancel_requested:
+            job.set_status(Job.CANCELLED, result, error or '任务已取消')
+        elif result is None:
+            job.set_status(Job.FAILED, error=error or '任务失败')
+        else:
+            job.set_status(Job.DONE, result)
+
+        if self._on_finished:
+            try:
+                self._on_finished(job)
+            except Exception as e:
+                print(f"[任务队列] 任务结束回调出错: {e}")
+
+    def _run_speed_test(self, job: Job) -> tuple:
+        """执行网速测试任务"""
+        model = SpeedTestModel(sample_callback=job.add_sample)
+        try:
+            result = model.run_test(job.type, is_cancelled=lambda: job.cancel_requested)
+            return result, model.get_last_error()
+        finally:
+            model.cleanup()
+
+    def _run_ip_query(self, job: Job) -> tuple:
+        """执行IP查询任务"""
+        model = IPModel()
+        if job.type == 'ip_lookup':
+            info = model.get_ip_info(job.params['ip'])
+            return info, None if info else '查询IP信息失败'
+
+        ip = model.get_current_ip()
+        if not ip:
+            return None, '获取IP地址失败'
+        if job.type == 'ip':
+            return {'ip': ip}, None
+        info = model.get_ip_info(ip)
+        return info, None if info else '获取IP信息失败'
+
+    def shutdown(self):
+        """停止队列（排队中的任务不再执行）"""
+        for job in self.list():
+            if job.status == Job.QUEUED:
+                job.cancel()
+        self._bandwidth_queue.put(None)
+        self._light_pool.shutdown(wait=False)
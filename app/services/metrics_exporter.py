@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""
+Metrics Exporter
+Prometheus/OpenMetrics指标导出 - 抓取请求只读取内存快照，不会触发测试
+"""
+
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+from ..models.history_model import HistoryModel
+
+
+def _escape_label(value) -> str:
+    """
+    转义OpenMetrics标签值
+
+    Args:
+        value: 标签值
+
+    Returns:
+        str: 转义后的文本
+    """
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Dict) -> str:
+    """格式化标签集合"""
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape_label(value)}"' for key, value in labels.items()) + '}'
+
+
+class MetricsRegistry:
+    """
+    测试指标注册表
+
+    保存最近一次各类测试的结果和运行计数。渲染后的文本会被缓存，
+    只有新结果写入后才重新生成，因此高频抓取的开销只是一次字符串返回。
+    """
+
+    PREFIX = 'speedtest'
+
+    def __init__(self):
+        """初始化注册表"""
+        self._lock = threading.Lock()
+        self._download: Optional[float] = None
+        self._upload: Optional[float] = None
+        self._ping: Optional[float] = None
+        self._ping_hosts: Dict[str, Optional[float]] = {}
+        self._runs: Dict[Tuple[str, str], int] = {}
+        self._duration_sum: Dict[str, float] = {}
+        self._duration_count: Dict[str, int] = {}
+        self._last_run: Dict[str, float] = {}
+        self._rendered: Optional[str] = None
+
+    def record_result(self, result: Optional[Dict], test_type: str, duration: Optional[float] = None):
+        """
+        记录一次测试结果
+
+        Args:
+            result: 测试结果字典，失败时为None
+            test_type: 测试类型
+            duration: 测试耗时（秒）
+        """
+        with self._lock:
+            status = 'success' if result is not None else 'failure'
+            self._runs[(test_type, status)] = self._runs.get((test_type, status), 0) + 1
+            self._last_run[test_type] = time.time()
+
+            if duration is not None:
+                self._duration_sum[test_type] = self._duration_sum.get(test_type, 0.0) + duration
+                self._duration_count[test_type] = self._duration_count.get(test_type, 0) + 1
+
+            if result is not None:
+                self._apply_values(result)
+
+            self._rendered = None
+
+    def _apply_values(self, result: Dict):
+        """更新最近一次的测量值（调用方需持有锁）"""
+        if result.get('download') is not None:
+            self._download = result['download']
+        if result.get('upload') is not None:
+            self._upload = result['upload']
+        if result.get('ping') is not None:
+            self._ping = result['ping']
+        if result.get('ping_details'):
+            self._ping_hosts = dict(result['ping_details'])
+
+    def seed_from_history(self, history: HistoryModel):
+        """
+        用历史记录中最近的结果初始化测量值（不计入运行次数）
+
+        Args:
+            history: 历史存储
+        """
+        results = history.query(limit=50, include_samples=False)
+        with self._lock:
+            # 从旧到新应用，保证每个字段取最近的值
+            for result in reversed(results):
+                self._apply_values(result)
+            self._rendered = None
+
+    def _render(self) -> str:
+        """生成OpenMetrics文本（调用方需持有锁）"""
+        prefix = self.PREFIX
+        lines: List[str] = []
+
+        def metric(name: str, metric_type: str, help_text: str, samples: List[Tuple[Dict, float]],
+                   suffix: str = ''):
+            if not samples:
+                return
+            lines.append(f'# TYPE {prefix}_{name} {metric_type}')
+            lines.append(f'# HELP {prefix}_{name} {help_text}')
+            for labels, value in samples:
+                lines.append(f'{prefix}_{name}{suffix}{_format_labels(labels)} {value}')
+
+        if self._download is not None:
+            metric('download_mbps', 'gauge', 'Last measured download throughput in Mbps.',
+                   [({}, self._download)])
+        if self._upload is not None:
+            metric('upload_mbps', 'gauge', 'Last measured upload throughput in Mbps.',
+                   [({}, self._upload)])
+        if self._ping is not None:
+            metric('ping_ms', 'gauge', 'Last measured average HTTP latency in milliseconds.',
+                   [({}, self._ping)])
+
+        if self._ping_hosts:
+            metric('ping_host_ms', 'gauge', 'Last measured HTTP latency per host in milliseconds.',
+                   [({'host': host}, value) for host, value in sorted(self._ping_hosts.items())
+                    if value is not None])
+            metric('ping_host_up', 'gauge', 'Whether the host answered the last latency probe.',
+                   [({'host': host}, 1 if value is not None else 0)
+                    for host, value in sorted(self._ping_hosts.items())])
+
+        if self._runs:
+            lines.append(f'# TYPE {prefix}_runs counter')
+            lines.append(f'# HELP {prefix}_runs Number of completed test runs.')
+            for (test_type, status), count in sorted(self._runs.items()):
+                lines.append(f'{prefix}_runs_total{_format_labels({"type": test_type, "result": status})} {count}')
+
+        if self._duration_count:
+            lines.append(f'# TYPE {prefix}_run_duration_seconds summary')
+            lines.append(f'# HELP {prefix}_run_duration_seconds Wall-clock duration of test runs.')
+            for test_type in sorted(self._duration_count):
+                labels = _format_labels({'type': test_type})
+                lines.append(f'{prefix}_run_duration_seconds_sum{labels} {round(self._duration_sum[test_type], 3)}')
+                lines.append(f'{prefix}_run_duration_seconds_count{labels} {self._duration_count[test_type]}')
+
+        metric('last_run_timestamp_seconds', 'gauge', 'Unix time of the last run per test type.',
+               [({'type': test_type}, round(ts, 3)) for test_type, ts in sorted(self._last_run.items())])
+
+        lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+    def render(self) -> str:
+        """
+        获取OpenMetrics格式的指标文本
+
+        Returns:
+            str: 指标文本
+        """
+        with self._lock:
+            if self._rendered is None:
+                self._rendered = self._render()
+            return self._rendered
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """指标HTTP请求处理器"""
+
+    CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+    def do_GET(self):
+        """处理GET请求"""
+        if self.path.split('?', 1)[0] not in ('/metrics', '/'):
+            self.send_error(404)
+            return
+
+        body = self.server.registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', self.CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """关闭默认的访问日志，避免高频抓取刷屏"""
+        pass
+
+
+class MetricsExporter:
+    """Prometheus/OpenMetrics HTTP导出器"""
+
+    def __init__(self, registry: MetricsRegistry, host: str = '0.0.0.0', port: int = 9469):
+        """
+        初始化导出器
+
+        Args:
+            registry: 指标注册表
+            host: 监听地址
+            port: 监听端口（0表示随机端口）
+        """
+        self.registry = registry
+        self._server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        self._server.daemon_threads = True
+        self._server.registry = registry
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        """实际监听的端口"""
+        return self._server.server_address[1]
+
+    def start(self):
+        """在后台线程中启动HTTP服务"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._server.serve_forever, name='MetricsExporter', daemon=True)
+        self._thread.start()
+        print(f"[指标导出] 已在端口 {self.port} 提供 /metrics")
+
+    def stop(self):
+        """停止HTTP服务"""
+        # 未启动时调用shutdown()会一直阻塞
+        if self._thread and self._thread.is_alive():
+            self._server.shutdown()
+            self._thread.join()
+        self._server.server_close()
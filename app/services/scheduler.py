@@ -0,0 +1,352 @@
+# -*- coding: utf-8 -*-
+"""
+Scheduler
+定时测试调度器 - 无界面长期运行，按测试计划周期性测速并写入历史记录
+"""
+
+import time
+import heapq
+import random
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import psutil
+
+from ..models.speedtest_model import SpeedTestModel
+from ..models.history_model import HistoryModel
+from ..models.network_info_model import loopback_interfaces
+
+
+class TestPlan:
+    """测试计划"""
+
+    TEST_TYPES = ('download', 'upload', 'both', 'ping')
+
+    def __init__(self, test_type: str, interval: float, jitter: float = 0,
+                 quiet_hours: Optional[Tuple[str, str]] = None, name: Optional[str] = None):
+        """
+        初始化测试计划
+
+        Args:
+            test_type: 测试类型 ('download', 'upload', 'both', 'ping')
+            interval: 两次测试的间隔（秒）
+            jitter: 随机抖动上限（秒），避免多台机器同时测速
+            quiet_hours: 静默时段 ('HH:MM', 'HH:MM')，可跨越午夜，例如 ('23:00', '07:00')
+            name: 计划名称，默认使用测试类型
+        """
+        if test_type not in self.TEST_TYPES:
+            raise ValueError(f"不支持的测试类型: {test_type}")
+        if interval <= 0:
+            raise ValueError("测试间隔必须大于0")
+
+        self.test_type = test_type
+        self.interval = float(interval)
+        self.jitter = max(0.0, float(jitter))
+        self.quiet_hours = tuple(quiet_hours) if quiet_hours else None
+        self.name = name or test_type
+
+        if self.quiet_hours:
+            # 提前校验格式
+            for value in self.quiet_hours:
+                self._parse_clock(value)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'TestPlan':
+        """
+        从配置字典创建计划
+
+        Args:
+            data: 配置字典，例如 {"type": "ping", "interval": 300, "jitter": 30,
+                  "quiet_hours": ["23:00", "07:00"]}
+
+        Returns:
+            TestPlan: 测试计划
+        """
+        return cls(
+            test_type=data.get('type') or data.get('test_type'),
+            interval=data['interval'],
+            jitter=data.get('jitter', 0),
+            quiet_hours=data.get('quiet_hours'),
+            name=data.get('name')
+        )
+
+    @staticmethod
+    def _parse_clock(value: str) -> int:
+        """
+        解析时刻为当天的分钟数
+
+        Args:
+            value: 'HH:MM' 格式的时刻
+
+        Returns:
+            int: 从零点起的分钟数
+        """
+        try:
+            hour, minute = value.split(':')
+            hour, minute = int(hour), int(minute)
+        except (AttributeError, ValueError):
+            raise ValueError(f"无效的时刻格式: {value}")
+        if not (0 <= hour < 24 and 0 <= minute < 60):
+            raise ValueError(f"无效的时刻: {value}")
+        return hour * 60 + minute
+
+    def quiet_until(self, timestamp: float) -> Optional[float]:
+        """
+        判断时间点是否处于静默时段
+
+        Args:
+            timestamp: Unix时间戳
+
+        Returns:
+            Optional[float]: 处于静默时段时返回静默结束的时间戳，否则返回None
+        """
+        if not self.quiet_hours:
+            return None
+
+        start = self._parse_clock(self.quiet_hours[0])
+        end = self._parse_clock(self.quiet_hours[1])
+        now = datetime.fromtimestamp(timestamp)
+        minute = now.hour * 60 + now.minute
+
+        if start <= end:
+            quiet = start <= minute < end
+        else:
+            quiet = minute >= start or minute < end
+        if not quiet:
+            return None
+
+        # 计算静默结束的时间点（对齐到整分钟）
+        minutes_left = (end - minute) % (24 * 60)
+        seconds_into_minute = now.second + now.microsecond / 1_000_000
+        return timestamp + minutes_left * 60 - seconds_into_minute
+
+    def next_delay(self) -> float:
+        """
+        计算到下一次运行的间隔（含随机抖动）
+
+        Returns:
+            float: 间隔秒数
+        """
+        return self.interval + (random.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    def __repr__(self) -> str:
+        return f"TestPlan(name={self.name!r}, test_type={self.test_type!r}, interval={self.interval})"
+
+
+class TestScheduler:
+    """
+    定时测试调度器
+
+    所有计划由同一个调度线程串行执行，测试之间绝不重叠；
+    测试前检测链路流量，链路繁忙时按指数退避推迟。
+    """
+
+    def __init__(self, plans: List[TestPlan], history: Optional[HistoryModel] = None,
+                 busy_threshold_mbps: float = 5.0, busy_probe_seconds: float = 2.0,
+                 max_backoff: float = 1800, result_callback: Optional[Callable] = None,
+                 log_callback: Optional[Callable] = None):
+        """
+        初始化调度器
+
+        Args:
+            plans: 测试计划列表
+            history: 历史存储，None表示不记录
+            busy_threshold_mbps: 链路繁忙阈值（测试前的背景流量，Mbps），0表示不检测
+            busy_probe_seconds: 检测背景流量的采样时长（秒）
+            max_backoff: 链路繁忙时的最大退避时间（秒）
+            result_callback: 每次测试完成后的回调 result_callback(plan, result, duration)，
+                             失败时result为None
+            log_callback: 日志回调函数
+        """
+        if not plans:
+            raise ValueError("至少需要一个测试计划")
+
+        self.plans = list(plans)
+        self.history = history
+        self.busy_threshold_mbps = busy_threshold_mbps
+        self.busy_probe_seconds = busy_probe_seconds
+        self.max_backoff = max_backoff
+        self._result_callback = result_callback
+        self._log_callback = log_callback
+
+        self._run_lock = threading.Lock()  # 保证测试不重叠
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._backoff: Dict[int, float] = {}
+        self.runs = 0
+        self.failures = 0
+
+    def _log(self, message: str):
+        """输出日志"""
+        print(message)
+        if self._log_callback:
+            self._log_callback(message)
+
+    @staticmethod
+    def _non_loopback_bytes() -> int:
+        """
+        统计非回环网卡的收发字节总数
+
+        Returns:
+            int: 收发字节总数
+        """
+        loopback = loopback_interfaces()
+        total = 0
+        for name, counters in psutil.net_io_counters(pernic=True).items():
+            if name in loopback:
+                continue
+            total += counters.bytes_sent + counters.bytes_recv
+        return total
+
+    def measure_background_traffic(self) -> float:
+        """
+        测量当前链路上的背景流量
+
+        Returns:
+            float: 背景流量(Mbps)
+        """
+        before = self._non_loopback_bytes()
+        start = time.time()
+        self._stop_event.wait(self.busy_probe_seconds)
+        elapsed = max(time.time() - start, 1e-6)
+        return (self._non_loopback_bytes() - before) * 8 / elapsed / 1_000_000
+
+    def _is_link_busy(self) -> bool:
+        """检测链路是否繁忙"""
+        if self.busy_threshold_mbps <= 0:
+            return False
+        try:
+            rate = self.measure_background_traffic()
+        except Exception as e:
+            self._log(f"[调度器] 检测背景流量失败: {e}")
+            return False
+        if rate > self.busy_threshold_mbps:
+            self._log(f"[调度器] 链路繁忙（背景流量 {rate:.1f} Mbps），推迟测试")
+            return True
+        return False
+
+    def run_plan(self, plan: TestPlan) -> Optional[Dict]:
+        """
+        立即执行一次计划（与调度线程共用锁，不会与其他测试重叠）
+
+        Args:
+            plan: 测试计划
+
+        Returns:
+            Optional[Dict]: 测试结果，失败返回None
+        """
+        with self._run_lock:
+            self._log(f"[调度器] 开始执行计划 {plan.name}（{plan.test_type}）")
+            started = time.time()
+            model = SpeedTestModel(log_callback=None)
+            try:
+                result = model.run_test(plan.test_type, is_cancelled=self._stop_event.is_set)
+            except Exception as e:
+                self._log(f"[调度器] 计划 {plan.name} 执行出错: {e}")
+                result = None
+            finally:
+                model.cleanup()
+            duration = time.time() - started
+
+            self.runs += 1
+            if result is None:
+                self.failures += 1
+                self._log(f"[调度器] 计划 {plan.name} 失败: {model.get_last_error() or '已取消'}")
+            else:
+                result['schedule'] = plan.name
+                result['duration'] = round(duration, 1)
+                if self.history:
+                    try:
+                        self.history.add_result(result)
+                    except Exception as e:
+                        self._log(f"[调度器] 保存测试结果失败: {e}")
+                self._log(f"[调度器] 计划 {plan.name} 完成，耗时 {duration:.1f} 秒")
+
+            if self._result_callback:
+                try:
+                    self._result_callback(plan, result, duration)
+                except Exception as e:
+                    self._log(f"[调度器] 结果回调出错: {e}")
+            return result
+
+    def _loop(self):
+        """调度线程主循环"""
+        now = time.time()
+        # 队列元素: (下次运行时间, 计划序号)
+        queue = [(now + random.uniform(0, plan.jitter) if plan.jitter else now, index)
+                 for index, plan in enumerate(self.plans)]
+        heapq.heapify(queue)
+
+        while not self._stop_event.is_set():
+            due, index = queue[0]
+            wait = due - time.time()
+            if wait > 0:
+                self._stop_event.wait(min(wait, 60))
+                continue
+
+            heapq.heappop(queue)
+            plan = self.plans[index]
+
+            quiet_end = plan.quiet_until(time.time())
+            if quiet_end is not None:
+                self._log(f"[调度器] 计划 {plan.name} 处于静默时段，推迟到 "
+                          f"{datetime.fromtimestamp(quiet_end).strftime('%H:%M')}")
+                heapq.heappush(queue, (quiet_end, index))
+                continue
+
+            if self._is_link_busy():
+                backoff = min(self._backoff.get(index, 30.0) * 2, self.max_backoff)
+                self._backoff[index] = backoff
+                heapq.heappush(queue, (time.time() + backoff, index))
+                continue
+            self._backoff.pop(index, None)
+
+            if self._stop_event.is_set():
+                break
+
+            self.run_plan(plan)
+            # 从测试结束时开始计时，长时间测试不会导致积压
+            heapq.heappush(queue, (time.time() + plan.next_delay(), index))
+
+        self._log("[调度器] 已停止")
+
+    def start(self):
+        """在后台线程中启动调度器"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, name='TestScheduler', daemon=True)
+        self._thread.start()
+        self._log(f"[调度器] 已启动，共 {len(self.plans)} 个测试计划")
+
+    def stop(self, timeout: Optional[float] = None):
+        """
+        停止调度器（正在进行的测试会在当前阶段结束后退出）
+
+        Args:
+            timeout: 等待调度线程退出的最长时间（秒）
+        """
+        self._stop_event.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def is_running(self) -> bool:
+        """
+        检查调度器是否在运行
+
+        Returns:
+            bool: 是否在运行
+        """
+        return self._thread is not None and self._thread.is_alive()
+
+    def run_forever(self):
+        """在当前线程阻塞运行调度器，直到Ctrl+C"""
+        self.start()
+        try:
+            while self.is_running():
+                self._thread.join(1.0)
+        except KeyboardInterrupt:
+            self._log("[调度器] 收到中断信号，正在停止...")
+        finally:
+            self.stop()
@@ -0,0 +1,459 @@
+# -*- coding: utf-8 -*-
+"""
+Test Server
+本地参考测速服务器 - 提供大文件流式下载、上传接收和极小的延迟探测接口
+
+接口:
+    GET  /download?bytes=N   流式返回N字节数据（默认约10GB，客户端断开即停止）
+    POST /upload             接收并丢弃请求体（支持Content-Length和chunked），返回接收字节数
+    HEAD /ping、GET /ping    最小响应，用于延迟探测
+
+可选的网络条件模拟（每个连接独立生效）:
+    令牌桶限速、固定延迟、随机抖动、随机停顿和连接重置
+
+用法:
+    python -m app.services.test_server [--host 127.0.0.1] [--port 8080]
+    python -m app.services.test_server --rate-mbps 50 --latency-ms 30 --jitter-ms 5
+"""
+
+import sys
+import json
+import time
+import random
+import socket
+import struct
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+
+from ..utils.token_bucket import TokenBucket
+
+
+class NetworkConditions:
+    """模拟的网络条件"""
+
+    def __init__(self, rate_mbps: Optional[float] = None, total_rate_mbps: Optional[float] = None,
+                 latency_ms: float = 0, jitter_ms: float = 0,
+                 stall_probability: float = 0, stall_seconds: float = 1.0,
+                 reset_probability: float = 0, seed: Optional[int] = None):
+        """
+        初始化网络条件
+
+        Args:
+            rate_mbps: 每个连接的限速(Mbps)，None表示不限速
+            total_rate_mbps: 所有连接共享的总限速(Mbps)，None表示不限速
+            latency_ms: 每个请求在响应前增加的固定延迟(ms)
+            jitter_ms: 延迟的随机抖动幅度(ms)，实际延迟在 latency±jitter 之间均匀分布
+            stall_probability: 传输过程中每秒发生一次停顿的概率
+            stall_seconds: 每次停顿的时长（秒）
+            reset_probability: 传输过程中每秒发生一次连接重置(RST)的概率
+            seed: 随机数种子，便于复现
+        """
+        self.rate_mbps = rate_mbps
+        self.total_rate_mbps = total_rate_mbps
+        self.latency_ms = max(0.0, latency_ms)
+        self.jitter_ms = max(0.0, jitter_ms)
+        self.stall_probability = max(0.0, stall_probability)
+        self.stall_seconds = max(0.0, stall_seconds)
+        self.reset_probability = max(0.0, reset_probability)
+        self.seed = seed
+
+    @property
+    def enabled(self) -> bool:
+        """是否启用了任何模拟"""
+        return bool(self.rate_mbps or self.total_rate_mbps or self.latency_ms or self.jitter_ms
+                    or self.stall_probability or self.reset_probability)
+
+    @staticmethod
+    def bucket_for(rate_mbps: Optional[float]) -> Optional[TokenBucket]:
+        """
+        按速率创建字节令牌桶
+
+        Args:
+            rate_mbps: 速率(Mbps)
+
+        Returns:
+            Optional[TokenBucket]: 令牌桶，未限速返回None
+        """
+        if not rate_mbps:
+            return None
+        rate = rate_mbps * 1_000_000 / 8
+        # 容量约为20ms的数据量，避免开头的突发抬高测速结果
+        return TokenBucket(rate, max(rate / 50, 16 * 1024))
+
+    def to_dict(self) -> Dict:
+        """转换为字典"""
+        return {
+            'rate_mbps': self.rate_mbps,
+            'total_rate_mbps': self.total_rate_mbps,
+            'latency_ms': self.latency_ms,
+            'jitter_ms': self.jitter_ms,
+            'stall_probability': self.stall_probability,
+            'stall_seconds': self.stall_seconds,
+            'reset_probability': self.reset_probability,
+        }
+
+
+class _ConnectionReset(Exception):
+    """模拟的连接重置"""
+
+
+class _TestRequestHandler(BaseHTTPRequestHandler):
+    """测速请求处理器"""
+
+    protocol_version = 'HTTP/1.1'  # 支持长连接
+    server_version = 'SpeedTestReference/1.0'
+
+    # 下载时重复发送的数据块（预先生成，避免每次请求分配内存）
+    BLOCK_SIZE = 1024 * 1024
+    _BLOCK = memoryview(bytes(range(256)) * (BLOCK_SIZE // 256))
+    DEFAULT_DOWNLOAD_BYTES = 10 * 1024 ** 3
+    # 限速时每次读写的数据量（越小速率越平滑）
+    PACED_BLOCK_SIZE = 16 * 1024
+
+    def setup(self):
+        """每个连接建立时初始化独立的限速器和随机数"""
+        super().setup()
+        conditions: NetworkConditions = self.server.conditions
+        self._bucket = NetworkConditions.bucket_for(conditions.rate_mbps)
+        self._random = random.Random(self.server.next_seed())
+        self._last_fault_check = time.monotonic()
+
+    def handle_one_request(self):
+        """处理单个请求，模拟的连接重置会直接结束连接"""
+        try:
+            super().handle_one_request()
+        except _ConnectionReset:
+            self.close_connection = True
+
+    def _apply_latency(self):
+        """在响应前增加模拟延迟"""
+        conditions: NetworkConditions = self.server.conditions
+        delay = conditions.latency_ms
+        if conditions.jitter_ms:
+            delay += self._random.uniform(-conditions.jitter_ms, conditions.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+    def _throttle(self, size: int):
+        """
+        按限速等待并注入停顿/重置
+
+        Args:
+            size: 即将传输的字节数
+        """
+        if self._bucket:
+            self._bucket.consume(size)
+        total_bucket = self.server.total_bucket
+        if total_bucket:
+            total_bucket.consume(size)
+
+        conditions: NetworkConditions = self.server.conditions
+        if not (conditions.stall_probability or conditions.reset_probability):
+            return
+        now = time.monotonic()
+        elapsed = now - self._last_fault_check
+        self._last_fault_check = now
+        # 把“每秒概率”换算为本次间隔内的概率
+        if self._random.random() < conditions.reset_probability * elapsed:
+            self._reset_connection()
+        if self._random.random() < conditions.stall_probability * elapsed:
+            time.sleep(conditions.stall_seconds)
+            self._last_fault_check = time.monotonic()
+
+    def _reset_connection(self):
+        """以RST方式中断连接"""
+        try:
+            self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+            self.connection.close()
+        except OSError:
+            pass
+        raise _ConnectionReset()
+
+    @property
+    def _block_size(self) -> int:
+        """当前条件下每次读写的数据量"""
+        conditions: NetworkConditions = self.server.conditions
+        return self.PACED_BLOCK_SIZE if conditions.enabled else self.BLOCK_SIZE
+
+    def _send_small(self, status: int, body: bytes = b'', content_type: str = 'text/plain'):
+        """发送小响应"""
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if body and self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def _query(self) -> Tuple[str, Dict[str, List[str]]]:
+        """解析路径和查询参数"""
+        parsed = urlparse(self.path)
+        return parsed.path, parse_qs(parsed.query)
+
+    def do_HEAD(self):
+        """延迟探测"""
+        self._apply_latency()
+        path, _ = self._query()
+        if path in ('/ping', '/'):
+            self._send_small(200)
+        else:
+            self._send_small(404)
+
+    def do_GET(self):
+        """下载测试和延迟探测"""
+        self._apply_latency()
+        path, query = self._query()
+        if path in ('/ping', '/'):
+            self._send_small(200, b'pong')
+        elif path == '/download':
+            total = int(query.get('bytes', [self.DEFAULT_DOWNLOAD_BYTES])[0])
+            self._stream_download(total)
+        else:
+            self._send_small(404, b'not found')
+
+    def do_POST(self):
+        """上传测试（接收并丢弃数据）"""
+        path, _ = self._query()
+        if path != '/upload':
+            self._send_small(404, b'not found')
+            return
+
+        self._apply_latency()
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            received = self._drain_chunked()
+        else:
+            received = self._drain(int(self.headers.get('Content-Length', 0)))
+
+        body = json.dumps({'bytes': received}).encode('utf-8')
+        self._send_small(200, body, 'application/json')
+
+    def _stream_download(self, total: int):
+        """
+        流式发送指定字节数的数据
+
+        Args:
+            total: 字节数
+        """
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Length', str(total))
+        self.end_headers()
+
+        block = self._BLOCK[:self._block_size]
+        throttled = self.server.conditions.enabled
+        remaining = total
+        try:
+            while remaining > 0:
+                size = min(remaining, len(block))
+                if throttled:
+                    self._throttle(size)
+                self.wfile.write(block[:size])
+                remaining -= size
+        except (BrokenPipeError, ConnectionResetError):
+            # 客户端限时测试结束后主动断开
+            self.close_connection = True
+
+    def _drain(self, length: int) -> int:
+        """
+        读取并丢弃指定长度的请求体
+
+        Args:
+            length: 字节数
+
+        Returns:
+            int: 实际读取的字节数
+        """
+        received = 0
+        block_size = self._block_size
+        throttled = self.server.conditions.enabled
+        while received < length:
+            if throttled:
+                self._throttle(min(block_size, length - received))
+            data = self.rfile.read(min(block_size, length - received))
+            if not data:
+                break
+            received += len(data)
+        return received
+
+    def _drain_chunked(self) -> int:
+        """
+        读取并丢弃chunked编码的请求体
+
+        Returns:
+            int: 实际读取的数据字节数（不含分块头）
+        """
+        received = 0
+        while True:
+            line = self.rfile.readline(1024)
+            if not line:
+                break
+            size = int(line.split(b';', 1)[0].strip() or b'0', 16)
+            if size == 0:
+                # 读取结尾的trailer直到空行
+                while self.rfile.readline(1024) not in (b'\r\n', b'\n', b''):
+                    pass
+                break
+            received += self._drain(size)
+            self.rfile.readline(1024)  # 分块结尾的CRLF
+        return received
+
+    def log_message(self, format, *args):
+        """关闭访问日志，避免影响测速吞吐"""
+        pass
+
+
+def speedtest_options(base_url: str) -> Dict:
+    """
+    生成指向参考服务器的SimpleSpeedTest参数
+
+    Args:
+        base_url: 服务器根地址，例如 http://127.0.0.1:8080
+
+    Returns:
+        Dict: download_urls/upload_urls/ping_hosts参数
+    """
+    return {
+        'download_urls': [(f'{base_url}/download', 'stream', '本地参考服务器')],
+        'upload_urls': [(f'{base_url}/upload', '本地参考服务器')],
+        'ping_hosts': [(f'{base_url}/ping', '本地参考服务器')],
+    }
+
+
+class _DualStackHTTPServer(ThreadingHTTPServer):
+    """监听IPv6地址的服务器（监听 :: 时同时接受IPv4连接，用于双栈测试）"""
+
+    address_family = socket.AF_INET6
+
+    def server_bind(self):
+        try:
+            self.socket.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_V6ONLY, 0)
+        except (AttributeError, OSError):
+            pass
+        super().server_bind()
+
+
+class ReferenceServer:
+    """本地参考测速服务器"""
+
+    handler_class = _TestRequestHandler
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0,
+                 conditions: Optional[NetworkConditions] = None):
+        """
+        初始化服务器
+
+        Args:
+            host: 监听地址
+            port: 监听端口（0表示随机端口）
+            conditions: 模拟的网络条件，None表示不模拟
+        """
+        self.conditions = conditions or NetworkConditions()
+        server_class = _DualStackHTTPServer if ':' in host else ThreadingHTTPServer
+        self._server = server_class((host, port), self.handler_class)
+        self._server.daemon_threads = True
+        self._server.conditions = self.conditions
+        self._server.total_bucket = NetworkConditions.bucket_for(self.conditions.total_rate_mbps)
+        seeds = random.Random(self.conditions.seed)
+        seeds_lock = threading.Lock()
+
+        def next_seed() -> int:
+            with seeds_lock:
+                return seeds.getrandbits(32)
+
+        self._server.next_seed = next_seed
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def host(self) -> str:
+        """监听地址"""
+        return self._server.server_address[0]
+
+    @property
+    def port(self) -> int:
+        """实际监听的端口"""
+        return self._server.server_address[1]
+
+    @property
+    def base_url(self) -> str:
+        """服务器根地址"""
+        host = self.host
+        if ':' in host:
+            host = f'[{host}]'
+        return f'http://{host}:{self.port}'
+
+    def speedtest_options(self) -> Dict:
+        """
+        生成指向本服务器的SimpleSpeedTest参数
+
+        Returns:
+            Dict: download_urls/upload_urls/ping_hosts参数
+        """
+        return speedtest_options(self.base_url)
+
+    def start(self):
+        """在后台线程中启动服务器"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._server.serve_forever, name='ReferenceServer', daemon=True)
+        self._thread.start()
+
+    def serve_forever(self):
+        """在当前线程阻塞运行服务器"""
+        self._server.serve_forever()
+
+    def stop(self):
+        """停止服务器"""
+        # 未启动时调用shutdown()会一直阻塞
+        if self._thread and self._thread.is_alive():
+            self._server.shutdown()
+            self._thread.join()
+        self._server.server_close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    独立运行参考服务器
+
+    Args:
+        argv: 命令行参数
+
+    Returns:
+        int: 退出代码
+    """
+    parser = argparse.ArgumentParser(prog='python -m app.services.test_server',
+                                     description='本地参考测速服务器')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址（:: 表示同时监听IPv4和IPv6）')
+    parser.add_argument('--port', type=int, default=8080, help='监听端口（0表示随机端口）')
+    parser.add_argument('--rate-mbps', type=float, help='每个连接的限速(Mbps)')
+    parser.add_argument('--total-rate-mbps', type=float, help='所有连接共享的总限速(Mbps)')
+    parser.add_argument('--latency-ms', type=float, default=0, help='每个请求增加的延迟(ms)')
+    parser.add_argument('--jitter-ms', type=float, default=0, help='延迟抖动幅度(ms)')
+    parser.add_argument('--stall-probability', type=float, default=0, help='传输中每秒发生停顿的概率')
+    parser.add_argument('--stall-seconds', type=float, default=1.0, help='每次停顿的时长（秒）')
+    parser.add_argument('--reset-probability', type=float, default=0, help='传输中每秒发生连接重置的概率')
+    parser.add_argument('--seed', type=int, help='随机数种子')
+    args = parser.parse_args(argv)
+
+    conditions = NetworkConditions(
+        rate_mbps=args.rate_mbps, total_rate_mbps=args.total_rate_mbps,
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        stall_probability=args.stall_probability, stall_seconds=args.stall_seconds,
+        reset_probability=args.reset_probability, seed=args.seed
+    )
+    server = ReferenceServer(args.host, args.port, conditions)
+    print(f"[测试服务器] 已在 {server.base_url} 启动", flush=True)
+    if conditions.enabled:
+        print(f"[测试服务器] 网络条件模拟: {json.dumps(conditions.to_dict())}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
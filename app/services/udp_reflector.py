@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""
+UDP Reflector
+UDP反射服务器 - 统计UDP测试数据报的到达情况（按会话和阶段），按要求回显数据报，并在请求时返回统计报告
+
+可选的网络条件模拟（对每个到达的数据报生效）:
+    随机丢弃、固定延迟、随机抖动（抖动大于发送间隔时自然产生乱序）
+
+用法:
+    python -m app.services.udp_reflector [--host 0.0.0.0] [--port 9000]
+    python -m app.services.udp_reflector --drop 0.01 --latency-ms 20 --jitter-ms 5
+"""
+
+import sys
+import json
+import time
+import heapq
+import random
+import socket
+import argparse
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from ..models.udp_test import (HEADER, MAGIC, VERSION, KIND_DATA, KIND_ECHO, KIND_REPORT,
+                               KIND_REPORT_REQUEST, FLAG_ECHO, REPORT_REQUEST_SIZE, MAX_STEPS,
+                               UDPStreamStats)
+
+
+class UDPReflector:
+    """
+    UDP反射服务器
+
+    单线程处理：接收到的数据报按模拟延迟放入到期队列，到期后才计入统计和回显，
+    因此统计到的抖动、丢包和乱序与经过真实网络时的表现一致。
+    """
+
+    # 会话无新数据报后保留统计的时间（秒）
+    SESSION_TTL = 60.0
+    # 同时保留的会话数上限，已满时新会话的数据报被忽略（每个阶段的统计最多约8KB）
+    MAX_SESSIONS = 256
+    # 模拟延迟的到期队列长度上限，已满时新到的数据报被丢弃
+    MAX_PENDING = 100000
+    # 接收缓冲区大小，避免高码率测试时在服务器本机丢包
+    RECEIVE_BUFFER = 4 * 1024 * 1024
+
+    def __init__(self, host: str = '0.0.0.0', port: int = 9000, drop_probability: float = 0,
+                 latency_ms: float = 0, jitter_ms: float = 0, seed: Optional[int] = None):
+        """
+        初始化服务器
+
+        Args:
+            host: 监听地址（:: 表示同时监听IPv4和IPv6）
+            port: 监听端口（0表示随机端口）
+            drop_probability: 模拟丢弃数据报的概率
+            latency_ms: 模拟的固定延迟(ms)
+            jitter_ms: 模拟延迟的随机抖动幅度(ms)，实际延迟在 latency±jitter 之间均匀分布
+            seed: 随机数种子，便于复现
+        """
+        self.drop_probability = max(0.0, drop_probability)
+        self.latency = max(0.0, latency_ms) / 1000
+        self.jitter = max(0.0, jitter_ms) / 1000
+        self._random = random.Random(seed)
+        family = socket.AF_INET6 if ':' in host else socket.AF_INET
+        self._sock = socket.socket(family, socket.SOCK_DGRAM)
+        if family == socket.AF_INET6:
+            try:
+                self._sock.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_V6ONLY, 0)
+            except (AttributeError, OSError):
+                pass
+        try:
+            self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.RECEIVE_BUFFER)
+        except OSError:
+            pass
+        self._sock.bind((host, port))
+        # 会话 -> (最后更新时间, {阶段: 统计})
+        self._sessions: Dict[int, Tuple[float, Dict[int, UDPStreamStats]]] = {}
+        # 到期队列: (到期时间, 序号, 数据报, 来源地址)
+        self._pending: List[Tuple[float, int, bytes, tuple]] = []
+        self._counter = 0
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def host(self) -> str:
+        """监听地址"""
+        return self._sock.getsockname()[0]
+
+    @property
+    def port(self) -> int:
+        """实际监听的端口"""
+        return self._sock.getsockname()[1]
+
+    @property
+    def address(self) -> str:
+        """服务器地址（host:port，可直接作为客户端的server参数）"""
+        host = self.host
+        if ':' in host:
+            host = f'[{host}]'
+        return f'{host}:{self.port}'
+
+    def _process(self, data: bytes, source: tuple, arrival: float):
+        """
+        处理一个（模拟延迟后）到达的数据报
+
+        Args:
+            data: 数据报
+            source: 来源地址
+            arrival: 到达时间
+        """
+        magic, version, kind, flags, step, session, seq, sent = HEADER.unpack_from(data)
+        if kind == KIND_DATA:
+            if step >= MAX_STEPS:
+                return
+            if session not in self._sessions and len(self._sessions) >= self.MAX_SESSIONS:
+                return
+            _, steps = self._sessions.get(session, (arrival, {}))
+            self._sessions[session] = (arrival, steps)
+            stats = steps.get(step)
+            if stats is None:
+                stats = steps[step] = UDPStreamStats()
+            stats.record(seq, sent, arrival, len(data))
+            if flags & FLAG_ECHO:
+                reply = bytearray(data)
+                HEADER.pack_into(reply, 0, MAGIC, VERSION, KIND_ECHO, flags, step, session, seq, sent)
+                self._send(reply, source)
+        elif kind == KIND_REPORT_REQUEST and len(data) >= REPORT_REQUEST_SIZE:
+            _, steps = self._sessions.get(session, (arrival, {}))
+            report = json.dumps({'steps': {str(step): stats.to_dict() for step, stats in steps.items()}},
+                                separators=(',', ':')).encode('utf-8')
+            self._send(HEADER.pack(MAGIC, VERSION, KIND_REPORT, 0, 0, session, 0, sent) + report, source)
+
+    def _send(self, data: bytes, target: tuple):
+        """发送数据报，发送缓冲区满等错误时丢弃"""
+        try:
+            self._sock.sendto(data, target)
+        except OSError:
+            pass
+
+    def _expire_sessions(self, now: float):
+        """删除长时间没有新数据报的会话"""
+        expired = [session for session, (updated, _) in self._sessions.items()
+                   if now - updated > self.SESSION_TTL]
+        for session in expired:
+            del self._sessions[session]
+
+    def serve_forever(self):
+        """在当前线程阻塞运行服务器，直到调用stop()"""
+        last_sweep = time.perf_counter()
+        while not self._stop_event.is_set():
+            now = time.perf_counter()
+            while self._pending and self._pending[0][0] <= now:
+                due, _, data, source = heapq.heappop(self._pending)
+                self._process(data, source, due)
+            if now - last_sweep >= 1.0:
+                self._expire_sessions(now)
+                last_sweep = now
+
+            timeout = 0.2 if not self._pending else max(0.0, self._pending[0][0] - now)
+            self._sock.settimeout(timeout)
+            try:
+                data, source = self._sock.recvfrom(65535)
+            except socket.timeout:
+                continue
+            except OSError:
+                # Windows上对端不可达(ICMP)会让recvfrom报错，忽略后继续
+                if self._stop_event.is_set():
+                    break
+                continue
+            arrival = time.perf_counter()
+            if len(data) < HEADER.size or data[:len(MAGIC)] != MAGIC or data[len(MAGIC)] != VERSION:
+                continue
+            if data[len(MAGIC) + 1] == KIND_DATA and self._random.random() < self.drop_probability:
+                continue
+            delay = self.latency
+            if self.jitter:
+                delay = max(0.0, delay + self._random.uniform(-self.jitter, self.jitter))
+            if delay <= 0 and not self._pending:
+                self._process(data, source, arrival)
+            elif len(self._pending) < self.MAX_PENDING:
+                self._counter += 1
+                heapq.heappush(self._pending, (arrival + delay, self._counter, data, source))
+
+    def start(self):
+        """在后台线程中启动服务器"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self.serve_forever, name='UDPReflector', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止服务器"""
+        self._stop_event.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join()
+        self._sock.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    独立运行UDP反射服务器
+
+    Args:
+        argv: 命令行参数
+
+    Returns:
+        int: 退出代码
+    """
+    parser = argparse.ArgumentParser(prog='python -m app.services.udp_reflector',
+                                     description='UDP测试反射服务器')
+    parser.add_argument('--host', default='0.0.0.0', help='监听地址（:: 表示同时监听IPv4和IPv6）')
+    parser.add_argument('--port', type=int, default=9000, help='监听端口（0表示随机端口）')
+    parser.add_argument('--drop', type=float, default=0, help='模拟丢弃数据报的概率')
+    parser.add_argument('--latency-ms', type=float, default=0, help='模拟的固定延迟(ms)')
+    parser.add_argument('--jitter-ms', type=float, default=0, help='模拟的延迟抖动幅度(ms)')
+    parser.add_argument('--seed', type=int, help='随机数种子')
+    args = parser.parse_args(argv)
+
+    server = UDPReflector(args.host, args.port, args.drop, args.latency_ms, args.jitter_ms, args.seed)
+    print(f"[UDP反射服务器] 已在 {server.address} 启动", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+"""
+Utils Package
+通用工具包（不依赖Qt）
+"""
+
+from .paths import get_data_dir
+from .token_bucket import TokenBucket
+
+__all__ = ['get_data_dir', 'TokenBucket']
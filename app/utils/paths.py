@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+"""
+Paths
+应用数据目录定位
+"""
+
+import os
+import platform
+
+
+# 环境变量可覆盖默认数据目录
+DATA_DIR_ENV = 'SPEEDTEST_DATA_DIR'
+
+
+def get_data_dir() -> str:
+    """
+    获取应用数据目录（不存在时自动创建）
+    
+    优先使用环境变量 SPEEDTEST_DATA_DIR，否则 Windows 下使用 %APPDATA%\\InternetSpeedTest，
+    其他平台使用 ~/.internet-speed-test
+    
+    Returns:
+        str: 数据目录的绝对路径
+    """
+    data_dir = os.environ.get(DATA_DIR_ENV)
+    if not data_dir:
+        if platform.system() == 'Windows' and os.environ.get('APPDATA'):
+            data_dir = os.path.join(os.environ['APPDATA'], 'InternetSpeedTest')
+        else:
+            data_dir = os.path.join(os.path.expanduser('~'), '.internet-speed-test')
+            
+    data_dir = os.path.abspath(data_dir)
+    os.makedirs(data_dir, exist_ok=True)
+    return data_dir
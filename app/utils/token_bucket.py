@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Token Bucket
+令牌桶限速器（线程安全）
+"""
+
+import time
+import threading
+
+
+class TokenBucket:
+    """
+    令牌桶
+
+    令牌按固定速率补充，容量上限为burst。令牌不足时允许余额为负，
+    调用方按欠额睡眠，这样多个线程共用一个桶时会自然排队，总速率不超过设定值。
+    """
+
+    def __init__(self, rate: float, burst: float):
+        """
+        初始化令牌桶
+
+        Args:
+            rate: 每秒补充的令牌数（如字节/秒、请求/秒）
+            burst: 桶容量（允许的瞬时突发量）
+        """
+        if rate <= 0:
+            raise ValueError("令牌补充速率必须大于0")
+        self.rate = float(rate)
+        self.burst = max(float(burst), 1.0)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        """按经过的时间补充令牌（调用方需持有锁）"""
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float = 1.0) -> float:
+        """
+        预订令牌，不阻塞
+
+        Args:
+            amount: 需要的令牌数
+
+        Returns:
+            float: 调用方需要等待的秒数（0表示可立即使用）
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= amount
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def consume(self, amount: float = 1.0) -> float:
+        """
+        获取令牌，不足时阻塞等待
+
+        Args:
+            amount: 需要的令牌数
+
+        Returns:
+            float: 实际等待的秒数
+        """
+        wait = self.reserve(amount)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def try_consume(self, amount: float = 1.0) -> bool:
+        """
+        尝试获取令牌，不足时立即返回
+
+        Args:
+            amount: 需要的令牌数
+
+        Returns:
+            bool: 是否获取成功
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens < amount:
+                return False
+            self._tokens -= amount
+            return True
@@ -14,6 +14,7 @@ from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton,
                                QLabel, QWidget)
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QFont
+from ..models.sample_series import SampleSeries
 
 
 class SpeedChartCanvas(FigureCanvas):
@@ -70,6 +71,53 @@ class SpeedChartCanvas(FigureCanvas):
         self.fig.tight_layout()
         self.draw()
         
+    def plot_speed_timeline(self, series_map, max_points=600):
+        """
+        绘制每秒速度曲线（长序列先降采样再绘制）
+        
+        Args:
+            series_map: {名称: 每秒速度序列(Mbps)}
+            max_points: 每条曲线最多绘制的点数
+        """
+        self.fig.clear()
+        ax = self.fig.add_subplot(111)
+        
+        colors = ['#4CAF50', '#2196F3']
+        plotted = False
+        for (name, series), color in zip(series_map.items(), colors):
+            if not isinstance(series, SampleSeries):
+                series = SampleSeries(series or [])
+            if not series:
+                continue
+            view = series.downsample(max_points, mode='minmax')
+            speeds_mb = [value / 8 for value in view.values]
+            ax.plot(list(view.timestamps), speeds_mb, color=color, linewidth=2, label=name)
+            plotted = True
+            
+        if not plotted:
+            ax.text(0.5, 0.5, '暂无速度曲线数据', 
+                   ha='center', va='center', fontsize=14)
+            self.draw()
+            return
+        
+        # 设置标题和标签
+        ax.set_title('每秒速度曲线', fontsize=16, fontweight='bold', pad=20)
+        ax.set_xlabel('时间 (秒)', fontsize=12)
+        ax.set_ylabel('速度 (MB/s)', fontsize=12)
+        ax.set_ylim(bottom=0)
+        ax.legend()
+        
+        # 网格
+        ax.grid(True, alpha=0.3, linestyle='--')
+        ax.set_axisbelow(True)
+        
+        # 美化
+        ax.spines['top'].set_visible(False)
+        ax.spines['right'].set_visible(False)
+        
+        self.fig.tight_layout()
+        self.draw()
+        
     def plot_ping_details(self, ping_details):
         """
         绘制Ping延迟详情图
@@ -230,6 +278,12 @@ class ChartDialog(QDialog):
             self.speed_btn.setMinimumHeight(40)
             button_layout.addWidget(self.speed_btn)
         
+        if 'download_stats' in self.result_data or 'upload_stats' in self.result_data:
+            self.timeline_btn = QPushButton("📉 速度曲线")
+            self.timeline_btn.clicked.connect(self._show_timeline_chart)
+            self.timeline_btn.setMinimumHeight(40)
+            button_layout.addWidget(self.timeline_btn)
+        
         if 'ping_details' in self.result_data:
             self.ping_btn = QPushButton("📊 Ping详情")
             self.ping_btn.clicked.connect(self._show_ping_chart)
@@ -249,6 +303,8 @@ class ChartDialog(QDialog):
         """显示图表"""
         if 'download' in self.result_data and 'upload' in self.result_data:
             self._show_speed_chart()
+        elif 'download_stats' in self.result_data or 'upload_stats' in self.result_data:
+            self._show_timeline_chart()
         elif 'ping_details' in self.result_data:
             self._show_ping_chart()
             
@@ -258,6 +314,15 @@ class ChartDialog(QDialog):
         upload = self.result_data.get('upload', 0)
         self.canvas.plot_speed_comparison(download, upload)
         
+    def _show_timeline_chart(self):
+        """显示每秒速度曲线"""
+        series_map = {}
+        if 'download_stats' in self.result_data:
+            series_map['下载速度'] = self.result_data['download_stats'].get('speeds')
+        if 'upload_stats' in self.result_data:
+            series_map['上传速度'] = self.result_data['upload_stats'].get('speeds')
+        self.canvas.plot_speed_timeline(series_map)
+        
     def _show_ping_chart(self):
         """显示Ping详情图"""
         ping_details = self.result_data.get('ping_details', {})
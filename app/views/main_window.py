@@ -99,6 +99,7 @@ class MainWindow(QMainWindow):
         self.both_btn = QPushButton("完整速度测试")
         self.ping_btn = QPushButton("Ping 测试")
         self.ip_info_btn = QPushButton("IP 信息")
+        self.udp_btn = QPushButton("UDP 抖动/丢包测试")
         
         # 设置按钮大小
         self.download_btn.setFixedSize(150, 50)
@@ -106,6 +107,7 @@ class MainWindow(QMainWindow):
         self.both_btn.setFixedSize(150, 50)
         self.ping_btn.setFixedSize(150, 50)
         self.ip_info_btn.setFixedSize(150, 50)
+        self.udp_btn.setFixedHeight(50)
         
         # 添加按钮到网格
         button_layout.addWidget(self.download_btn, 0, 0)
@@ -113,6 +115,7 @@ class MainWindow(QMainWindow):
         button_layout.addWidget(self.both_btn, 1, 0, 1, 2)  # 跨两列
         button_layout.addWidget(self.ping_btn, 2, 0)
         button_layout.addWidget(self.ip_info_btn, 2, 1)
+        button_layout.addWidget(self.udp_btn, 3, 0, 1, 2)  # 跨两列
         
         # 底部按钮
         bottom_layout = QHBoxLayout()
@@ -146,6 +149,7 @@ class MainWindow(QMainWindow):
         self.upload_btn.clicked.connect(lambda: self._start_speed_test('upload'))
         self.both_btn.clicked.connect(lambda: self._start_speed_test('both'))
         self.ping_btn.clicked.connect(lambda: self._start_speed_test('ping'))
+        self.udp_btn.clicked.connect(lambda: self._start_speed_test('udp'))
         self.ip_info_btn.clicked.connect(self._show_ip_menu)
         self.network_info_btn.clicked.connect(self._show_network_info)
         self.chart_btn.clicked.connect(self._show_chart)
@@ -273,7 +277,25 @@ class MainWindow(QMainWindow):
         """
         lines = []
         
-        if 'download' in result and 'upload' in result:
+        if result.get('test_type') == 'udp':
+            udp = result['udp']
+            lines.append("UDP测试完成！\n")
+            lines.append("=" * 50)
+            lines.append(f"服务器: {udp['server']}（{'阶梯递增' if udp['mode'] == 'ramp' else '恒定码率'}）")
+            lines.append(f"发送速率: {udp['offered_mbps']} Mbps")
+            if udp['report_received']:
+                lines.append(f"到达速率: {udp['achieved_mbps']} Mbps")
+                lines.append(f"丢包率: {udp['loss_percent']}%（{udp['lost']}/{udp['sent']}）")
+                lines.append(f"单向抖动: {udp['jitter_ms']} ms")
+                lines.append(f"乱序: {udp['reordered']}")
+                if udp.get('max_clean_rate_mbps') is not None:
+                    lines.append(f"无明显丢包的最高码率: {udp['max_clean_rate_mbps']} Mbps")
+            else:
+                lines.append("⚠️ 未收到服务器统计报告，只有往返数据")
+            if udp.get('rtt_avg_ms') is not None:
+                lines.append(f"往返时间: {udp['rtt_avg_ms']} ms，往返抖动: {udp['rtt_jitter_ms']} ms")
+            lines.append("=" * 50)
+        elif 'download' in result and 'upload' in result:
             lines.append("完整网速测试完成！\n")
             lines.append("=" * 50)
             lines.append("📥 下载速度:")
@@ -334,6 +356,11 @@ class MainWindow(QMainWindow):
                     else:
                         lines.append(f"  {name}: 超时")
             
+        if result.get('client_limited'):
+            lines.append("⚠️ 测试期间本机CPU已饱和，结果可能受本机性能限制而非网络带宽")
+        if result.get('background_traffic'):
+            lines.append("⚠️ 网卡计数器显示测试期间存在其他流量，结果可能偏低")
+            
         if 'timestamp' in result:
             lines.append(f"测试时间: {result['timestamp']}")
             
@@ -380,6 +407,7 @@ class MainWindow(QMainWindow):
         self.both_btn.setEnabled(enabled)
         self.ping_btn.setEnabled(enabled)
         self.ip_info_btn.setEnabled(enabled)
+        self.udp_btn.setEnabled(enabled)
         
     def _show_ip_menu(self):
         """显示IP信息菜单"""
@@ -7,9 +7,10 @@ Network Info Dialog View
 from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QTabWidget,
                                QTextEdit, QPushButton, QLabel, QWidget, QTableWidget,
                                QTableWidgetItem, QHeaderView)
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QTimer
 from PySide6.QtGui import QFont
 from ..models.network_info_model import NetworkInfoModel
+from ..controllers.network_info_controller import NetworkInfoController
 
 
 class NetworkInfoDialog(QDialog):
@@ -24,8 +25,22 @@ class NetworkInfoDialog(QDialog):
         self.setMinimumSize(800, 600)
         self.setModal(False)
         
+        # 实时带宽监控：定时器只更新表格中变化的单元格，不重新加载整个对话框
+        self._bandwidth_monitor = self.model.create_bandwidth_monitor()
+        self._live_rows = {}  # 网卡名称 -> 表格行号
+        self._live_timer = QTimer(self)
+        self._live_timer.setInterval(1000)
+        self._live_timer.timeout.connect(self._update_live_stats)
+        
+        # 各项信息在后台线程中并发加载，加载完成的标签页先显示
+        self._pending = set()
+        self._controller = NetworkInfoController()
+        self._controller.data_loaded.connect(self._on_data_loaded)
+        self._controller.load_failed.connect(self._on_load_failed)
+        
         self._init_ui()
         self._load_data()
+        self._live_timer.start()
         
     def _init_ui(self):
         """初始化UI"""
@@ -67,12 +82,17 @@ class NetworkInfoDialog(QDialog):
         
         layout.addWidget(self.tab_widget)
         
+        # 加载状态
+        self.status_label = QLabel("")
+        self.status_label.setStyleSheet("color: #666;")
+        layout.addWidget(self.status_label)
+        
         # 按钮区域
         button_layout = QHBoxLayout()
         button_layout.addStretch()
         
         refresh_btn = QPushButton("🔄 刷新")
-        refresh_btn.clicked.connect(self._load_data)
+        refresh_btn.clicked.connect(lambda: self._load_data(force=True))
         refresh_btn.setMinimumHeight(40)
         button_layout.addWidget(refresh_btn)
         
@@ -115,10 +135,25 @@ class NetworkInfoDialog(QDialog):
         """初始化网络统计标签页"""
         layout = QVBoxLayout(self.stats_widget)
         
+        live_label = QLabel("实时网卡速率（每秒刷新）")
+        layout.addWidget(live_label)
+        
+        self.live_table = QTableWidget()
+        self.live_table.setColumnCount(8)
+        self.live_table.setHorizontalHeaderLabels(
+            ['网卡', '下载', '上传', '接收包/秒', '发送包/秒', '错误/秒', '丢弃/秒', '峰值(下载/上传)'])
+        self.live_table.verticalHeader().setVisible(False)
+        self.live_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        header = self.live_table.horizontalHeader()
+        header.setSectionResizeMode(0, QHeaderView.Stretch)
+        for column in range(1, 8):
+            header.setSectionResizeMode(column, QHeaderView.ResizeToContents)
+        layout.addWidget(self.live_table, 1)
+        
         self.stats_text = QTextEdit()
         self.stats_text.setReadOnly(True)
         self.stats_text.setFont(QFont("Consolas", 10))
-        layout.addWidget(self.stats_text)
+        layout.addWidget(self.stats_text, 1)
         
     def _init_dns_tab(self):
         """初始化DNS服务器标签页"""
@@ -129,17 +164,72 @@ class NetworkInfoDialog(QDialog):
         self.dns_text.setFont(QFont("Consolas", 11))
         layout.addWidget(self.dns_text)
         
-    def _load_data(self):
-        """加载数据"""
-        self._load_adapters()
-        self._load_proxy()
-        self._load_stats()
-        self._load_dns()
-        
-    def _load_adapters(self):
-        """加载网络适配器信息"""
-        adapters = self.model.get_network_adapters()
+    # 信息项名称 -> 显示名称
+    COLLECTOR_NAMES = {'adapters': '网络适配器', 'proxy': '代理设置', 'stats': '网络统计', 'dns': 'DNS服务器'}
+    
+    def _load_data(self, force: bool = False):
+        """
+        在后台加载数据（不阻塞界面）
+        
+        Args:
+            force: 是否忽略缓存重新获取
+        """
+        first_load = not self._pending and self.adapter_table.rowCount() == 0
+        if first_load:
+            self.proxy_text.setText("正在加载...")
+            self.stats_text.setText("正在加载...")
+            self.dns_text.setText("正在加载...")
+        
+        self._pending = set(NetworkInfoModel.COLLECTORS)
+        self._update_status()
+        self._controller.load(force=force)
+        
+    def _update_status(self):
+        """更新加载状态提示"""
+        if self._pending:
+            names = '、'.join(self.COLLECTOR_NAMES[name] for name in NetworkInfoModel.COLLECTORS
+                             if name in self._pending)
+            self.status_label.setText(f"⏳ 正在加载: {names}")
+        else:
+            self.status_label.setText("")
+        
+    def _on_data_loaded(self, name: str, data):
+        """
+        某项信息加载完成
+        
+        Args:
+            name: 信息项名称
+            data: 信息数据
+        """
+        self._pending.discard(name)
+        self._update_status()
+        if name == 'adapters':
+            self._load_adapters(data)
+        elif name == 'proxy':
+            self._load_proxy(data)
+        elif name == 'stats':
+            self._load_stats(data)
+        elif name == 'dns':
+            self._load_dns(data)
+        
+    def _on_load_failed(self, name: str, error_msg: str):
+        """
+        某项信息加载失败
+        
+        Args:
+            name: 信息项名称
+            error_msg: 错误信息
+        """
+        self._pending.discard(name)
+        self._update_status()
+        text_widgets = {'proxy': self.proxy_text, 'stats': self.stats_text, 'dns': self.dns_text}
+        if name in text_widgets:
+            text_widgets[name].setText(f"{self.COLLECTOR_NAMES[name]}{error_msg}")
+        else:
+            self.status_label.setText(f"❌ {self.COLLECTOR_NAMES[name]}{error_msg}")
         
+    def _load_adapters(self, adapters: list):
+        """显示网络适配器信息"""
         self.adapter_table.setRowCount(len(adapters))
         
         for i, adapter in enumerate(adapters):
@@ -166,14 +256,16 @@ class NetworkInfoDialog(QDialog):
             self.adapter_table.setItem(i, 3, QTableWidgetItem(ipv4))
             self.adapter_table.setItem(i, 4, QTableWidgetItem(mac))
             
-    def _load_proxy(self):
-        """加载代理设置"""
-        proxy = self.model.get_proxy_settings()
+    def _load_proxy(self, proxy: dict):
+        """显示代理设置"""
         
         text = "系统代理设置\n"
         text += "=" * 50 + "\n\n"
         
-        text += f"代理状态: {'✅ 已启用' if proxy['enabled'] else '❌ 未启用'}\n\n"
+        text += f"代理状态: {'✅ 已启用' if proxy['enabled'] else '❌ 未启用'}\n"
+        if proxy.get('source'):
+            text += f"配置来源: {proxy['source']}\n"
+        text += "\n"
         
         if proxy['enabled']:
             if proxy['http_proxy']:
@@ -194,9 +286,8 @@ class NetworkInfoDialog(QDialog):
         
         self.proxy_text.setText(text)
         
-    def _load_stats(self):
-        """加载网络统计"""
-        stats = self.model.get_network_stats()
+    def _load_stats(self, stats: dict):
+        """显示网络统计"""
         
         text = "网络流量统计\n"
         text += "=" * 50 + "\n\n"
@@ -223,9 +314,68 @@ class NetworkInfoDialog(QDialog):
         
         self.stats_text.setText(text)
         
-    def _load_dns(self):
-        """加载DNS服务器"""
-        dns_servers = self.model.get_dns_servers()
+    @staticmethod
+    def _format_rate(bits_per_second: float) -> str:
+        """格式化速率"""
+        if bits_per_second >= 1_000_000:
+            return f"{bits_per_second / 1_000_000:.2f} Mbps"
+        return f"{bits_per_second / 1000:.1f} Kbps"
+        
+    def _set_live_cell(self, row: int, column: int, text: str):
+        """更新实时表格单元格（复用已有单元格，只在文本变化时设置）"""
+        item = self.live_table.item(row, column)
+        if item is None:
+            item = QTableWidgetItem(text)
+            if column > 0:
+                item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+            self.live_table.setItem(row, column, item)
+        elif item.text() != text:
+            item.setText(text)
+        
+    def _update_live_stats(self):
+        """定时采样网卡计数并增量更新实时表格"""
+        updated = self._bandwidth_monitor.sample()
+        
+        # 移除已消失的网卡（从后往前删除，保持行号有效）
+        current = set(self._bandwidth_monitor.interfaces())
+        removed = sorted((row for name, row in self._live_rows.items() if name not in current), reverse=True)
+        if removed:
+            for row in removed:
+                self.live_table.removeRow(row)
+            names = [name for name, _ in sorted(self._live_rows.items(), key=lambda item: item[1])
+                     if name in current]
+            self._live_rows = {name: row for row, name in enumerate(names)}
+        
+        for name, rates in updated.items():
+            row = self._live_rows.get(name)
+            if row is None:
+                row = self.live_table.rowCount()
+                self.live_table.insertRow(row)
+                self._live_rows[name] = row
+                self._set_live_cell(row, 0, name)
+            peak = self._bandwidth_monitor.peak(name)
+            self._set_live_cell(row, 1, self._format_rate(rates['recv_bps']))
+            self._set_live_cell(row, 2, self._format_rate(rates['sent_bps']))
+            self._set_live_cell(row, 3, f"{rates['recv_pps']:.0f}")
+            self._set_live_cell(row, 4, f"{rates['sent_pps']:.0f}")
+            self._set_live_cell(row, 5, f"{rates['err_ps']:.1f}")
+            self._set_live_cell(row, 6, f"{rates['drop_ps']:.1f}")
+            self._set_live_cell(row, 7, f"{self._format_rate(peak['recv_bps'])} / {self._format_rate(peak['sent_bps'])}")
+        
+    def done(self, result: int):
+        """关闭对话框时停止实时监控和后台加载"""
+        self._live_timer.stop()
+        self._controller.shutdown()
+        super().done(result)
+        
+    def closeEvent(self, event):
+        """窗口关闭时停止实时监控和后台加载"""
+        self._live_timer.stop()
+        self._controller.shutdown()
+        super().closeEvent(event)
+        
+    def _load_dns(self, dns_servers: list):
+        """显示DNS服务器"""
         
         text = "DNS服务器列表\n"
         text += "=" * 50 + "\n\n"
@@ -0,0 +1,318 @@
+# -*- coding: utf-8 -*-
+"""
+Accuracy Suite
+测速准确性验证 - 用本地参考服务器模拟已知的网络条件，检查测速结果是否落在容差范围内
+
+场景:
+    single_stream   单连接限速，下载/上传速度应接近设定速率
+    multi_stream    多个并发连接，每个连接和总速率都应接近设定值
+    shared_cap      多个并发连接共享总限速，总速率应接近总限速
+    latency         固定延迟+抖动，探测延迟应接近设定值，波动不超过抖动范围
+    failover        第一个测速地址不可用，应切换到下一个地址并测得正确速率
+    faults          随机停顿和连接重置，测速应能完成且结果不超过设定速率
+
+任一检查不通过时以非零代码退出。
+
+用法:
+    python benchmarks/accuracy_suite.py [--duration 5] [--only latency,failover] [--output report.json]
+"""
+
+import os
+import sys
+import json
+import socket
+import argparse
+import statistics
+import threading
+from typing import Callable, Dict, List, Optional
+
+# 添加项目根目录到Python路径
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from app.models.simple_speedtest import SimpleSpeedTest
+from app.services.test_server import ReferenceServer, NetworkConditions
+
+
+class Check:
+    """单项检查结果"""
+
+    def __init__(self, scenario: str, name: str, expected: float, measured: Optional[float],
+                 tolerance: float, relative: bool = True, upper_only: bool = False):
+        """
+        初始化检查
+
+        Args:
+            scenario: 场景名称
+            name: 检查项名称
+            expected: 期望值
+            measured: 测得值，None表示测量失败
+            tolerance: 容差（relative为True时是比例，否则是绝对值）
+            relative: 是否按比例计算容差
+            upper_only: 只检查上限（测得值不应超过期望值+容差）
+        """
+        self.scenario = scenario
+        self.name = name
+        self.expected = expected
+        self.measured = measured
+        self.tolerance = tolerance
+        self.relative = relative
+        self.upper_only = upper_only
+
+    @property
+    def allowed(self) -> float:
+        """允许的绝对偏差"""
+        return abs(self.expected) * self.tolerance if self.relative else self.tolerance
+
+    @property
+    def passed(self) -> bool:
+        """是否通过"""
+        if self.measured is None:
+            return False
+        if self.upper_only:
+            return self.measured <= self.expected + self.allowed
+        return abs(self.measured - self.expected) <= self.allowed
+
+    def to_dict(self) -> Dict:
+        """转换为字典"""
+        return {
+            'scenario': self.scenario,
+            'check': self.name,
+            'expected': self.expected,
+            'measured': None if self.measured is None else round(self.measured, 3),
+            'allowed_deviation': round(self.allowed, 3),
+            'passed': self.passed,
+        }
+
+
+def with_server(conditions: NetworkConditions, func: Callable[[ReferenceServer], object]):
+    """
+    启动模拟指定网络条件的服务器并执行函数
+
+    Args:
+        conditions: 网络条件
+        func: 要执行的函数 func(server)
+
+    Returns:
+        函数的返回值
+    """
+    server = ReferenceServer(conditions=conditions)
+    server.start()
+    try:
+        return func(server)
+    finally:
+        server.stop()
+
+
+def new_speedtest(options: Dict) -> SimpleSpeedTest:
+    """创建不输出逐秒日志的测速实例"""
+    return SimpleSpeedTest(log_callback=None, **options)
+
+
+def probe_latencies(speedtest: SimpleSpeedTest, rounds: int) -> List[float]:
+    """
+    重复探测第一个Ping主机
+
+    Args:
+        speedtest: 测速实例
+        rounds: 探测次数
+
+    Returns:
+        List[float]: 成功的探测延迟(ms)
+    """
+    host = speedtest._ping_hosts[0][0]
+    speedtest._ping_http(host)  # 预热
+    return [t for t in (speedtest._ping_http(host) for _ in range(rounds)) if t is not None]
+
+
+def scenario_single_stream(args) -> List[Check]:
+    """单连接限速"""
+    rate = args.rate
+
+    def run(server: ReferenceServer) -> List[Check]:
+        speedtest = new_speedtest(server.speedtest_options())
+        download = speedtest.test_download(args.duration)
+        upload = speedtest.test_upload(args.duration)
+        return [
+            Check('single_stream', 'download_mbps', rate, download, args.tolerance),
+            # 上传按写入套接字的字节计速，发送缓冲区会带来额外的误差
+            Check('single_stream', 'upload_mbps', rate, upload, args.tolerance * 2),
+        ]
+
+    return with_server(NetworkConditions(rate_mbps=rate, seed=args.seed), run)
+
+
+def _concurrent_downloads(server: ReferenceServer, streams: int, duration: int) -> List[Optional[float]]:
+    """
+    并发运行多个下载测试
+
+    Args:
+        server: 参考服务器
+        streams: 并发连接数
+        duration: 测试时长（秒）
+
+    Returns:
+        List[Optional[float]]: 每个连接测得的速度(Mbps)
+    """
+    speeds: List[Optional[float]] = [None] * streams
+
+    def worker(index: int):
+        speeds[index] = new_speedtest(server.speedtest_options()).test_download(duration)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(streams)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return speeds
+
+
+def scenario_multi_stream(args) -> List[Check]:
+    """多连接，每个连接独立限速"""
+    rate = args.rate / args.streams
+
+    def run(server: ReferenceServer) -> List[Check]:
+        speeds = _concurrent_downloads(server, args.streams, args.duration)
+        checks = [Check('multi_stream', f'stream{i}_mbps', rate, speed, args.tolerance * 1.5)
+                  for i, speed in enumerate(speeds)]
+        total = sum(speeds) if all(speeds) else None
+        checks.append(Check('multi_stream', 'total_mbps', rate * args.streams, total, args.tolerance))
+        return checks
+
+    return with_server(NetworkConditions(rate_mbps=rate, seed=args.seed), run)
+
+
+def scenario_shared_cap(args) -> List[Check]:
+    """多连接共享总限速"""
+    total_rate = args.rate
+
+    def run(server: ReferenceServer) -> List[Check]:
+        speeds = _concurrent_downloads(server, args.streams, args.duration)
+        total = sum(speeds) if all(speeds) else None
+        return [Check('shared_cap', 'total_mbps', total_rate, total, args.tolerance)]
+
+    return with_server(NetworkConditions(total_rate_mbps=total_rate, seed=args.seed), run)
+
+
+def scenario_latency(args) -> List[Check]:
+    """固定延迟+抖动"""
+    # 先测量无模拟时的探测开销，作为基线
+    baseline = with_server(NetworkConditions(), lambda server: statistics.median(
+        probe_latencies(new_speedtest(server.speedtest_options()), args.ping_rounds)))
+
+    def run(server: ReferenceServer) -> List[Check]:
+        timings = probe_latencies(new_speedtest(server.speedtest_options()), args.ping_rounds)
+        if not timings:
+            return [Check('latency', 'mean_ms', args.latency, None, 0)]
+        mean = statistics.mean(timings) - baseline
+        spread = max(timings) - min(timings)
+        # 均值容差：比例容差和5ms取大者（计时器和调度误差）
+        allowed = max(args.latency * args.tolerance, 5.0)
+        return [
+            Check('latency', 'mean_ms', args.latency, mean, allowed, relative=False),
+            Check('latency', 'spread_ms', 2 * args.jitter, spread, allowed, relative=False, upper_only=True),
+            Check('latency', 'success_rate', 1.0, len(timings) / args.ping_rounds, 0, relative=False),
+        ]
+
+    conditions = NetworkConditions(latency_ms=args.latency, jitter_ms=args.jitter, seed=args.seed)
+    return with_server(conditions, run)
+
+
+def _unused_port() -> int:
+    """获取一个当前无人监听的本地端口"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def scenario_failover(args) -> List[Check]:
+    """第一个地址不可用时切换到下一个地址"""
+    rate = args.rate
+
+    def run(server: ReferenceServer) -> List[Check]:
+        options = server.speedtest_options()
+        dead_url = f'http://127.0.0.1:{_unused_port()}/download'
+        options['download_urls'] = [(dead_url, 'stream', '不可用服务器')] + options['download_urls']
+        speedtest = new_speedtest(options)
+        download = speedtest.test_download(args.duration)
+        return [Check('failover', 'download_mbps', rate, download, args.tolerance)]
+
+    return with_server(NetworkConditions(rate_mbps=rate, seed=args.seed), run)
+
+
+def scenario_faults(args) -> List[Check]:
+    """随机停顿和连接重置"""
+    rate = args.rate
+
+    def run(server: ReferenceServer) -> List[Check]:
+        download = new_speedtest(server.speedtest_options()).test_download(args.duration)
+        return [
+            # 停顿和重连会降低有效吞吐，但绝不应高于限速
+            Check('faults', 'download_mbps_not_above_rate', rate, download, args.tolerance, upper_only=True),
+            Check('faults', 'completed', 1.0, 1.0 if download else None, 0, relative=False),
+        ]
+
+    conditions = NetworkConditions(rate_mbps=rate, stall_probability=0.2, stall_seconds=0.5,
+                                   reset_probability=0.2, seed=args.seed)
+    return with_server(conditions, run)
+
+
+SCENARIOS = {
+    'single_stream': scenario_single_stream,
+    'multi_stream': scenario_multi_stream,
+    'shared_cap': scenario_shared_cap,
+    'latency': scenario_latency,
+    'failover': scenario_failover,
+    'faults': scenario_faults,
+}
+
+
+def main(argv: Optional[list] = None) -> int:
+    """主函数"""
+    parser = argparse.ArgumentParser(description='测速准确性验证：检查测量结果与模拟网络条件的偏差')
+    parser.add_argument('--duration', type=int, default=5, help='每个带宽测试的时长（秒）')
+    parser.add_argument('--rate', type=float, default=40.0, help='模拟的限速(Mbps)')
+    parser.add_argument('--streams', type=int, default=4, help='多连接场景的并发数')
+    parser.add_argument('--latency', type=float, default=50.0, help='模拟的延迟(ms)')
+    parser.add_argument('--jitter', type=float, default=10.0, help='模拟的延迟抖动(ms)')
+    parser.add_argument('--ping-rounds', type=int, default=30, help='延迟场景的探测次数')
+    parser.add_argument('--tolerance', type=float, default=0.10, help='相对容差（默认10%%）')
+    parser.add_argument('--seed', type=int, default=1234, help='随机数种子')
+    parser.add_argument('--only', help='只运行指定场景，逗号分隔：' + ','.join(SCENARIOS))
+    parser.add_argument('--output', help='把报告保存为JSON文件')
+    args = parser.parse_args(argv)
+
+    names = args.only.split(',') if args.only else list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"未知场景: {', '.join(unknown)}")
+
+    # 测速引擎的逐秒日志输出到stderr，报告单独输出
+    stdout = sys.stdout
+    checks: List[Check] = []
+    for name in names:
+        print(f"[准确性验证] 运行场景 {name}...", file=sys.stderr)
+        sys.stdout = sys.stderr
+        try:
+            checks.extend(SCENARIOS[name](args))
+        finally:
+            sys.stdout = stdout
+
+    print(f"{'场景':<16}{'检查项':<32}{'期望':>10}{'测得':>12}{'允许偏差':>10}  结果")
+    for check in checks:
+        measured = '-' if check.measured is None else f'{check.measured:.2f}'
+        print(f"{check.scenario:<16}{check.name:<32}{check.expected:>10.2f}{measured:>12}"
+              f"{check.allowed:>10.2f}  {'通过' if check.passed else '失败'}")
+
+    failed = [check for check in checks if not check.passed]
+    print(f"\n共 {len(checks)} 项检查，{len(checks) - len(failed)} 项通过，{len(failed)} 项失败")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'checks': [check.to_dict() for check in checks],
+                       'passed': not failed}, f, ensure_ascii=False, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+Loopback Benchmark
+回环基准测试 - 在本机参考服务器上运行SimpleSpeedTest，测量测速引擎自身的上限
+
+网络几乎没有瓶颈，因此测得的结果反映的是测量代码本身：
+    - 最高可测速度 (Gbps)
+    - 每Gbps消耗的客户端CPU（核）
+    - 单次延迟探测的固有开销 (ms)
+
+用法:
+    python benchmarks/loopback_benchmark.py [--duration 5] [--output result.json] [--compare baseline.json]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+from typing import Callable, Dict, Optional, Tuple
+
+import psutil
+
+# 添加项目根目录到Python路径
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from app.models.simple_speedtest import SimpleSpeedTest
+from app.services.test_server import speedtest_options
+
+
+def start_server() -> Tuple[subprocess.Popen, str]:
+    """
+    在独立进程中启动参考服务器（避免服务端占用客户端进程的GIL和CPU统计）
+
+    Returns:
+        Tuple[subprocess.Popen, str]: (服务器进程, 根地址)
+    """
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'app.services.test_server', '--port', '0'],
+        cwd=ROOT_DIR, stdout=subprocess.PIPE, text=True
+    )
+    line = process.stdout.readline()
+    if '已在' not in line:
+        process.kill()
+        raise RuntimeError(f"参考服务器启动失败: {line.strip()}")
+    return process, line.split('已在', 1)[1].split()[0]
+
+
+def measure_cpu(func: Callable, server: psutil.Process) -> Tuple[object, Dict]:
+    """
+    执行函数并统计耗时和客户端/服务端CPU时间
+
+    Args:
+        func: 要执行的函数
+        server: 服务器进程
+
+    Returns:
+        Tuple[object, Dict]: (函数返回值, 资源统计)
+    """
+    client = psutil.Process()
+    client_before = client.cpu_times()
+    server_before = server.cpu_times()
+    start = time.perf_counter()
+
+    value = func()
+
+    wall = time.perf_counter() - start
+    client_after = client.cpu_times()
+    server_after = server.cpu_times()
+    client_cpu = (client_after.user - client_before.user) + (client_after.system - client_before.system)
+    server_cpu = (server_after.user - server_before.user) + (server_after.system - server_before.system)
+    return value, {
+        'wall_seconds': round(wall, 3),
+        'client_cpu_seconds': round(client_cpu, 3),
+        'server_cpu_seconds': round(server_cpu, 3),
+    }
+
+
+def bandwidth_case(speedtest: SimpleSpeedTest, direction: str, duration: int,
+                   server: psutil.Process) -> Dict:
+    """
+    运行一次下载或上传测试
+
+    Args:
+        speedtest: 测速实例
+        direction: 'download' 或 'upload'
+        duration: 测试时长（秒）
+        server: 服务器进程
+
+    Returns:
+        Dict: 测试结果
+    """
+    func = speedtest.test_download if direction == 'download' else speedtest.test_upload
+    speed, usage = measure_cpu(lambda: func(duration), server)
+    gbps = (speed or 0.0) / 1000
+    result = {'gbps': round(gbps, 3), **usage}
+    if gbps > 0:
+        # 每Gbps需要的CPU核数
+        result['client_cores_per_gbps'] = round(usage['client_cpu_seconds'] / usage['wall_seconds'] / gbps, 3)
+        result['server_cores_per_gbps'] = round(usage['server_cpu_seconds'] / usage['wall_seconds'] / gbps, 3)
+    stats = speedtest.download_stats if direction == 'download' else speedtest.upload_stats
+    if stats:
+        result['peak_gbps'] = round(stats.get('max', 0) / 1000, 3)
+    return result
+
+
+def ping_case(speedtest: SimpleSpeedTest, rounds: int) -> Dict:
+    """
+    重复探测回环地址，统计单次探测的固有开销
+
+    Args:
+        speedtest: 测速实例
+        rounds: 探测次数
+
+    Returns:
+        Dict: 探测开销统计(ms)
+    """
+    host = speedtest._ping_hosts[0][0]
+    speedtest._ping_http(host)  # 预热（导入、DNS解析缓存等）
+    timings = [t for t in (speedtest._ping_http(host) for _ in range(rounds)) if t is not None]
+    if not timings:
+        return {'success': 0, 'rounds': rounds}
+    timings.sort()
+    return {
+        'success': len(timings),
+        'rounds': rounds,
+        'median_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+        'min_ms': round(timings[0], 3),
+        'max_ms': round(timings[-1], 3),
+    }
+
+
+def compare(current: Dict, baseline: Dict):
+    """
+    打印与基线结果的对比
+
+    Args:
+        current: 本次结果
+        baseline: 基线结果
+    """
+    rows = [
+        ('download', 'gbps'), ('download', 'client_cores_per_gbps'),
+        ('upload', 'gbps'), ('upload', 'client_cores_per_gbps'),
+        ('ping', 'median_ms'), ('ping', 'p95_ms'),
+    ]
+    print("\n指标                            基线        本次        变化")
+    for case, key in rows:
+        old = baseline.get(case, {}).get(key)
+        new = current.get(case, {}).get(key)
+        if old is None or new is None:
+            continue
+        change = f"{(new - old) / old * 100:+.1f}%" if old else '-'
+        print(f"{case + '.' + key:<30}{old:>10}{new:>12}{change:>12}")
+
+
+def run_benchmark(duration: int, ping_rounds: int) -> Dict:
+    """
+    运行完整的回环基准测试
+
+    Args:
+        duration: 每个带宽测试的时长（秒）
+        ping_rounds: 延迟探测次数
+
+    Returns:
+        Dict: 基准测试结果
+    """
+    process, base_url = start_server()
+    try:
+        server = psutil.Process(process.pid)
+        speedtest = SimpleSpeedTest(log_callback=None, **speedtest_options(base_url))
+        return {
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'python': sys.version.split()[0],
+            'cpu_count': psutil.cpu_count(),
+            'duration': duration,
+            'download': bandwidth_case(speedtest, 'download', duration, server),
+            'upload': bandwidth_case(speedtest, 'upload', duration, server),
+            'ping': ping_case(speedtest, ping_rounds),
+        }
+    finally:
+        process.terminate()
+        process.wait(5)
+
+
+def main(argv: Optional[list] = None) -> int:
+    """主函数"""
+    parser = argparse.ArgumentParser(description='回环基准测试：测量测速引擎自身的吞吐上限和开销')
+    parser.add_argument('--duration', type=int, default=5, help='每个带宽测试的时长（秒）')
+    parser.add_argument('--ping-rounds', type=int, default=200, help='延迟探测次数')
+    parser.add_argument('--output', help='把结果保存为JSON文件')
+    parser.add_argument('--compare', help='与之前保存的基线JSON对比')
+    args = parser.parse_args(argv)
+
+    # 测速引擎的逐秒日志输出到stderr，结果单独输出
+    stdout = sys.stdout
+    sys.stdout = sys.stderr
+    try:
+        result = run_benchmark(args.duration, args.ping_rounds)
+    finally:
+        sys.stdout = stdout
+
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare(result, json.load(f))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+"""
+Test Configuration
+测试配置 - 把项目根目录加入导入路径，提供共用的本地服务器夹具
+"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# 测试数据目录
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+Offline Geo Database Tests
+离线IP库测试 - 从CSV生成库文件、IPv4/IPv6段查找、重叠段处理和损坏文件检测
+"""
+
+import pytest
+
+from app.models.geo_db import build_database, GeoDatabase
+
+
+@pytest.fixture
+def database(tmp_path):
+    networks = tmp_path / 'networks.csv'
+    networks.write_text(
+        'network,country_name,country_iso_code,city\n'
+        '1.0.0.0/24,Australia,AU,Sydney\n'
+        '8.8.8.0/24,United States,US,-\n'
+        '8.8.8.128/25,Overlap,XX,\n'
+        'not-a-network,Bad,XX,\n'
+        '2001:db8::/32,Documentation,ZZ,\n',
+        encoding='utf-8')
+    # 无表头的IP2Location格式：整数起止地址
+    ranges = tmp_path / 'ranges.csv'
+    ranges.write_text('16777472,16777727,CN,China,Fujian,Fuzhou\n', encoding='utf-8')
+
+    path = str(tmp_path / 'geo.db')
+    stats = build_database([str(networks), str(ranges)], path)
+    with GeoDatabase(path) as db:
+        yield db, stats
+
+
+def test_build_statistics(database):
+    db, stats = database
+    assert stats['ipv4_ranges'] == 3
+    assert stats['ipv6_ranges'] == 1
+    assert stats['overlaps_dropped'] == 1
+    assert db.range_counts == {'ipv4': 3, 'ipv6': 1}
+
+
+def test_lookup_ipv4(database):
+    db, _ = database
+    info = db.lookup('1.0.0.200')
+    assert info['ip'] == '1.0.0.200'
+    assert (info['country'], info['countryCode'], info['city']) == ('Australia', 'AU', 'Sydney')
+    # '-'和空值视为未知
+    assert db.lookup('8.8.8.8')['city'] == '未知'
+    assert db.lookup('8.8.8.200')['countryCode'] == 'US'
+    assert db.lookup('1.0.1.1')['region'] == 'Fujian'
+
+
+def test_range_bounds_are_inclusive(database):
+    db, _ = database
+    assert db.lookup('1.0.0.0')['countryCode'] == 'AU'
+    assert db.lookup('1.0.0.255')['countryCode'] == 'AU'
+    assert db.lookup('1.0.1.0')['countryCode'] == 'CN'
+
+
+@pytest.mark.parametrize('ip', ['0.0.0.1', '1.0.2.0', '8.8.9.0', '255.255.255.255',
+                                '2001:db9::1', 'not-an-ip'])
+def test_lookup_misses(database, ip):
+    db, _ = database
+    assert db.lookup(ip) is None
+
+
+def test_lookup_ipv6_and_mapped_ipv4(database):
+    db, _ = database
+    assert db.lookup('2001:db8:ffff::1')['countryCode'] == 'ZZ'
+    assert db.lookup('::ffff:1.0.0.1')['countryCode'] == 'AU'
+
+
+def test_truncated_files_raise_value_error(database, tmp_path):
+    db, _ = database
+    with open(db.path, 'rb') as f:
+        data = f.read()
+    truncated = tmp_path / 'truncated.db'
+    for size in range(len(data)):
+        truncated.write_bytes(data[:size])
+        with pytest.raises(ValueError):
+            GeoDatabase(str(truncated))
+
+
+def test_foreign_file_rejected(tmp_path):
+    path = tmp_path / 'other.db'
+    path.write_bytes(b'SQLite format 3\x00' + bytes(64))
+    with pytest.raises(ValueError):
+        GeoDatabase(str(path))
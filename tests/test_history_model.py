@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+History Model Tests
+历史记录测试 - 按时间/类型/网卡查询、采样序列往返、聚合和过期删除
+"""
+
+from datetime import datetime
+
+import pytest
+
+from app.models.history_model import HistoryModel
+from app.models.sample_series import SampleSeries
+
+
+def _result(test_type: str, day: int, hour: int, download: float = None, ping: float = None,
+            interface: str = '') -> dict:
+    return {
+        'test_type': test_type,
+        'timestamp': datetime(2024, 1, day, hour).strftime('%Y-%m-%d %H:%M:%S'),
+        'download': download,
+        'ping': ping,
+        'interface': interface,
+    }
+
+
+@pytest.fixture
+def history(tmp_path):
+    model = HistoryModel(str(tmp_path / 'history.db'))
+    model.add_result(_result('download', 1, 8, download=100.0, interface='eth0'))
+    model.add_result(_result('download', 1, 20, download=50.0, interface='wlan0'))
+    model.add_result(_result('ping', 2, 9, ping=12.0, interface='eth0'))
+    model.add_result(_result('download', 3, 10, download=80.0, interface='eth0'))
+    yield model
+    model.close()
+
+
+def test_query_filters_by_time_type_and_interface(history):
+    assert history.count() == 4
+    assert history.count('download') == 3
+
+    day_one = history.query(start=datetime(2024, 1, 1), end=datetime(2024, 1, 2))
+    assert [result['download'] for result in day_one] == [50.0, 100.0]
+
+    oldest_first = history.query(test_type='download', newest_first=False)
+    assert [result['download'] for result in oldest_first] == [100.0, 50.0, 80.0]
+
+    assert [result['download'] for result in history.query(interface='eth0', test_type='download')] == [80.0, 100.0]
+    assert len(history.query(limit=2)) == 2
+
+
+def test_end_is_exclusive(history):
+    results = history.query(end=datetime(2024, 1, 2, 9))
+    assert all(result['test_type'] == 'download' for result in results)
+    assert len(results) == 2
+
+
+def test_samples_round_trip(history):
+    speeds = SampleSeries([1.0, 2.5, 3.0], start_time=1700000000.0)
+    result = _result('download', 4, 12, download=2.0)
+    result['download_stats'] = {'max': 3.0, 'speeds': speeds}
+    result_id = history.add_result(result)
+
+    stored = history.get_result(result_id)
+    assert stored['id'] == result_id
+    assert stored['download_stats']['speeds'] == speeds
+    assert 'speeds' not in history.query(start=datetime(2024, 1, 4), include_samples=False)[0]['download_stats']
+    assert history.get_result(result_id + 100) is None
+
+
+def test_aggregate_by_day(history):
+    rows = history.aggregate(test_type='download', bucket='day')
+    by_day = {row['bucket']: row for row in rows}
+    assert set(by_day) == {'2024-01-01', '2024-01-03'}
+    assert by_day['2024-01-01']['count'] == 2
+    assert by_day['2024-01-01']['download_avg'] == 75.0
+    assert by_day['2024-01-01']['download_min'] == 50.0
+
+    overall = history.aggregate(bucket=None)
+    assert len(overall) == 1 and overall[0]['count'] == 4
+
+    with pytest.raises(ValueError):
+        history.aggregate(bucket='minute')
+
+
+def test_delete_before(history):
+    assert history.delete_before(datetime(2024, 1, 2)) == 2
+    assert history.count() == 2
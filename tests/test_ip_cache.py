@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+IP Info Cache Tests
+IP信息缓存测试 - 过期时间、失败结果缓存、LRU淘汰、持久化和缓存文件校验
+"""
+
+import json
+
+import pytest
+
+from app.models import ip_cache
+from app.models.ip_cache import IPInfoCache
+
+
+class _Clock:
+    """可手动推进的时间"""
+
+    def __init__(self, now: float = 1000000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(ip_cache.time, 'time', clock)
+    return clock
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = IPInfoCache(ttl=60, negative_ttl=10)
+    cache.put('1.1.1.1', {'country': 'AU'})
+    cache.put('10.0.0.1', None)
+
+    assert cache.get('1.1.1.1') == (True, {'country': 'AU'})
+    assert cache.get('10.0.0.1') == (True, None)
+
+    clock.now += 11
+    assert cache.get('10.0.0.1') == (False, None)
+    assert cache.get('1.1.1.1')[0]
+
+    clock.now += 50
+    assert cache.get('1.1.1.1') == (False, None)
+    assert len(cache) == 0
+    assert cache.stats() == {'entries': 0, 'hits': 3, 'misses': 2}
+
+
+def test_non_positive_ttl_disables_caching(clock):
+    cache = IPInfoCache(negative_ttl=0)
+    cache.put('10.0.0.1', None)
+    assert cache.get('10.0.0.1') == (False, None)
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = IPInfoCache(max_entries=2)
+    cache.put('a', {'n': 1})
+    cache.put('b', {'n': 2})
+    cache.get('a')
+    cache.put('c', {'n': 3})
+
+    assert cache.get('b') == (False, None)
+    assert cache.get('a')[0] and cache.get('c')[0]
+
+
+def test_persisted_entries_reload(clock, tmp_path):
+    path = str(tmp_path / 'cache.json')
+    cache = IPInfoCache(path, ttl=60)
+    cache.put('1.1.1.1', {'country': 'AU'})
+    cache.put('8.8.8.8', {'country': 'US'})
+    cache.flush()
+
+    clock.now += 30
+    reloaded = IPInfoCache(path)
+    assert reloaded.get('8.8.8.8') == (True, {'country': 'US'})
+
+    clock.now += 31
+    assert len(IPInfoCache(path)) == 0
+
+
+def test_load_skips_malformed_entries(clock, tmp_path, capsys):
+    path = tmp_path / 'cache.json'
+    expires = clock.now + 60
+    path.write_text(json.dumps({'version': IPInfoCache.VERSION, 'entries': [
+        ['1.1.1.1', expires, {'country': 'AU'}],
+        ['10.0.0.1', expires, None],
+        ['bad-value', expires, 'text'],
+        ['bad-expiry', True, None],
+        [123, expires, None],
+        ['short', expires],
+        'not-a-list',
+    ]}), encoding='utf-8')
+
+    cache = IPInfoCache(str(path))
+    assert len(cache) == 2
+    assert cache.get('1.1.1.1') == (True, {'country': 'AU'})
+    assert '5 个无效条目' in capsys.readouterr().out
+
+
+@pytest.mark.parametrize('content', ['not json', '[]', '{"version": 99, "entries": []}',
+                                     '{"version": 1, "entries": {}}'])
+def test_load_ignores_unusable_files(clock, tmp_path, content):
+    path = tmp_path / 'cache.json'
+    path.write_text(content, encoding='utf-8')
+    assert len(IPInfoCache(str(path))) == 0
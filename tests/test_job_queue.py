@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+Job Queue Tests
+任务队列测试 - 任务状态转换、带宽任务串行、取消、失败处理、参数校验和记录淘汰
+
+测试不访问网络：实际的测速/查询函数替换为可控的假实现。
+"""
+
+import threading
+
+import pytest
+
+from app.services.job_queue import Job, JobQueue
+
+
+class _FakeRunner:
+    """可控的任务执行函数：按任务参数阻塞、失败或抛出异常"""
+
+    def __init__(self):
+        self.release = {}
+        self.started = {}
+
+    def gate(self, name: str):
+        """为参数name为该值的任务准备阻塞点"""
+        self.release[name] = threading.Event()
+        self.started[name] = threading.Event()
+
+    def __call__(self, job: Job) -> tuple:
+        name = job.params.get('name')
+        if name in self.started:
+            self.started[name].set()
+            assert self.release[name].wait(5)
+        for index in range(3):
+            job.add_sample('download', 10.0 + index, index + 1.0)
+        if job.params.get('fail'):
+            return None, '模拟失败'
+        if job.params.get('raise'):
+            raise RuntimeError('模拟异常')
+        return {'test_type': job.type, 'download': 10.0}, None
+
+
+@pytest.fixture
+def runner():
+    return _FakeRunner()
+
+
+@pytest.fixture
+def jobs(runner, monkeypatch):
+    finished = []
+    monkeypatch.setattr(JobQueue, '_run_speed_test', lambda self, job: runner(job))
+    monkeypatch.setattr(JobQueue, '_run_ip_query', lambda self, job: runner(job))
+    job_queue = JobQueue(max_light_workers=2, max_jobs=5, on_finished=finished.append)
+    job_queue.finished = finished
+    yield job_queue
+    for gate in runner.release.values():
+        gate.set()
+    job_queue.shutdown()
+
+
+def _wait(job: Job, timeout: float = 5):
+    """等待任务结束"""
+    with job._changed:
+        job._changed.wait_for(lambda: job.is_finished, timeout)
+    assert job.is_finished
+
+
+def test_job_lifecycle(jobs):
+    job = jobs.submit('download')
+    _wait(job)
+    assert job.status == Job.DONE
+    assert job.started is not None and job.finished >= job.started
+    assert job.result == {'test_type': 'download', 'download': 10.0}
+    assert [sample['seq'] for sample in job.samples] == [0, 1, 2]
+    assert jobs.finished == [job]
+    assert jobs.get(job.id) is job
+
+
+@pytest.mark.parametrize('params, error', [({'fail': True}, '模拟失败'), ({'raise': True}, '任务执行出错: 模拟异常')])
+def test_failures_are_reported(jobs, params, error):
+    job = jobs.submit('ping', params)
+    _wait(job)
+    assert job.status == Job.FAILED
+    assert job.error == error
+    assert job.result is None
+
+
+def test_bandwidth_jobs_run_one_at_a_time(jobs, runner):
+    runner.gate('first')
+    first = jobs.submit('download', {'name': 'first'})
+    second = jobs.submit('upload')
+    assert runner.started['first'].wait(5)
+
+    # 带宽任务排队期间，轻量任务仍可并行执行
+    light = jobs.submit('ping')
+    _wait(light)
+    assert first.status == Job.RUNNING
+    assert second.status == Job.QUEUED
+
+    runner.release['first'].set()
+    _wait(first)
+    _wait(second)
+    assert (first.status, second.status) == (Job.DONE, Job.DONE)
+    assert second.started >= first.finished
+
+
+def test_cancel_queued_and_running_jobs(jobs, runner):
+    runner.gate('running')
+    running = jobs.submit('both', {'name': 'running'})
+    queued = jobs.submit('download')
+    assert runner.started['running'].wait(5)
+
+    queued.cancel()
+    assert queued.status == Job.CANCELLED
+    running.cancel()
+    assert running.status == Job.RUNNING
+
+    runner.release['running'].set()
+    _wait(running)
+    assert running.status == Job.CANCELLED
+    assert queued.started is None
+
+
+def test_wait_for_samples_returns_after_finish(jobs):
+    job = jobs.submit('download')
+    _wait(job)
+    assert len(job.wait_for_samples(0, timeout=0.1)) == 3
+    assert job.wait_for_samples(3, timeout=5) == []
+
+
+@pytest.mark.parametrize('job_type, params', [('speed', None), (['ping'], None), ('ip_lookup', {}),
+                                              ('ping', [1, 2])])
+def test_invalid_submissions_rejected(jobs, job_type, params):
+    with pytest.raises(ValueError):
+        jobs.submit(job_type, params)
+    assert jobs.list() == []
+
+
+def test_finished_jobs_are_evicted_first(jobs, runner):
+    runner.gate('busy')
+    busy = jobs.submit('download', {'name': 'busy'})
+    assert runner.started['busy'].wait(5)
+    done = []
+    for _ in range(6):
+        job = jobs.submit('ping')
+        _wait(job)
+        done.append(job)
+
+    remaining = jobs.list()
+    assert len(remaining) == 5
+    assert busy in remaining
+    assert done[0] not in remaining and done[-1] in remaining
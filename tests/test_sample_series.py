@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+Sample Series Tests
+采样序列测试 - 二进制/字典序列化往返、结果字典拆分合并、降采样
+"""
+
+import json
+
+import pytest
+
+from app.models.sample_series import SampleSeries, split_series, merge_series, json_default
+
+
+def _series() -> SampleSeries:
+    series = SampleSeries(start_time=1700000000.5)
+    for i in range(100):
+        series.append(i * 1.5, 0.25 + i)
+    return series
+
+
+@pytest.mark.parametrize('compress', [True, False])
+def test_bytes_round_trip(compress):
+    series = _series()
+    restored = SampleSeries.from_bytes(series.to_bytes(compress=compress))
+    assert restored == series
+    assert list(restored.items()) == list(series.items())
+
+
+def test_empty_bytes_round_trip():
+    series = SampleSeries(start_time=3.0)
+    assert SampleSeries.from_bytes(series.to_bytes()) == series
+
+
+def test_from_bytes_rejects_foreign_data():
+    data = bytearray(_series().to_bytes())
+    data[0:3] = b'XXX'
+    with pytest.raises(ValueError):
+        SampleSeries.from_bytes(bytes(data))
+
+
+def test_dict_round_trip_through_json():
+    series = _series()
+    assert SampleSeries.from_dict(json.loads(json.dumps(series.to_dict()))) == series
+
+
+def test_default_timestamps_and_list_compatibility():
+    series = SampleSeries([1.0, 2.0, 3.0])
+    assert list(series.timestamps) == [1.0, 2.0, 3.0]
+    series.append(4.0)
+    assert series.timestamps[-1] == 4.0
+    assert series == [1.0, 2.0, 3.0, 4.0]
+    assert json.dumps({'speeds': series}, default=json_default) == '{"speeds": [1.0, 2.0, 3.0, 4.0]}'
+
+
+def test_mismatched_lengths_rejected():
+    with pytest.raises(ValueError):
+        SampleSeries([1.0, 2.0], [1.0])
+
+
+def test_split_and_merge_nested_result():
+    speeds = _series()
+    result = {'download': 10.0, 'download_stats': {'max': 12.0, 'speeds': speeds}}
+    plain, series = split_series(result)
+    assert plain == {'download': 10.0, 'download_stats': {'max': 12.0}}
+    assert series == {'download_stats.speeds': speeds}
+    assert merge_series(plain, series) == result
+
+
+def test_downsample_modes():
+    series = SampleSeries([float(i % 10) for i in range(1000)])
+    mean = series.downsample(100)
+    assert len(mean) == 100
+    assert all(value == pytest.approx(4.5) for value in mean)
+
+    minmax = series.downsample(100, mode='minmax')
+    assert len(minmax) == 100
+    assert min(minmax) == 0.0 and max(minmax) == 9.0
+
+    assert series.downsample(5000) == series
+    with pytest.raises(ValueError):
+        series.downsample(0)
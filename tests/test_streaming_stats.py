@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+Streaming Statistics Tests
+流式统计测试 - 均值/方差/最值与精确计算一致，P²分位数估计接近精确分位数
+"""
+
+import math
+import random
+import statistics
+
+import pytest
+
+from app.models.streaming_stats import P2Quantile, StreamingStats
+
+
+def _exact_quantile(values, q):
+    """最近秩法的精确分位数"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+
+def test_moments_match_exact_values():
+    rng = random.Random(1)
+    values = [rng.uniform(0, 100) for _ in range(1000)]
+    stats = StreamingStats()
+    stats.update_many(values)
+
+    assert stats.count == len(values)
+    assert stats.mean == pytest.approx(statistics.mean(values))
+    assert stats.stddev == pytest.approx(statistics.stdev(values))
+    assert stats.min == min(values)
+    assert stats.max == max(values)
+    assert stats.total == pytest.approx(sum(values))
+
+
+@pytest.mark.parametrize('distribution', ['uniform', 'normal', 'exponential'])
+@pytest.mark.parametrize('q', [0.5, 0.9, 0.99])
+def test_p2_quantile_is_close_to_exact(distribution, q):
+    rng = random.Random(42)
+    generate = {
+        'uniform': lambda: rng.uniform(0, 1000),
+        'normal': lambda: rng.gauss(500, 100),
+        'exponential': lambda: rng.expovariate(1 / 100),
+    }[distribution]
+    values = [generate() for _ in range(20000)]
+    estimator = P2Quantile(q)
+    for value in values:
+        estimator.update(value)
+
+    exact = _exact_quantile(values, q)
+    spread = _exact_quantile(values, 0.99) - _exact_quantile(values, 0.01)
+    assert abs(estimator.value - exact) <= 0.02 * spread
+
+
+def test_small_samples_use_exact_quantiles():
+    estimator = P2Quantile(0.5)
+    assert estimator.value is None
+    for value in (5, 1, 3):
+        estimator.update(value)
+    assert estimator.value == 3
+
+
+def test_snapshot_keys_and_empty_state():
+    stats = StreamingStats()
+    snapshot = stats.snapshot()
+    assert snapshot['count'] == 0
+    assert snapshot['mean'] is None and snapshot['p50'] is None
+    assert set(snapshot) == {'count', 'mean', 'stddev', 'min', 'max', 'p50', 'p90', 'p95', 'p99'}
+
+    stats.update(10.0)
+    assert stats.snapshot()['p99'] == 10.0
+    assert stats.variance == 0.0
+
+
+def test_untracked_quantile_raises():
+    with pytest.raises(KeyError):
+        StreamingStats(quantiles=(0.5,)).quantile(0.9)
+
+
+def test_invalid_quantile_rejected():
+    with pytest.raises(ValueError):
+        P2Quantile(1.0)
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+Token Bucket Tests
+令牌桶测试 - 突发容量、按速率补充、欠额等待和多线程总速率
+"""
+
+import time
+import threading
+
+import pytest
+
+from app.utils import token_bucket
+from app.utils.token_bucket import TokenBucket
+
+
+class _Clock:
+    """可手动推进的单调时钟"""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(token_bucket.time, 'monotonic', clock)
+    return clock
+
+
+def test_burst_then_refill(clock):
+    bucket = TokenBucket(rate=10, burst=5)
+    assert all(bucket.try_consume() for _ in range(5))
+    assert not bucket.try_consume()
+
+    clock.now += 0.25
+    assert bucket.try_consume(2)
+    assert not bucket.try_consume()
+
+    # 补充不超过桶容量
+    clock.now += 100
+    assert bucket.try_consume(5)
+    assert not bucket.try_consume()
+
+
+def test_reserve_returns_debt_wait(clock):
+    bucket = TokenBucket(rate=100, burst=10)
+    assert bucket.reserve(10) == 0.0
+    assert bucket.reserve(50) == pytest.approx(0.5)
+    # 欠额累积，后来的调用方排在后面
+    assert bucket.reserve(50) == pytest.approx(1.0)
+
+    clock.now += 1.0
+    assert bucket.reserve(0) == 0.0
+
+
+def test_try_consume_does_not_go_into_debt(clock):
+    bucket = TokenBucket(rate=1, burst=1)
+    assert bucket.try_consume()
+    assert not bucket.try_consume(0.5)
+    clock.now += 0.5
+    assert bucket.try_consume(0.5)
+
+
+def test_invalid_rate_rejected():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0, burst=1)
+
+
+def test_threads_share_the_rate():
+    bucket = TokenBucket(rate=2000, burst=10)
+    start = time.monotonic()
+
+    def worker():
+        for _ in range(50):
+            bucket.consume(10)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # 2000个令牌减去初始突发的10个，按2000/秒约需1秒
+    assert time.monotonic() - start >= 0.9
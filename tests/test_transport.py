@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+Transport Tests
+传输层测试 - 指定地址族/源地址时HTTPS的SNI和证书校验、代理设置转换和绕过列表
+"""
+
+import os
+import ssl
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.models import transport
+from app.models.simple_speedtest import SimpleSpeedTest
+from conftest import DATA_DIR
+
+# 证书只包含 DNS:localhost（不含127.0.0.1），按IP校验会失败
+CERT_FILE = os.path.join(DATA_DIR, 'localhost.pem')
+
+
+class _OkHandler(BaseHTTPRequestHandler):
+    """/redirect 重定向到 /，其他路径返回200"""
+
+    def do_HEAD(self):
+        if self.path == '/redirect':
+            self.send_response(301)
+            self.send_header('Location', '/')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+
+    def do_GET(self):
+        self.do_HEAD()
+        if self.path != '/redirect':
+            self.wfile.write(b'ok')
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def tls_server():
+    """在127.0.0.1随机端口启动的HTTPS服务器，返回(地址, 收到的SNI列表)"""
+    server_names = []
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(CERT_FILE)
+    context.sni_callback = lambda sock, name, ctx: server_names.append(name)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _OkHandler)
+    server.daemon_threads = True
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'https://localhost:{server.server_address[1]}/', server_names
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.mark.parametrize('options', [
+    {},
+    {'family': 'ipv4'},
+    {'source_address': '127.0.0.1'},
+    {'family': 'ipv4', 'source_address': '127.0.0.1'},
+])
+def test_https_keeps_hostname_for_sni_and_certificate(tls_server, options):
+    url, server_names = tls_server
+    response = transport.request('GET', url, verify=CERT_FILE, timeout=5, **options)
+    assert response.status_code == 200
+    assert server_names == ['localhost']
+
+
+def test_forced_family_without_addresses_raises_connection_error(tls_server):
+    url, _ = tls_server
+    if socket.has_ipv6:
+        try:
+            transport.resolve('localhost', 443, 'ipv6')
+            pytest.skip('localhost有IPv6地址')
+        except socket.gaierror:
+            pass
+    with pytest.raises(transport.requests.exceptions.ConnectionError):
+        transport.request('GET', url, family='ipv6', verify=CERT_FILE, timeout=5)
+
+
+def test_source_address_family_mismatch_is_rejected():
+    with pytest.raises(ValueError):
+        transport.TransportAdapter(family='ipv6', source_address='127.0.0.1')
+
+
+def test_source_family():
+    assert transport.source_family('10.0.0.1') == 'ipv4'
+    assert transport.source_family('fe80::1%eth0') == 'ipv6'
+
+
+def test_bound_ping_follows_https_redirect(tls_server, monkeypatch):
+    url, server_names = tls_server
+    # 未指定代理时requests读取环境变量，借此让测速类信任测试证书
+    monkeypatch.setenv('REQUESTS_CA_BUNDLE', CERT_FILE)
+    speedtest = SimpleSpeedTest(source_address='127.0.0.1')
+    assert speedtest._ping_http(url + 'redirect') is not None
+    assert server_names and set(server_names) == {'localhost'}
+
+
+def test_bypass_proxy_local_matches_single_label_hosts():
+    no_proxy = '.corp,<local>'
+    assert transport.bypass_proxy('http://intranet/', no_proxy)
+    assert transport.bypass_proxy('http://a.corp/', no_proxy)
+    assert not transport.bypass_proxy('http://example.com/', no_proxy)
+    assert not transport.bypass_proxy('http://[::1]/', no_proxy)
+
+
+def test_proxies_from_settings_keeps_local_token():
+    proxies = transport.proxies_from_settings({
+        'enabled': True, 'http_proxy': '10.0.0.1:3128', 'https_proxy': '10.0.0.1:3128',
+        'bypass_list': ['*.corp', '<local>'],
+    })
+    assert proxies == {'http': 'http://10.0.0.1:3128', 'https': 'http://10.0.0.1:3128',
+                       'no_proxy': '.corp,<local>'}
+    assert transport.proxies_from_settings({'enabled': False, 'http_proxy': '10.0.0.1:3128'}) == {}
+
+
+def test_pac_and_invalid_proxies_rejected():
+    with pytest.raises(ValueError):
+        transport.proxies_from_settings({'enabled': True, 'http_proxy': 'PAC: http://wpad/wpad.dat'})
+    with pytest.raises(ValueError):
+        transport.proxies_from_url('ftp://10.0.0.1:21')
+
+
+def test_socks_proxy_requires_pysocks(monkeypatch):
+    monkeypatch.setattr(transport.importlib.util, 'find_spec', lambda name: None)
+    with pytest.raises(ValueError):
+        transport.proxies_from_url('socks5://10.0.0.1:1080')
+    monkeypatch.setattr(transport.importlib.util, 'find_spec', lambda name: object())
+    assert transport.proxies_from_url('socks5://10.0.0.1:1080')['https'] == 'socks5://10.0.0.1:1080'
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+UDP Test Tests
+UDP测试的测试 - 序号窗口（乱序/重复/迟到）、抖动计算、服务器地址解析和参数校验、本机回环端到端测试
+"""
+
+import pytest
+
+from app.models.udp_test import UDPStreamStats, UDPTest, parse_server
+from app.services.udp_reflector import UDPReflector
+
+
+def _record(stats: UDPStreamStats, *seqs: int):
+    for seq in seqs:
+        stats.record(seq, 0.0, 0.0, 100)
+
+
+def test_in_order_stream():
+    stats = UDPStreamStats()
+    _record(stats, *range(10))
+    assert (stats.received, stats.reordered, stats.duplicates, stats.late) == (10, 0, 0, 0)
+    assert stats.max_seq == 9
+    assert stats.bytes == 1000
+
+
+def test_reordered_and_duplicate_datagrams():
+    stats = UDPStreamStats()
+    _record(stats, 0, 2, 1, 1, 2, 5, 3)
+    assert stats.received == 5
+    assert stats.reordered == 2
+    assert stats.duplicates == 2
+    assert stats.max_seq == 5
+
+
+def test_datagrams_behind_the_window_count_as_late():
+    stats = UDPStreamStats()
+    window = UDPStreamStats.WINDOW
+    _record(stats, 0, window + 10)
+    _record(stats, 5, 11, 11)
+    assert stats.late == 1
+    assert stats.reordered == 1
+    assert stats.duplicates == 1
+    assert stats.received == 3
+
+
+def test_huge_sequence_jump_resets_the_window():
+    stats = UDPStreamStats()
+    _record(stats, 1, 0xFFFFFFF0, 0xFFFFFFF0)
+    assert stats.max_seq == 0xFFFFFFF0
+    assert stats.duplicates == 1
+    assert stats._seen.bit_length() <= UDPStreamStats.WINDOW
+
+
+def test_jitter_follows_rfc3550_smoothing():
+    stats = UDPStreamStats()
+    stats.record(0, 0.000, 0.010, 100)
+    stats.record(1, 0.010, 0.030, 100)
+    # 传输时间从10ms变为20ms，抖动 = 10ms / 16
+    assert stats.jitter == pytest.approx(0.010 / 16)
+    assert stats.to_dict()['jitter_ms'] == pytest.approx(0.625)
+
+
+@pytest.mark.parametrize('server, expected', [
+    ('10.0.0.1', ('10.0.0.1', 9000)),
+    ('10.0.0.1:5201', ('10.0.0.1', 5201)),
+    ('[::1]:5201', ('::1', 5201)),
+    ('::1', ('::1', 9000)),
+])
+def test_parse_server(server, expected):
+    assert parse_server(server) == expected
+
+
+@pytest.mark.parametrize('options', [{'rate_mbps': 0}, {'rate_mbps': -5}, {'rate_mbps': float('inf')},
+                                     {'duration': 0}, {'payload': 0}, {'mode': 'burst'}])
+def test_invalid_parameters_rejected(options):
+    with pytest.raises(ValueError):
+        UDPTest('127.0.0.1', 9).run(**options)
+
+
+def test_loopback_run_against_reflector():
+    reflector = UDPReflector('127.0.0.1', 0, seed=1)
+    reflector.start()
+    try:
+        result = UDPTest('127.0.0.1', reflector.port).run(rate_mbps=1.0, duration=0.5, payload=200)
+    finally:
+        reflector.stop()
+    assert result['report_received']
+    assert result['sent'] > 0
+    assert result['loss_percent'] == 0.0